@@ -0,0 +1,69 @@
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+from .models import ArchivedBooking, ArchivedZoomMeeting, Booking, ZoomMeeting
+
+# Finished meetings and their bookings are moved out of the live tables, which
+# the slots, booking and sync queries scan, into archive tables with the same
+# columns. Lists only see archived rows when asked for history, through the
+# views of migration 0008.
+
+
+def copy_rows(cursor, model, archive_model, column, ids, archived_at):
+    """
+    Copies the rows of `model` whose `column` is in `ids` to `archive_model`
+    with a single INSERT ... SELECT, and returns how many were copied.
+    """
+    quote = cursor.db.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in model._meta.concrete_fields)
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(
+        f'INSERT INTO {quote(archive_model._meta.db_table)} ({columns}, {quote("archived_at")}) '
+        f'SELECT {columns}, %s FROM {quote(model._meta.db_table)} WHERE {quote(column)} IN ({placeholders})',
+        [cursor.db.ops.adapt_datetimefield_value(archived_at), *ids],
+    )
+    return cursor.rowcount
+
+
+def delete_rows(cursor, model, column, ids):
+    quote = cursor.db.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(column)} IN ({placeholders})', ids)
+
+
+def archive_batch(cutoff, batch_size, using=DEFAULT_DB_ALIAS):
+    """
+    Archives up to `batch_size` of the meetings that ended before `cutoff`,
+    oldest first, with their bookings, in one transaction. Returns the number
+    of meetings and bookings archived.
+    The rows are deleted without signals: they are not gone for clients, so no
+    tombstones are written, and archived meetings stay in the search index.
+    """
+    with transaction.atomic(using):
+        # Locking the meetings keeps bookings from being taken on them while they move
+        meeting_ids = list(
+            ZoomMeeting.objects.using(using).select_for_update().filter(end_time__lt=cutoff)
+            .order_by('end_time', 'id').values_list('id', flat=True)[:batch_size]
+        )
+        if not meeting_ids:
+            return 0, 0
+        archived_at = timezone.now()
+        with connections[using].cursor() as cursor:
+            meetings = copy_rows(cursor, ZoomMeeting, ArchivedZoomMeeting, 'id', meeting_ids, archived_at)
+            bookings = copy_rows(cursor, Booking, ArchivedBooking, 'zoom_meeting_id', meeting_ids, archived_at)
+            delete_rows(cursor, Booking, 'zoom_meeting_id', meeting_ids)
+            delete_rows(cursor, ZoomMeeting, 'id', meeting_ids)
+    return meetings, bookings
+
+
+def archive_finished(cutoff, batch_size, using=DEFAULT_DB_ALIAS):
+    """
+    Archives every meeting that ended before `cutoff`, a batch per
+    transaction, so locks are held briefly. Returns the totals of `archive_batch`.
+    """
+    meetings = bookings = 0
+    while True:
+        batch_meetings, batch_bookings = archive_batch(cutoff, batch_size, using)
+        meetings += batch_meetings
+        bookings += batch_bookings
+        if batch_meetings < batch_size:
+            return meetings, bookings
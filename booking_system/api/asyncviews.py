@@ -0,0 +1,267 @@
+import json
+import math
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotFound, Throttled
+from rest_framework.request import Request
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .authentication import CachedJWTAuthentication, token_user_cache
+from .cache import aget_booked_meeting_ids, iter_future_meetings
+from .events import SLOTS_CHANNEL, get_broker
+from .models import Booking, ZoomMeeting
+from .pagination import KeysetPagination
+from .renderers import dumps
+from .serializers import BookingSerializer, ZoomMeetingSerializer
+from .signals import grouped_booking_deletes
+from .throttling import check_throttles
+from .utils import send_booking_cancellation, send_booking_cancellations, send_booking_confirmation, send_zoom_meeting_creation, send_zoom_meeting_deletion
+from .zoom_utils import ZoomAPIError, ZoomUnavailableError, acreate_zoom_meeting, adelete_zoom_meeting
+from .zoomviews import ZoomServiceUnavailable
+
+# Async (ASGI-native) variants of the slot, booking and meeting endpoints.
+# Waiting on Zoom happens on the event loop; only the short transactional
+# writes hop to a thread, since Django's async ORM does not support transactions.
+
+
+UNAUTHENTICATED = {'detail': 'Authentication credentials were not provided.'}
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(dumps(data), status=status, content_type='application/json', headers=headers)
+
+
+async def aauthenticate(request):
+    """
+    Resolves the JWT bearer token on the request to a user without blocking,
+    and sets it as `request.user`.
+    """
+    request.user = await _resolve_user(request)
+    return request.user
+
+
+async def _resolve_user(request):
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return AnonymousUser()
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return AnonymousUser()
+    jti = validated_token.get(jwt_settings.JTI_CLAIM)
+    user = await token_user_cache.aget(jti) if jti is not None else None
+    if user is None:
+        try:
+            user = await sync_to_async(authentication.get_user)(validated_token)
+        except AuthenticationFailed:
+            return AnonymousUser()
+    return user
+
+
+async def athrottle(request, scope=None):
+    """
+    Applies the rate limits of a view with `throttle_scope = scope` to a
+    request that went through `aauthenticate`. Returns a 429 response if
+    it is over them.
+    """
+    wait = await sync_to_async(check_throttles)(request, scope)
+    if wait is None:
+        return None
+    exc = Throttled(wait)
+    return json_response({'detail': exc.detail}, status=429, headers={'Retry-After': str(math.ceil(wait))})
+
+
+def parse_json(request):
+    try:
+        return json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+
+
+@csrf_exempt
+@require_http_methods(['GET'])
+async def available_slots(request):
+    """
+    Async version of `AvailableSlotsView`.
+    """
+    user = await aauthenticate(request)
+    throttled = await athrottle(request)
+    if throttled:
+        return throttled
+    paginator = KeysetPagination()
+    exclude = await aget_booked_meeting_ids(user)
+    page = await sync_to_async(paginator.paginate_rows)(iter_future_meetings, Request(request), exclude=exclude)
+    return json_response({
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': page,
+    })
+
+
+@require_http_methods(['GET'])
+async def slot_events(request):
+    """
+    Streams slot changes as Server-Sent Events: `meeting.created`, `seats.changed`
+    (with the meeting's current seats) and `meeting.deleted`. Clients should
+    refresh their slots after connecting and whenever they get `resync`.
+    Needs an ASGI server; each subscriber only holds a queue on the event loop.
+    """
+    return StreamingHttpResponse(
+        _stream_events(SLOTS_CHANNEL),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+async def _stream_events(channel):
+    async with get_broker().subscribe(channel) as queue:
+        # Ask clients to reconnect after a few seconds if the stream drops
+        yield 'retry: 5000\n\n'
+        while True:
+            yield await queue.get()
+
+
+def _create_booking(request, user, data):
+    request.user = user
+    serializer = BookingSerializer(data=data, context={'request': request})
+    if not serializer.is_valid():
+        return None, serializer.errors
+    with transaction.atomic():
+        booking = serializer.save(user=user)
+        send_booking_confirmation(user.email, booking)
+    return BookingSerializer(booking).data, None
+
+
+@csrf_exempt
+@require_http_methods(['POST'])
+async def booking_create(request):
+    """
+    Async version of `BookingListCreateView.post`.
+    """
+    user = await aauthenticate(request)
+    if not user.is_authenticated:
+        return json_response(UNAUTHENTICATED, status=401)
+    throttled = await athrottle(request, 'bookings')
+    if throttled:
+        return throttled
+    data = parse_json(request)
+    if data is None:
+        return json_response({'detail': 'Malformed JSON.'}, status=400)
+    try:
+        result, errors = await sync_to_async(_create_booking)(request, user, data)
+    except APIException as exc:
+        return json_response(exc.detail, status=exc.status_code)
+    if errors:
+        return json_response(errors, status=400)
+    return json_response(result, status=201)
+
+
+def _cancel_booking(user, booking):
+    with transaction.atomic():
+        send_booking_cancellation(user.email, booking)
+        booking.delete()
+
+
+@csrf_exempt
+@require_http_methods(['DELETE'])
+async def booking_cancel(request, pk):
+    """
+    Async version of `BookingRetrieveUpdateDestroyView.delete`.
+    """
+    user = await aauthenticate(request)
+    if not user.is_authenticated:
+        return json_response(UNAUTHENTICATED, status=401)
+    throttled = await athrottle(request, 'bookings')
+    if throttled:
+        return throttled
+    try:
+        booking = await Booking.objects.select_related('zoom_meeting').aget(pk=pk, user=user)
+    except Booking.DoesNotExist:
+        return json_response({'detail': NotFound.default_detail}, status=404)
+    await sync_to_async(_cancel_booking)(user, booking)
+    return HttpResponse(status=204)
+
+
+def _save_meeting(serializer, user, meeting_id):
+    with transaction.atomic():
+        meeting = serializer.save(user=user, meeting_id=meeting_id)
+        send_zoom_meeting_creation(user.email, meeting)
+    return ZoomMeetingSerializer(meeting).data
+
+
+@csrf_exempt
+@require_http_methods(['POST'])
+async def zoom_meeting_create(request):
+    """
+    Async version of `ZoomMeetingListCreateView.post`.
+    """
+    user = await aauthenticate(request)
+    if not user.is_authenticated:
+        return json_response(UNAUTHENTICATED, status=401)
+    throttled = await athrottle(request, 'zoom')
+    if throttled:
+        return throttled
+    data = parse_json(request)
+    if data is None:
+        return json_response({'detail': 'Malformed JSON.'}, status=400)
+    serializer = ZoomMeetingSerializer(data=data, context={'request': request})
+    # Validation looks up the host's calendar
+    if not await sync_to_async(serializer.is_valid)():
+        return json_response(serializer.errors, status=400)
+    start_time = serializer.validated_data['start_time']
+    end_time = serializer.validated_data['end_time']
+    try:
+        zoom_response = await acreate_zoom_meeting(
+            topic=serializer.validated_data['topic'],
+            start_time=start_time,
+            duration=int((end_time - start_time).total_seconds() // 60)
+        )
+    except ZoomUnavailableError:
+        return json_response({'detail': ZoomServiceUnavailable.default_detail}, status=503)
+    except ZoomAPIError:
+        zoom_response = {}
+    if not zoom_response.get('id'):
+        return json_response(['Failed to create Zoom meeting'], status=400)
+    result = await sync_to_async(_save_meeting)(serializer, user, zoom_response['id'])
+    return json_response(result, status=201)
+
+
+def _delete_meeting(user, meeting):
+    with transaction.atomic(), grouped_booking_deletes():
+        send_zoom_meeting_deletion(user.email, meeting)
+        send_booking_cancellations(meeting, meeting.bookings.all())
+        meeting.delete()
+
+
+@csrf_exempt
+@require_http_methods(['DELETE'])
+async def zoom_meeting_delete(request, pk):
+    """
+    Async version of `ZoomMeetingRetrieveDestroyView.delete`.
+    """
+    user = await aauthenticate(request)
+    if not user.is_authenticated:
+        return json_response(UNAUTHENTICATED, status=401)
+    throttled = await athrottle(request, 'zoom')
+    if throttled:
+        return throttled
+    try:
+        meeting = await ZoomMeeting.objects.aget(pk=pk, user=user)
+    except ZoomMeeting.DoesNotExist:
+        return json_response({'detail': NotFound.default_detail}, status=404)
+    try:
+        zoom_response = await adelete_zoom_meeting(meeting.meeting_id, meeting.occurrence_id)
+    except ZoomUnavailableError:
+        return json_response({'detail': ZoomServiceUnavailable.default_detail}, status=503)
+    except ZoomAPIError:
+        zoom_response = {}
+    if zoom_response.get('status') not in (204, 404):
+        return json_response(['Failed to delete Zoom meeting'], status=400)
+    await sync_to_async(_delete_meeting)(user, meeting)
+    return HttpResponse(status=204)
@@ -0,0 +1,154 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+
+def _user_version_key(user_id):
+    return f'auth:user:version:{user_id}'
+
+
+def _revoked_token_key(jti):
+    return f'auth:token:revoked:{jti}'
+
+
+class TokenUserCache:
+    """
+    In-process, size-bounded cache from an access token's `jti` to its user.
+
+    Entries live for `JWT_USER_CACHE_TIMEOUT` seconds, never past the token's
+    own expiry. When the user changes or the token is blacklisted (see
+    `api.signals`), the entries are evicted in this process and marked stale in
+    the default cache, which every lookup checks. When that cache is shared
+    (Redis), other workers drop them on their next request.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._tokens_by_user = {}
+
+    def get(self, jti):
+        entry = self._get_entry(jti)
+        if entry is None:
+            return None
+        keys = [_user_version_key(entry[0].pk), _revoked_token_key(jti)]
+        return self._check_entry(jti, entry, cache.get_many(keys))
+
+    async def aget(self, jti):
+        """
+        Async version of `get`.
+        """
+        entry = self._get_entry(jti)
+        if entry is None:
+            return None
+        keys = [_user_version_key(entry[0].pk), _revoked_token_key(jti)]
+        return self._check_entry(jti, entry, await cache.aget_many(keys))
+
+    def _get_entry(self, jti):
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is None:
+                return None
+            user, expires_at, version = entry
+            if expires_at <= time.monotonic():
+                self._discard(jti)
+                return None
+            self._entries.move_to_end(jti)
+        return user, version
+
+    def _check_entry(self, jti, entry, shared):
+        user, version = entry
+        if _revoked_token_key(jti) in shared or shared.get(_user_version_key(user.pk), 0) != version:
+            with self._lock:
+                self._discard(jti)
+            return None
+        # Every request gets its own copy, so per-request state set on the user never leaks
+        return copy.copy(user)
+
+    def user_version(self, user_id):
+        """
+        The user's shared version, to read before loading the user for `set`.
+        """
+        return cache.get(_user_version_key(user_id), 0)
+
+    def set(self, jti, user, token_expires_at, version=0):
+        timeout = min(settings.JWT_USER_CACHE_TIMEOUT, token_expires_at - time.time())
+        if timeout <= 0:
+            return
+        with self._lock:
+            self._discard(jti)
+            self._entries[jti] = (user, time.monotonic() + timeout, version)
+            self._tokens_by_user.setdefault(user.pk, set()).add(jti)
+            while len(self._entries) > settings.JWT_USER_CACHE_MAX_ENTRIES:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_token(self, jti):
+        # No entry outlives JWT_USER_CACHE_TIMEOUT, and neither needs the mark
+        cache.set(_revoked_token_key(jti), True, settings.JWT_USER_CACHE_TIMEOUT)
+        with self._lock:
+            self._discard(jti)
+
+    def invalidate_user(self, user_id):
+        key = _user_version_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, None)
+        with self._lock:
+            for jti in self._tokens_by_user.pop(user_id, ()):
+                self._entries.pop(jti, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _discard(self, jti):
+        entry = self._entries.pop(jti, None)
+        if entry is not None:
+            tokens = self._tokens_by_user.get(entry[0].pk)
+            if tokens is not None:
+                tokens.discard(jti)
+                if not tokens:
+                    del self._tokens_by_user[entry[0].pk]
+
+
+token_user_cache = TokenUserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    `JWTAuthentication` that remembers the user behind each validated access
+    token for a few seconds, so repeat requests with the same token skip the
+    user query. Inactive users and revoked tokens are still rejected, because
+    only users that passed those checks are cached, and cached users are
+    dropped by every worker sharing the cache once they change. When the simplejwt blacklist app
+    is installed, blacklisted access tokens are rejected as well.
+    """
+    def get_user(self, validated_token):
+        jti = validated_token.get(jwt_settings.JTI_CLAIM)
+        if jti is None or settings.JWT_USER_CACHE_TIMEOUT <= 0:
+            return super().get_user(validated_token)
+        user = token_user_cache.get(jti)
+        if user is None:
+            version = token_user_cache.user_version(validated_token.get(jwt_settings.USER_ID_CLAIM))
+            self.check_blacklist(jti)
+            user = super().get_user(validated_token)
+            token_user_cache.set(jti, user, validated_token.get('exp', float('inf')), version)
+        return user
+
+    @staticmethod
+    def check_blacklist(jti):
+        if not apps.is_installed('rest_framework_simplejwt.token_blacklist'):
+            return
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            raise AuthenticationFailed(_("Token is blacklisted"), code="token_blacklisted")
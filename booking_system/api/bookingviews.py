@@ -1,12 +1,25 @@
 from rest_framework import generics, permissions
-from api.models import Booking, ZoomMeeting
-from .serializers import UserSerializer, BookingSerializer, ZoomMeetingSerializer
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.views import TokenObtainPairView
+from api.models import Booking, BookingHistory, MeetingSeries
+from .mixins import HistoryMixin, RowListMixin, history_parameter
+from .recurrence import expand_series
+from .serializers import UserSerializer, BookingSerializer, ZoomMeetingSerializer, BulkBookingSerializer, BulkBookingCancelSerializer, booking_rows
 from django.contrib.auth.models import User
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters as drf_filters
-from .utils import send_booking_confirmation, send_booking_cancellation
-from drf_yasg.utils import swagger_auto_schema
+from .search import IndexedSearchFilter, RankOrderingFilter
+from .utils import send_booking_confirmation, send_booking_cancellation, send_booking_confirmations, send_bulk_booking_cancellations
+from drf_yasg.utils import no_body, swagger_auto_schema
+from .events import publish_slot_changes
+from django.db import transaction
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from .cache import (
+    future_meetings_queryset, get_booked_meeting_ids, invalidate_booked_meeting_ids, invalidate_future_meetings,
+    iter_future_meetings, stats as slots_cache_stats
+)
 
 class RegisterView(generics.CreateAPIView):
     """
@@ -18,6 +31,7 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()  
     permission_classes = (permissions.AllowAny,)
     serializer_class = UserSerializer
+    throttle_scope = 'auth'
 
     @swagger_auto_schema(
         operation_description="Register a new user.",
@@ -27,23 +41,38 @@ class RegisterView(generics.CreateAPIView):
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
 
-class BookingListCreateView(generics.ListCreateAPIView):
+class LoginView(TokenObtainPairView):
+    """
+    View that issues a JWT access and refresh token pair for valid credentials.
+    Shares the 'auth' rate limit with registration, against password guessing.
+    """
+    throttle_scope = 'auth'
+
+class BookingListCreateView(HistoryMixin, RowListMixin, generics.ListCreateAPIView):
     """
     View that lists and creates bookings for the authenticated user.
     GET: Lists all bookings for the authenticated user,
     filtered by `start_time`, `end_time`, and `user__username`.
     Can be ordered by `start_time`,`end_time`, and `created_at`.
+    Results are cursor paginated; follow the `next`/`previous` links to page.
+    Bookings of archived meetings are only listed with `?history=true`.
     POST: Creates a new booking for the authenticated user and sends a booking confirmation email.
     """
     serializer_class = BookingSerializer
+    row_serializer = booking_rows
+    live_model = Booking
+    history_model = BookingHistory
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, drf_filters.SearchFilter, drf_filters.OrderingFilter]
+    throttle_scope = 'bookings'
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, RankOrderingFilter]
     filterset_fields = ['zoom_meeting__start_time', 'zoom_meeting__end_time']
-    search_fields = ['user__username', 'zoom_meeting__topic']
+    search_fields = ['user__username', '@zoom_meeting__topic']
     ordering_fields = ['zoom_meeting__start_time', 'zoom_meeting__end_time', 'created_at']
+    ordering = ['zoom_meeting__start_time']
 
     @swagger_auto_schema(
         operation_description="List all bookings for the authenticated user.",
+        manual_parameters=[history_parameter],
         responses={200: BookingSerializer(many=True)},
         security=[{'Bearer': []}]
     )
@@ -64,16 +93,17 @@ class BookingListCreateView(generics.ListCreateAPIView):
         Returns a queryset of bookings for the authenticated user.
         """
         if self.request.user.is_authenticated:
-            return Booking.objects.filter(user=self.request.user)
+            return BookingSerializer.setup_eager_loading(self.get_model().objects.filter(user=self.request.user))
         else:
             return Booking.objects.none()
 
     def perform_create(self, serializer):
         """
-        Creates a new booking for the authenticated user and sends a booking confirmation email.
+        Creates a new booking for the authenticated user and queues a booking confirmation email.
         """
-        booking = serializer.save(user=self.request.user)
-        send_booking_confirmation(self.request.user.email, booking)
+        with transaction.atomic():
+            booking = serializer.save(user=self.request.user)
+            send_booking_confirmation(self.request.user.email, booking)
 
 class BookingRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     """
@@ -84,6 +114,7 @@ class BookingRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     """
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'bookings'
 
     @swagger_auto_schema(
         operation_description="Retrieve a specific booking for the authenticated user.",
@@ -115,20 +146,107 @@ class BookingRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         Returns a queryset of the bookings for the authenticated user.
         """
         if self.request.user.is_authenticated:
-            return Booking.objects.filter(user=self.request.user)
+            # Not restricted with only(): saving a partly loaded booking would skip
+            # its updated_at and copied times, and the sync feed would miss the change
+            return Booking.objects.filter(user=self.request.user).select_related('zoom_meeting')
         else:
             return Booking.objects.none()
    
     def perform_destroy(self, instance):
         """
-        Deletes the booking and sends a cancellation email to the user.
+        Deletes the booking and queues a cancellation email to the user.
         """
-        send_booking_cancellation(self.request.user.email, instance)
-        instance.delete()
+        with transaction.atomic():
+            send_booking_cancellation(self.request.user.email, instance)
+            instance.delete()
+
+class BulkBookingView(APIView):
+    """
+    View that books many seats in one request.
+    POST: Books every user in `user_ids` (staff only, defaults to the authenticated user)
+    onto every meeting in `zoom_meeting_ids` and returns a result per pair.
+    Duplicates and overlaps are checked with one query each, the bookings are inserted with one
+    INSERT and the confirmation emails are queued as one batch.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'bookings'
+
+    @swagger_auto_schema(
+        operation_description="Book several meetings, or several users (staff only), at once.",
+        request_body=BulkBookingSerializer,
+        security=[{'Bearer': []}]
+    )
+    def post(self, request, *args, **kwargs):
+        return self.book(request, request.data)
+
+    def book(self, request, data):
+        serializer = BulkBookingSerializer(data=data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            results = serializer.save()
+            send_booking_confirmations(serializer.bookings)
+            # bulk_create and the seat update skip the model signals
+            if serializer.bookings:
+                invalidate_future_meetings()
+                publish_slot_changes('seats.changed', {booking.zoom_meeting_id for booking in serializer.bookings})
+            for user_id in {booking.user_id for booking in serializer.bookings}:
+                invalidate_booked_meeting_ids(user_id)
+        return Response({'results': results})
+
+class SeriesBookingView(BulkBookingView):
+    """
+    View that books the whole of a meeting series.
+    POST: Books the authenticated user onto every upcoming occurrence of the
+    series, creating the occurrences not created yet, the same way as a bulk
+    booking, and returns a result per occurrence.
+    """
+    @swagger_auto_schema(
+        operation_description="Book every upcoming occurrence of a meeting series.",
+        request_body=no_body,
+        security=[{'Bearer': []}]
+    )
+    def post(self, request, pk, *args, **kwargs):
+        series = get_object_or_404(MeetingSeries, pk=pk)
+        expand_series(series)
+        occurrence_ids = list(
+            series.occurrences.filter(start_time__gt=timezone.now()).order_by('start_time').values_list('pk', flat=True)
+        )
+        if not occurrence_ids:
+            raise ValidationError("This series has no upcoming occurrences.")
+        return self.book(request, {'zoom_meeting_ids': occurrence_ids})
+
+class BulkBookingCancelView(APIView):
+    """
+    View that cancels many bookings in one request.
+    POST: Cancels the bookings in `booking_ids` (any booking for staff, otherwise
+    only the user's own) and queues the cancellation emails as one batch.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'bookings'
+
+    @swagger_auto_schema(
+        operation_description="Cancel several bookings at once.",
+        request_body=BulkBookingCancelSerializer,
+        security=[{'Bearer': []}]
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = BulkBookingCancelSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            results = serializer.save()
+            send_bulk_booking_cancellations(serializer.bookings)
+        return Response({'results': results})
 
 class AvailableSlotsView(generics.ListAPIView):
+    """
+    View that lists the upcoming meetings that still have free seats and that
+    the user can still book, paginated by `start_time`.
+    The meetings and the user's booked meeting ids are served from the slots cache.
+    """
     serializer_class = ZoomMeetingSerializer
     permission_classes = (permissions.AllowAny,)
+    filter_backends = []
+    ordering = ['start_time']
 
     @swagger_auto_schema(
         operation_description="List available booking slots.",
@@ -140,4 +258,23 @@ class AvailableSlotsView(generics.ListAPIView):
 
     def get_queryset(self):
         # get all available meetings that have a date in the future and not belong to the authenticated user and the user hasn't booked them already
-        return ZoomMeeting.objects.filter(start_time__gte=timezone.now()).exclude(bookings__user=self.request.user)
\ No newline at end of file
+        return future_meetings_queryset().exclude(pk__in=get_booked_meeting_ids(self.request.user))
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginator.paginate_rows(
+            iter_future_meetings, request, exclude=get_booked_meeting_ids(request.user)
+        )
+        return self.get_paginated_response(page)
+
+class SlotsCacheStatsView(APIView):
+    """
+    View that reports the slots cache hit ratios and recompute times of this process.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_description="Slots cache statistics.",
+        security=[{'Bearer': []}]
+    )
+    def get(self, request, *args, **kwargs):
+        return Response(slots_cache_stats.snapshot())
\ No newline at end of file
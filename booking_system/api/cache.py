@@ -0,0 +1,244 @@
+import threading
+import time
+import uuid
+from time import perf_counter
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Booking, ZoomMeeting
+
+FUTURE_MEETINGS_VERSION_KEY = 'slots:future:version'
+
+
+class CacheStats:
+    """
+    In-process hit/miss and recompute-time counters for the slots cache.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {
+                'future_hits': 0,
+                'future_misses': 0,
+                'booked_hits': 0,
+                'booked_misses': 0,
+                'recompute_count': 0,
+                'recompute_seconds_total': 0.0,
+                'recompute_seconds_last': 0.0,
+            }
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def record_recompute(self, seconds):
+        with self._lock:
+            self.counters['recompute_count'] += 1
+            self.counters['recompute_seconds_total'] += seconds
+            self.counters['recompute_seconds_last'] = seconds
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.counters)
+        for prefix in ('future', 'booked'):
+            lookups = data[f'{prefix}_hits'] + data[f'{prefix}_misses']
+            data[f'{prefix}_hit_ratio'] = data[f'{prefix}_hits'] / lookups if lookups else None
+        return data
+
+
+stats = CacheStats()
+
+
+def future_meetings_queryset():
+    """
+    Upcoming meetings that still have free seats, in slot order.
+    """
+    return ZoomMeeting.objects.filter(
+        start_time__gte=timezone.now(), booked_count__lt=F('capacity')
+    ).order_by('start_time', 'id')
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_future_meetings_version():
+    """
+    Counter bumped on every meeting or booking change.
+    """
+    return _get_version(FUTURE_MEETINGS_VERSION_KEY)
+
+
+def _bump_future_meetings_version():
+    _bump_version(FUTURE_MEETINGS_VERSION_KEY)
+
+
+def _booked_meeting_ids_key(user_id):
+    return f'slots:booked:{user_id}'
+
+
+def _bookings_version_key(user_id):
+    return f'sync:bookings:version:{user_id}'
+
+
+def get_bookings_version(user_id):
+    """
+    Counter bumped on every change to the user's bookings.
+    """
+    return _get_version(_bookings_version_key(user_id))
+
+
+def compute_future_meetings(position=None, reverse=False):
+    """
+    Serializes up to `SLOTS_CACHE_WINDOW` future meetings following the
+    `(start_time, id)` `position` (preceding it when `reverse`) into
+    `(start_time, id, data)` rows, in that walking order.
+    """
+    from .serializers import zoom_meeting_rows
+
+    # Read from the primary: these rows are shared by every user until the next
+    # invalidation, so they must not come from a replica that is still catching up
+    queryset = future_meetings_queryset().using('default')
+    if reverse:
+        queryset = queryset.order_by('-start_time', '-id')
+    if position is not None:
+        start_time, pk = position
+        if reverse:
+            queryset = queryset.filter(Q(start_time__lt=start_time) | Q(start_time=start_time, id__lt=pk))
+        else:
+            queryset = queryset.filter(Q(start_time__gt=start_time) | Q(start_time=start_time, id__gt=pk))
+    rows = zoom_meeting_rows.values(queryset)[:settings.SLOTS_CACHE_WINDOW]
+    return [(row['start_time'], row['id'], zoom_meeting_rows.to_representation(row)) for row in rows]
+
+
+def _future_meetings_key(version, position, reverse):
+    anchor = 'start' if position is None else f'{position[0].isoformat()}/{position[1]}'
+    return f"slots:future:v{version}:{'before' if reverse else 'after'}:{anchor}"
+
+
+def get_future_meetings_window(version, position=None, reverse=False):
+    """
+    Returns the cached rows of `compute_future_meetings`, recomputing them on a miss.
+    Concurrent misses on the same window wait for the one worker that recomputes it.
+    """
+    key = _future_meetings_key(version, position, reverse)
+    rows = cache.get(key)
+    if rows is not None:
+        stats.incr('future_hits')
+        return rows
+    stats.incr('future_misses')
+    lock_key = f'{key}:lock'
+    owner = uuid.uuid4().hex
+    if not cache.add(lock_key, owner, settings.SLOTS_CACHE_LOCK_TIMEOUT):
+        deadline = time.monotonic() + settings.SLOTS_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(0.01)
+            rows = cache.get(key)
+            if rows is not None:
+                return rows
+        # The recomputing worker died or is stuck, compute the rows ourselves
+    try:
+        started = perf_counter()
+        rows = compute_future_meetings(position, reverse)
+        stats.record_recompute(perf_counter() - started)
+        cache.set(key, rows, settings.SLOTS_CACHE_TIMEOUT)
+    finally:
+        if cache.get(lock_key) == owner:
+            cache.delete(lock_key)
+    return rows
+
+
+def iter_future_meetings(position=None, reverse=False):
+    """
+    Yields the future meeting rows following `position` (preceding it when
+    `reverse`), reading them one cached window at a time, so a page costs the
+    same however many slots there are.
+    Meetings that started since their window was computed are skipped.
+    """
+    version = get_future_meetings_version()
+    now = timezone.now()
+    while True:
+        rows = get_future_meetings_window(version, position, reverse)
+        for row in rows:
+            if row[0] >= now:
+                yield row
+            elif reverse:
+                return
+        if len(rows) < settings.SLOTS_CACHE_WINDOW:
+            return
+        position = rows[-1][:2]
+
+
+def get_booked_meeting_ids(user):
+    """
+    Returns the set of meeting ids the user has booked, cached per user.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    key = _booked_meeting_ids_key(user.pk)
+    meeting_ids = cache.get(key)
+    if meeting_ids is None:
+        stats.incr('booked_misses')
+        # From the primary, as the set is cached: other processes' writes do not pin this user's reads
+        meeting_ids = frozenset(
+            Booking.objects.using('default').filter(user=user).values_list('zoom_meeting_id', flat=True)
+        )
+        cache.set(key, meeting_ids, settings.SLOTS_CACHE_TIMEOUT)
+    else:
+        stats.incr('booked_hits')
+    return meeting_ids
+
+
+async def aget_booked_meeting_ids(user):
+    """
+    Async version of `get_booked_meeting_ids`.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    key = _booked_meeting_ids_key(user.pk)
+    meeting_ids = await cache.aget(key)
+    if meeting_ids is None:
+        stats.incr('booked_misses')
+        meeting_ids = frozenset([
+            meeting_id async for meeting_id in
+            Booking.objects.using('default').filter(user=user).values_list('zoom_meeting_id', flat=True)
+        ])
+        await cache.aset(key, meeting_ids, settings.SLOTS_CACHE_TIMEOUT)
+    else:
+        stats.incr('booked_hits')
+    return meeting_ids
+
+
+def invalidate_future_meetings():
+    # Invalidate now, and again once the transaction commits so a reader that
+    # recomputed from pre-commit data in between cannot keep stale rows cached
+    _bump_future_meetings_version()
+    transaction.on_commit(_bump_future_meetings_version)
+
+
+def invalidate_booked_meeting_ids(user_id):
+    key = _booked_meeting_ids_key(user_id)
+    version_key = _bookings_version_key(user_id)
+
+    def invalidate():
+        cache.delete(key)
+        _bump_version(version_key)
+
+    invalidate()
+    transaction.on_commit(invalidate)
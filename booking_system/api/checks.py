@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Cache backends whose entries are private to one process
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    JWT user invalidation, read-replica pinning, the Zoom token refresh lock
+    and the slots cache versions rely on a cache shared by every worker.
+    """
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            "The default cache is private to each process.",
+            hint=(
+                "Set REDIS_URL when running more than one worker. Otherwise JWT user invalidation, "
+                "read-replica pinning, the Zoom token refresh lock and the slots cache versions only "
+                "hold within the process that made the change."
+            ),
+            id='api.W001',
+        )
+    ]
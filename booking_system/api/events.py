@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from .renderers import dumps
+
+logger = logging.getLogger(__name__)
+
+# Server-push of slot changes. Writes publish Server-Sent Events frames to a
+# broker, and every process fans them out to its subscribers, each of which
+# is an asyncio queue read by a streaming response on the ASGI event loop.
+
+SLOTS_CHANNEL = 'slots'
+KEEPALIVE = ': keepalive\n\n'
+# Sent instead of the missed events when a subscriber falls too far behind
+RESYNC = 'event: resync\ndata: {}\n\n'
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {dumps(data).decode()}\n\n'
+
+
+def _put(queue, message):
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        # A slow client gets one resync event rather than unbounded buffering
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESYNC)
+
+
+class InProcessBroker:
+    """
+    Delivers published messages to the subscribers of this process.
+    `publish` may be called from any thread; subscribers are grouped by event
+    loop, so a message costs one thread-safe wakeup per loop, however many
+    clients are listening. Idle subscribers hold only a queue: a single task
+    per loop sends them keepalives.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # event loop -> channel -> subscriber queues
+        self._loops = {}
+        self._keepalives = {}
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+    def deliver(self, channel, message):
+        with self._lock:
+            targets = [(loop, list(channels.get(channel, ()))) for loop, channels in self._loops.items()]
+        for loop, queues in targets:
+            if queues:
+                try:
+                    loop.call_soon_threadsafe(self._fan_out, queues, message)
+                except RuntimeError:
+                    # The loop was closed without its subscribers unsubscribing
+                    with self._lock:
+                        self._loops.pop(loop, None)
+
+    @staticmethod
+    def _fan_out(queues, message):
+        for queue in queues:
+            _put(queue, message)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(queues) for channels in self._loops.values() for queues in channels.values())
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        """
+        Yields a queue receiving the messages published to `channel` from now on,
+        interleaved with keepalives, until the block exits.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._loops.setdefault(loop, {}).setdefault(channel, set()).add(queue)
+            if loop not in self._keepalives:
+                self._keepalives[loop] = loop.create_task(self._send_keepalives(loop))
+        self.on_subscribe()
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                channels = self._loops.get(loop, {})
+                channels.get(channel, set()).discard(queue)
+                if not channels.get(channel):
+                    channels.pop(channel, None)
+                if not channels:
+                    self._loops.pop(loop, None)
+                    keepalive = self._keepalives.pop(loop, None)
+                    if keepalive is not None:
+                        keepalive.cancel()
+
+    def on_subscribe(self):
+        pass
+
+    async def _send_keepalives(self, loop):
+        while True:
+            await asyncio.sleep(settings.EVENTS_KEEPALIVE_SECONDS)
+            with self._lock:
+                queues = [queue for queues in self._loops.get(loop, {}).values() for queue in queues]
+            self._fan_out(queues, KEEPALIVE)
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Publishes through Redis pub/sub, so subscribers connected to any process
+    see every write. Each process runs one listener thread that hands the
+    messages to its own subscribers, reconnecting with backoff when Redis
+    goes away.
+    """
+    prefix = 'events:'
+    reconnect_delay = 0.5
+    max_reconnect_delay = 30
+
+    def __init__(self, url=None, client=None):
+        super().__init__()
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url or settings.EVENTS_REDIS_URL)
+        self.redis = client
+        self._listener = None
+
+    def publish(self, channel, message):
+        # Runs once the write has committed: subscribers miss the event rather
+        # than the request failing when Redis is down
+        try:
+            self.redis.publish(self.prefix + channel, message)
+        except Exception:
+            logger.exception("Could not publish to the %s events channel", channel)
+
+    def on_subscribe(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='events-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        delay, reconnected = self.reconnect_delay, False
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(self.prefix + '*')
+                delay = self.reconnect_delay
+                if reconnected:
+                    # Messages published while disconnected are lost: subscribers reload their state
+                    self._resync_all()
+                for item in pubsub.listen():
+                    channel = item['channel'].decode()[len(self.prefix):]
+                    self.deliver(channel, item['data'].decode())
+            except Exception:
+                logger.exception("Lost the events connection to Redis, reconnecting in %ss", delay)
+            finally:
+                pubsub.close()
+            time.sleep(delay)
+            delay, reconnected = min(delay * 2, self.max_reconnect_delay), True
+
+    def _resync_all(self):
+        with self._lock:
+            channels = {channel for channels in self._loops.values() for channel in channels}
+        for channel in channels:
+            self.deliver(channel, RESYNC)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """
+    Returns this process's broker, an instance of the `EVENTS_BROKER` class.
+    """
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.EVENTS_BROKER)()
+        return _broker
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting == 'EVENTS_BROKER':
+        with _broker_lock:
+            _broker = None
+
+
+# Meetings whose slot changed in the current thread's transactions, published
+# together on commit. Ids left over from a rolled back transaction only cause
+# an extra event with the meeting's unchanged state.
+_pending = threading.local()
+
+
+def publish_slot_changes(event, meeting_ids):
+    """
+    Publishes `event` on the slots channel with the current seats of each
+    meeting, once the transaction commits.
+    """
+    pending = getattr(_pending, 'events', None)
+    if pending is None:
+        pending = _pending.events = {}
+    pending.setdefault(event, set()).update(meeting_ids)
+    transaction.on_commit(_flush_slot_changes)
+
+
+def publish_meeting_deleted(meeting_id):
+    transaction.on_commit(
+        lambda: get_broker().publish(SLOTS_CHANNEL, format_event('meeting.deleted', {'id': meeting_id}))
+    )
+
+
+def _flush_slot_changes():
+    from .models import ZoomMeeting
+
+    pending = getattr(_pending, 'events', None)
+    if not pending:
+        return
+    _pending.events = {}
+    meeting_ids = set().union(*pending.values())
+    meetings = {
+        row['id']: row for row in ZoomMeeting.objects.filter(pk__in=meeting_ids).values(
+            'id', 'topic', 'start_time', 'end_time', 'capacity', 'booked_count'
+        )
+    }
+    broker = get_broker()
+    for event, ids in pending.items():
+        for meeting_id in sorted(ids):
+            # Meetings deleted in the meantime have their own event
+            if meeting_id in meetings:
+                broker.publish(SLOTS_CHANNEL, format_event(event, meetings[meeting_id]))
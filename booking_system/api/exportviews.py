@@ -0,0 +1,289 @@
+import csv
+from datetime import timezone as dt_timezone
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import permissions
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.views import APIView
+from .models import Booking, ZoomMeeting
+
+# Schedule exports are streamed: rows are read from the database a chunk at a
+# time and written out as they arrive, so memory use does not grow with the
+# size of the export and the first bytes leave before the query finishes.
+
+user_parameter = openapi.Parameter(
+    'user', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+    description="Staff only: export this user's schedule instead of their own."
+)
+
+
+def iterate_rows(queryset, chunk_size):
+    """
+    Yields the `values()` rows of `queryset` in (start_time, id) order,
+    holding at most `chunk_size` of them in memory.
+    """
+    queryset = queryset.order_by('start_time', 'id')
+    if not connections[queryset.db].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+        yield from queryset.iterator(chunk_size=chunk_size)
+        return
+    # Behind a transaction pooler, page through the rows instead of holding a cursor open
+    last = None
+    while True:
+        batch = queryset
+        if last is not None:
+            batch = batch.filter(
+                Q(start_time__gt=last['start_time']) | Q(start_time=last['start_time'], id__gt=last['id'])
+            )
+        rows = list(batch[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]
+
+
+def buffered(lines, size):
+    """
+    Joins every `size` lines into one chunk, to avoid a write per row.
+    The first line is sent on its own, so the download starts right away.
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is not None:
+        yield first
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+async def aiterate(chunks):
+    """
+    Async iterator over `chunks` for ASGI servers. Django reads a sync
+    iterator whole before sending it under ASGI, so each chunk is instead
+    produced in the request's sync thread and sent as soon as it is ready.
+    """
+    chunks = iter(chunks)
+    done = object()
+    try:
+        while True:
+            chunk = await sync_to_async(next)(chunks, done)
+            if chunk is done:
+                return
+            yield chunk
+    finally:
+        # Closes the database cursor too when the client goes away early
+        await sync_to_async(chunks.close)()
+
+
+class Echo:
+    """
+    File-like object for `csv.writer` that returns each written row.
+    """
+    def write(self, value):
+        return value
+
+
+def csv_cell(value):
+    # Spreadsheets run cells starting with these characters as formulas
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@', '\t', '\r'):
+        return "'" + value
+    return value
+
+
+def ics_text(value):
+    return value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def iso_datetime(value, tz):
+    """
+    Formats `value` in `tz` the way the API's `DateTimeField` does. The export
+    resolves the time zone once, rather than on every value.
+    """
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def ics_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def ics_line(line):
+    """
+    Folds a content line into lines of at most 75 octets, as RFC 5545 requires.
+    """
+    encoded = line.encode()
+    parts, start, limit = [], 0, 75
+    while len(encoded) - start > limit:
+        end = start + limit
+        # Never split a multi-byte character
+        while encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        # Continuation lines start with a space
+        start, limit = end, 74
+    parts.append(encoded[start:].decode())
+    return '\r\n '.join(parts) + '\r\n'
+
+
+class ScheduleExportView(APIView):
+    """
+    Base view for exporting the user's schedule as `.ics` or `.csv`.
+    Subclasses provide the rows, the CSV columns and the calendar events.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    filename = None
+    csv_header = ()
+    content_types = {
+        'ics': 'text/calendar; charset=utf-8',
+        'csv': 'text/csv; charset=utf-8',
+    }
+
+    def export(self, file_format):
+        if file_format not in self.content_types:
+            raise Http404
+        self.timezone = timezone.get_current_timezone()
+        rows = iterate_rows(self.get_queryset(self.get_owner()), settings.EXPORT_CHUNK_SIZE)
+        lines = self.ics_lines(rows) if file_format == 'ics' else self.csv_lines(rows)
+        content = buffered(lines, settings.EXPORT_CHUNK_SIZE)
+        if isinstance(self.request._request, ASGIRequest):
+            content = aiterate(content)
+        return StreamingHttpResponse(
+            content,
+            content_type=self.content_types[file_format],
+            headers={'Content-Disposition': f'attachment; filename="{self.filename}.{file_format}"'},
+        )
+
+    def get_owner(self):
+        user_id = self.request.query_params.get('user')
+        if user_id is None:
+            return self.request.user
+        if not self.request.user.is_staff:
+            raise PermissionDenied("Only staff can export another user's schedule.")
+        try:
+            return User.objects.get(pk=int(user_id))
+        except (ValueError, User.DoesNotExist):
+            raise Http404
+
+    def iso(self, value):
+        return iso_datetime(value, self.timezone)
+
+    def get_queryset(self, owner):
+        raise NotImplementedError('.get_queryset() must be overridden')
+
+    def get_csv_row(self, row):
+        raise NotImplementedError('.get_csv_row() must be overridden')
+
+    def get_event(self, row):
+        """
+        Returns the properties of the calendar event for `row`, in order.
+        """
+        raise NotImplementedError('.get_event() must be overridden')
+
+    def csv_lines(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.csv_header)
+        for row in rows:
+            yield writer.writerow([csv_cell(value) for value in self.get_csv_row(row)])
+
+    def ics_lines(self, rows):
+        yield 'BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//BookingSystem//Schedule Export//EN\r\nCALSCALE:GREGORIAN\r\n'
+        for row in rows:
+            yield ''.join(
+                ['BEGIN:VEVENT\r\n']
+                + [ics_line(f'{name}:{value}') for name, value in self.get_event(row)]
+                + ['END:VEVENT\r\n']
+            )
+        yield 'END:VCALENDAR\r\n'
+
+
+class BookingExportView(ScheduleExportView):
+    """
+    Exports the user's bookings, with their meetings, as `.ics` or `.csv`.
+    """
+    filename = 'bookings'
+    csv_header = ('id', 'meeting', 'zoom_meeting_id', 'topic', 'start_time', 'end_time', 'created_at')
+
+    @swagger_auto_schema(
+        operation_description="Streams the user's bookings as an iCalendar (`export.ics`) or CSV (`export.csv`) file.",
+        manual_parameters=[user_parameter],
+        responses={200: 'iCalendar or CSV file'},
+        security=[{'Bearer': []}]
+    )
+    def get(self, request, file_format, *args, **kwargs):
+        return self.export(file_format)
+
+    def get_queryset(self, owner):
+        return Booking.objects.filter(user=owner).values(
+            'id', 'zoom_meeting_id', 'zoom_meeting__meeting_id', 'zoom_meeting__topic',
+            'zoom_meeting__updated_at', 'start_time', 'end_time', 'created_at',
+        )
+
+    def get_csv_row(self, row):
+        return [
+            row['id'], row['zoom_meeting_id'], row['zoom_meeting__meeting_id'], row['zoom_meeting__topic'],
+            self.iso(row['start_time']), self.iso(row['end_time']),
+            self.iso(row['created_at']),
+        ]
+
+    def get_event(self, row):
+        return [
+            ('UID', f"booking-{row['id']}@{self.request.get_host()}"),
+            ('DTSTAMP', ics_datetime(row['zoom_meeting__updated_at'])),
+            ('DTSTART', ics_datetime(row['start_time'])),
+            ('DTEND', ics_datetime(row['end_time'])),
+            ('SUMMARY', ics_text(row['zoom_meeting__topic'])),
+            ('DESCRIPTION', ics_text(f"Zoom meeting {row['zoom_meeting__meeting_id']}")),
+        ]
+
+
+class ZoomMeetingExportView(ScheduleExportView):
+    """
+    Exports the meetings the user hosts as `.ics` or `.csv`.
+    """
+    filename = 'meetings'
+    csv_header = ('id', 'zoom_meeting_id', 'topic', 'start_time', 'end_time', 'capacity', 'booked_count', 'created_at')
+
+    @swagger_auto_schema(
+        operation_description="Streams the meetings the user hosts as an iCalendar (`export.ics`) or CSV (`export.csv`) file.",
+        manual_parameters=[user_parameter],
+        responses={200: 'iCalendar or CSV file'},
+        security=[{'Bearer': []}]
+    )
+    def get(self, request, file_format, *args, **kwargs):
+        return self.export(file_format)
+
+    def get_queryset(self, owner):
+        return ZoomMeeting.objects.filter(user=owner).values(
+            'id', 'meeting_id', 'topic', 'start_time', 'end_time', 'capacity', 'booked_count', 'created_at', 'updated_at',
+        )
+
+    def get_csv_row(self, row):
+        return [
+            row['id'], row['meeting_id'], row['topic'],
+            self.iso(row['start_time']), self.iso(row['end_time']),
+            row['capacity'], row['booked_count'], self.iso(row['created_at']),
+        ]
+
+    def get_event(self, row):
+        return [
+            ('UID', f"meeting-{row['id']}@{self.request.get_host()}"),
+            ('DTSTAMP', ics_datetime(row['updated_at'])),
+            ('DTSTART', ics_datetime(row['start_time'])),
+            ('DTEND', ics_datetime(row['end_time'])),
+            ('SUMMARY', ics_text(row['topic'])),
+            ('DESCRIPTION', ics_text(f"Zoom meeting {row['meeting_id']}, {row['booked_count']} of {row['capacity']} seats booked")),
+        ]
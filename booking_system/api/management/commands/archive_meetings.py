@@ -0,0 +1,18 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.archive import archive_finished
+
+
+class Command(BaseCommand):
+    help = "Moves meetings that ended more than ARCHIVE_AFTER_DAYS ago, and their bookings, to the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        meetings, bookings = archive_finished(cutoff, options['batch_size'])
+        self.stdout.write(f"Archived {meetings} meeting(s) and {bookings} booking(s).")
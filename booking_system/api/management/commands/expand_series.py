@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.recurrence import expand_upcoming_series
+
+
+class Command(BaseCommand):
+    help = "Creates the occurrences of meeting series starting within SERIES_EXPANSION_DAYS."
+
+    def handle(self, *args, **options):
+        created = expand_upcoming_series(timezone.now())
+        self.stdout.write(f"Created {created} occurrence(s).")
@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from api.utils import process_outbox_batch
+
+
+class Command(BaseCommand):
+    help = "Delivers queued emails from the outbox in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+        parser.add_argument('--once', action='store_true', help="Drain the due emails and exit instead of polling.")
+        parser.add_argument('--poll-interval', type=float, default=settings.EMAIL_OUTBOX_POLL_INTERVAL)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            sent, failed = process_outbox_batch(batch_size)
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} email(s), {failed} failed.")
+            # Keep draining while full batches come back, otherwise wait for new rows
+            if sent + failed < batch_size:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from api.webhooks import process_webhook_batch, retry_dead_events
+
+
+class Command(BaseCommand):
+    help = "Applies queued Zoom webhook events to meetings and bookings in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.ZOOM_WEBHOOK_BATCH_SIZE)
+        parser.add_argument('--once', action='store_true', help="Drain the queued events and exit instead of polling.")
+        parser.add_argument('--poll-interval', type=float, default=settings.ZOOM_WEBHOOK_POLL_INTERVAL)
+        parser.add_argument('--retry-dead', action='store_true', help="Requeue dead events before processing.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if options['retry_dead']:
+            self.stdout.write(f"Requeued {retry_dead_events()} dead event(s).")
+        while True:
+            processed, failed = process_webhook_batch(batch_size)
+            if processed or failed:
+                self.stdout.write(f"Processed {processed} event(s), {failed} failed.")
+            # Keep draining while full batches come back, otherwise wait for new rows
+            if processed + failed < batch_size:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
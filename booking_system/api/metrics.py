@@ -0,0 +1,321 @@
+import random
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+# Request performance instrumentation: per-request timings for the database,
+# SMTP and Zoom, exposed as Server-Timing headers and Prometheus metrics.
+# Metrics are kept per process, so every worker is scraped on its own.
+
+# Latency buckets in seconds, the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return f'{{{pairs}}}'
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, value=1, **labels):
+        key = tuple(labels[label] for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def collect(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        yield f'# HELP {self.name} {self.help_text}'
+        yield f'# TYPE {self.name} counter'
+        for key, value in values:
+            yield f'{self.name}{format_labels(list(zip(self.labels, key)))} {value}'
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels[label] for label in self.labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then the total count and sum
+                series = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += 1
+            series[2] += value
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def collect(self):
+        with self._lock:
+            values = sorted((key, list(buckets), count, total) for key, (buckets, count, total) in self._values.items())
+        yield f'# HELP {self.name} {self.help_text}'
+        yield f'# TYPE {self.name} histogram'
+        for key, buckets, count, total in values:
+            labels = list(zip(self.labels, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, buckets):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{format_labels(labels + [("le", bound)])} {cumulative}'
+            yield f'{self.name}_bucket{format_labels(labels + [("le", "+Inf")])} {count}'
+            yield f'{self.name}_sum{format_labels(labels)} {total}'
+            yield f'{self.name}_count{format_labels(labels)} {count}'
+
+
+class Registry:
+    """
+    Holds the metrics of this process and renders them in the Prometheus text format.
+    Collectors are callables yielding extra lines at scrape time, for numbers
+    other modules already keep (e.g. the slots cache stats).
+    """
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, *args, **kwargs):
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs):
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        self.collectors.append(collector)
+        return collector
+
+    def reset(self):
+        for metric in self.metrics:
+            metric.reset()
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.collect())
+        for collector in self.collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    'booking_http_requests_total', 'HTTP requests by route and status.', ('method', 'route', 'status')
+)
+http_request_duration = registry.histogram(
+    'booking_http_request_duration_seconds', 'Wall time of HTTP requests.', ('method', 'route')
+)
+sampled_requests = registry.counter(
+    'booking_http_sampled_requests_total', 'Requests sampled for the component breakdown.', ('route',)
+)
+db_queries = registry.counter(
+    'booking_db_queries_total', 'Database queries of sampled requests.', ('route',)
+)
+component_seconds = registry.counter(
+    'booking_component_seconds_total',
+    'Time spent in the database, SMTP or Zoom by sampled requests.', ('route', 'component')
+)
+throttled_requests = registry.counter(
+    'booking_throttled_requests_total', 'Requests rejected by rate limiting, by exhausted bucket.', ('scope',)
+)
+throttle_store_errors = registry.counter(
+    'booking_throttle_store_errors_total', 'Rate limit checks that fell back to local buckets.'
+)
+zoom_webhook_deliveries = registry.counter(
+    'booking_zoom_webhook_deliveries_total', 'Zoom webhook deliveries, by event and outcome.', ('event', 'outcome')
+)
+external_call_duration = registry.histogram(
+    'booking_external_call_duration_seconds', 'Duration of SMTP and Zoom calls, sampled or not.', ('component',)
+)
+
+
+class RequestTimings:
+    """
+    Time and call counts per component for the request being handled.
+    """
+    COMPONENTS = ('db', 'smtp', 'zoom')
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(self.COMPONENTS, 0.0)
+        self.calls = dict.fromkeys(self.COMPONENTS, 0)
+
+    def add(self, component, seconds):
+        self.seconds[component] += seconds
+        self.calls[component] += 1
+
+    def server_timing(self, total):
+        entries = [f'total;dur={total * 1000:.1f}']
+        for component in self.COMPONENTS:
+            entries.append(
+                f'{component};dur={self.seconds[component] * 1000:.1f};desc="{self.calls[component]} calls"'
+            )
+        return ', '.join(entries)
+
+
+# Set only while a sampled request is being handled; sync_to_async and
+# asyncio tasks copy it, so hops between threads and the event loop keep it
+current_timings = ContextVar('current_timings', default=None)
+
+
+@contextmanager
+def timed(component):
+    """
+    Times an SMTP or Zoom call for the current request, if it is sampled, and
+    for the process-wide external call histogram.
+    """
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = perf_counter() - started
+        external_call_duration.observe(elapsed, component=component)
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add(component, elapsed)
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper timing the queries of sampled requests.
+    """
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add('db', perf_counter() - started)
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match is not None else 'unmatched'
+
+
+class PerformanceMiddleware:
+    """
+    Records wall time and status of every request, and for a sampled fraction
+    (`METRICS_SAMPLE_RATE`) the time and number of database queries, SMTP
+    calls and Zoom calls. Sampled responses carry a `Server-Timing` header.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                current_timings.reset(token)
+        return self.finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        timings, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                current_timings.reset(token)
+        return self.finish(request, response, timings, started)
+
+    def start(self):
+        timings = token = None
+        if random.random() < settings.METRICS_SAMPLE_RATE:
+            timings = RequestTimings()
+            token = current_timings.set(timings)
+        return timings, token, perf_counter()
+
+    def finish(self, request, response, timings, started):
+        total = perf_counter() - started
+        route = _route(request)
+        http_requests.inc(method=request.method, route=route, status=response.status_code)
+        http_request_duration.observe(total, method=request.method, route=route)
+        if timings is not None:
+            sampled_requests.inc(route=route)
+            db_queries.inc(timings.calls['db'], route=route)
+            for component in RequestTimings.COMPONENTS:
+                component_seconds.inc(timings.seconds[component], route=route, component=component)
+            response['Server-Timing'] = timings.server_timing(total)
+        return response
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """
+    `connection_created` receiver adding `time_query` to every new connection,
+    so queries are timed whichever thread runs them, e.g. under sync_to_async.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+@registry.register_collector
+def collect_app_metrics():
+    """
+    Exposes the slots cache and Zoom token counters the app already keeps.
+    """
+    from .cache import stats as slots_cache_stats
+    from .zoom_utils import token_metrics
+
+    counters = slots_cache_stats.snapshot()
+    for name in ('future_hits', 'future_misses', 'booked_hits', 'booked_misses', 'recompute_count'):
+        yield f'# TYPE booking_slots_cache_{name}_total counter'
+        yield f'booking_slots_cache_{name}_total {counters[name]}'
+    yield '# TYPE booking_slots_cache_recompute_seconds_total counter'
+    yield f'booking_slots_cache_recompute_seconds_total {counters["recompute_seconds_total"]}'
+    for name, value in sorted(token_metrics.snapshot().items()):
+        yield f'# TYPE booking_zoom_token_{name}_total counter'
+        yield f'booking_zoom_token_{name}_total {value}'
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. When `METRICS_AUTH_TOKEN` is set, scrapers must
+    send it as a bearer token.
+    """
+    token = settings.METRICS_AUTH_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:53
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_booked_count(apps, schema_editor):
+    ZoomMeeting = apps.get_model("api", "ZoomMeeting")
+    meetings = ZoomMeeting.objects.annotate(bookings_total=Count("bookings")).filter(
+        bookings_total__gt=0
+    )
+    for meeting in meetings.iterator():
+        meeting.booked_count = meeting.bookings_total
+        meeting.capacity = max(meeting.capacity, meeting.bookings_total)
+        meeting.save(update_fields=["booked_count", "capacity"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_emailoutbox"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="zoommeeting",
+            name="booked_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="zoommeeting",
+            name="capacity",
+            field=models.PositiveIntegerField(default=100),
+        ),
+        migrations.RunPython(backfill_booked_count, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="zoommeeting",
+            constraint=models.CheckConstraint(
+                check=models.Q(("booked_count__lte", models.F("capacity"))),
+                name="zoommeeting_booked_within_capacity",
+            ),
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 5.0.6 on 2026-10-18 18:02
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# Each user's meetings and bookings must not overlap. On Postgres this is
+# enforced with exclusion constraints over tstzrange backed by GiST indexes;
+# other databases rely on the serializers' indexed overlap check.
+EXCLUSION_CONSTRAINTS = [
+    ("api_zoommeeting", "zoommeeting_no_overlap"),
+    ("api_booking", "booking_no_overlap"),
+]
+
+
+def backfill_booking_times(apps, schema_editor):
+    Booking = apps.get_model("api", "Booking")
+    ZoomMeeting = apps.get_model("api", "ZoomMeeting")
+    meeting = ZoomMeeting.objects.filter(pk=OuterRef("zoom_meeting_id"))
+    Booking.objects.update(
+        start_time=Subquery(meeting.values("start_time")[:1]),
+        end_time=Subquery(meeting.values("end_time")[:1]),
+    )
+
+
+def find_existing_overlaps(schema_editor, table, limit=10):
+    """
+    Returns up to `limit` pairs of ids of `table` rows of the same user whose
+    times overlap. They were allowed before this migration, and would make
+    adding the exclusion constraint fail with a bare error.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT a.id, b.id FROM {table} a JOIN {table} b "
+            f"ON a.user_id = b.user_id AND a.id < b.id "
+            f"AND tstzrange(a.start_time, a.end_time, '[)') && tstzrange(b.start_time, b.end_time, '[)') "
+            f"ORDER BY a.id, b.id LIMIT %s",
+            [limit],
+        )
+        return cursor.fetchall()
+
+
+def add_exclusion_constraints(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    # Existing double bookings need a decision per user (which one to cancel),
+    # so they are reported for an operator to resolve rather than dropped here
+    conflicts = {table: find_existing_overlaps(schema_editor, table) for table, _ in EXCLUSION_CONSTRAINTS}
+    conflicts = {table: pairs for table, pairs in conflicts.items() if pairs}
+    if conflicts:
+        details = "; ".join(
+            f"{table}: " + ", ".join(f"{a} and {b}" for a, b in pairs) for table, pairs in conflicts.items()
+        )
+        raise RuntimeError(
+            "Cannot add the no-overlap constraints while rows of the same user overlap. Delete or move one "
+            f"row of each pair, then migrate again. Overlapping ids (first 10 per table): {details}"
+        )
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    for table, name in EXCLUSION_CONSTRAINTS:
+        schema_editor.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} EXCLUDE USING gist "
+            f"(user_id WITH =, tstzrange(start_time, end_time, '[)') WITH &&)"
+        )
+
+
+def remove_exclusion_constraints(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table, name in EXCLUSION_CONSTRAINTS:
+        schema_editor.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_zoommeeting_capacity"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="start_time",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name="booking",
+            name="end_time",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(backfill_booking_times, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="booking",
+            name="start_time",
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name="booking",
+            name="end_time",
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["user", "start_time"], name="api_booking_user_id_81d8ff_idx"
+            ),
+        ),
+        migrations.RunPython(add_exclusion_constraints, remove_exclusion_constraints),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.6 on 2026-10-18 21:40
+
+from django.db import migrations
+from django.db.models.functions import Upper
+
+# Indexes for searching meeting topics, see api.search. On Postgres, GIN
+# indexes over the topic's tsvector and its trigrams; on SQLite, an FTS5 table
+# filled here and kept up to date by the ZoomMeeting signals.
+SQLITE_TABLE = "api_zoommeeting_topic_fts"
+
+
+def create_search_index(apps, schema_editor):
+    ZoomMeeting = apps.get_model("api", "ZoomMeeting")
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        from django.contrib.postgres.indexes import GinIndex, OpClass
+        from django.contrib.postgres.search import SearchVector
+
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.add_index(
+            ZoomMeeting, GinIndex(SearchVector("topic", config="simple"), name="api_zoommeeting_topic_fts")
+        )
+        # Matches the UPPER(topic) LIKE UPPER(...) of icontains lookups
+        schema_editor.add_index(
+            ZoomMeeting, GinIndex(OpClass(Upper("topic"), name="gin_trgm_ops"), name="api_zoommeeting_topic_trgm")
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SQLITE_TABLE} USING fts5(topic, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(f"INSERT INTO {SQLITE_TABLE} (rowid, topic) SELECT id, topic FROM api_zoommeeting")
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS api_zoommeeting_topic_fts")
+        schema_editor.execute("DROP INDEX IF EXISTS api_zoommeeting_topic_trgm")
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_sync_tracking"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
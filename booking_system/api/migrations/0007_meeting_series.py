@@ -0,0 +1,74 @@
+# Generated by Django 5.0.6 on 2026-10-18 17:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_topic_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="zoommeeting",
+            name="occurrence_id",
+            field=models.CharField(blank=True, default="", max_length=32),
+        ),
+        migrations.AlterField(
+            model_name="zoommeeting",
+            name="meeting_id",
+            field=models.CharField(max_length=255),
+        ),
+        migrations.CreateModel(
+            name="MeetingSeries",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("meeting_id", models.CharField(max_length=255, unique=True)),
+                ("topic", models.CharField(max_length=255)),
+                ("start_time", models.DateTimeField()),
+                ("end_time", models.DateTimeField()),
+                ("rrule", models.CharField(max_length=255)),
+                ("capacity", models.PositiveIntegerField(default=100)),
+                ("expanded_until", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="meeting_series",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="zoommeeting",
+            name="series",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="occurrences",
+                to="api.meetingseries",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="zoommeeting",
+            constraint=models.UniqueConstraint(
+                fields=("meeting_id", "occurrence_id"),
+                name="zoommeeting_unique_occurrence",
+            ),
+        ),
+    ]
@@ -0,0 +1,192 @@
+# Generated by Django 5.0.6 on 2026-10-18 17:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+# History views: the live and archived rows of meetings and bookings, for lists
+# that ask for history. Archived rows keep their ids, so the union has no duplicates.
+MEETING_COLUMNS = (
+    "id, user_id, meeting_id, series_id, occurrence_id, topic, start_time, end_time, "
+    "capacity, booked_count, created_at, updated_at"
+)
+BOOKING_COLUMNS = "id, user_id, zoom_meeting_id, start_time, end_time, created_at, updated_at"
+CREATE_VIEWS = [
+    f"CREATE VIEW api_zoommeeting_history AS SELECT {MEETING_COLUMNS} FROM api_zoommeeting "
+    f"UNION ALL SELECT {MEETING_COLUMNS} FROM api_archivedzoommeeting",
+    f"CREATE VIEW api_booking_history AS SELECT {BOOKING_COLUMNS} FROM api_booking "
+    f"UNION ALL SELECT {BOOKING_COLUMNS} FROM api_archivedbooking",
+]
+DROP_VIEWS = [
+    "DROP VIEW IF EXISTS api_booking_history",
+    "DROP VIEW IF EXISTS api_zoommeeting_history",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # The topic indexes of migration 0006, for searches of archived meetings.
+    # On SQLite, archived meetings stay in the FTS5 table under their id.
+    if schema_editor.connection.vendor == "postgresql":
+        from django.contrib.postgres.indexes import GinIndex, OpClass
+        from django.contrib.postgres.search import SearchVector
+
+        ArchivedZoomMeeting = apps.get_model("api", "ArchivedZoomMeeting")
+        schema_editor.add_index(
+            ArchivedZoomMeeting, GinIndex(SearchVector("topic", config="simple"), name="api_archivedmeeting_topic_fts")
+        )
+        schema_editor.add_index(
+            ArchivedZoomMeeting,
+            GinIndex(OpClass(Upper("topic"), name="gin_trgm_ops"), name="api_archivedmeeting_topic_trgm"),
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS api_archivedmeeting_topic_fts")
+        schema_editor.execute("DROP INDEX IF EXISTS api_archivedmeeting_topic_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_meeting_series"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookingHistory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start_time", models.DateTimeField()),
+                ("end_time", models.DateTimeField()),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "api_booking_history",
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="ZoomMeetingHistory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("meeting_id", models.CharField(max_length=255)),
+                ("occurrence_id", models.CharField(max_length=32)),
+                ("topic", models.CharField(max_length=255)),
+                ("start_time", models.DateTimeField()),
+                ("end_time", models.DateTimeField()),
+                ("capacity", models.PositiveIntegerField()),
+                ("booked_count", models.PositiveIntegerField()),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "api_zoommeeting_history",
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedZoomMeeting",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("meeting_id", models.CharField(max_length=255)),
+                (
+                    "occurrence_id",
+                    models.CharField(blank=True, default="", max_length=32),
+                ),
+                ("topic", models.CharField(max_length=255)),
+                ("start_time", models.DateTimeField()),
+                ("end_time", models.DateTimeField()),
+                ("capacity", models.PositiveIntegerField()),
+                ("booked_count", models.PositiveIntegerField()),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                (
+                    "archived_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "series",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="api.meetingseries",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArchivedBooking",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("start_time", models.DateTimeField()),
+                ("end_time", models.DateTimeField()),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                (
+                    "archived_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "zoom_meeting",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bookings",
+                        to="api.archivedzoommeeting",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="archivedzoommeeting",
+            index=models.Index(
+                fields=["user", "start_time"], name="api_archive_user_id_945702_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivedbooking",
+            index=models.Index(
+                fields=["user", "start_time"], name="api_archive_user_id_99a720_idx"
+            ),
+        ),
+        migrations.RunSQL(CREATE_VIEWS, DROP_VIEWS),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.6 on 2026-10-18 17:56
+
+from django.db import migrations, models
+
+
+def backfill_meeting_id(apps, schema_editor):
+    ZoomWebhookEvent = apps.get_model("api", "ZoomWebhookEvent")
+    for event in ZoomWebhookEvent.objects.iterator():
+        meeting = event.payload.get("object") or {}
+        event.meeting_id = str(meeting.get("id", ""))
+        event.save(update_fields=["meeting_id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_zoom_webhook_events"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="zoomwebhookevent",
+            name="meeting_id",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.RunPython(backfill_meeting_id, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="zoomwebhookevent",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("processed", "Processed"),
+                    ("dead", "Dead"),
+                    ("skipped", "Skipped"),
+                ],
+                default="pending",
+                max_length=16,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="zoomwebhookevent",
+            index=models.Index(
+                fields=["meeting_id", "event_ts"], name="api_zoomweb_meeting_38862c_idx"
+            ),
+        ),
+    ]
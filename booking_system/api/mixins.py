@@ -0,0 +1,39 @@
+from drf_yasg import openapi
+from rest_framework.response import Response
+
+history_parameter = openapi.Parameter(
+    'history', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+    description='Also include archived meetings and bookings.'
+)
+
+
+class RowListMixin:
+    """
+    List action that pages through `values()` rows and renders them with the
+    view's `row_serializer`, instead of building a model instance and running
+    the ModelSerializer for every row. The output is the same.
+    """
+    row_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        rows = self.row_serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.row_serializer.serialize(page))
+        return Response(self.row_serializer.serialize(rows))
+
+
+class HistoryMixin:
+    """
+    Lets a list include archived rows when the request passes `?history=true`.
+    `get_queryset` then reads from `history_model`, the view over the live and
+    archived tables, instead of the live table alone.
+    """
+    live_model = None
+    history_model = None
+
+    def wants_history(self):
+        return self.request.query_params.get('history', '').lower() in ('1', 'true', 'yes')
+
+    def get_model(self):
+        return self.history_model if self.wants_history() else self.live_model
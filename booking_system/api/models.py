@@ -1,30 +1,342 @@
+from bisect import bisect_left
 from django.db import models
+from django.db.models import Case, F, Q, Value, When
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+# Names of the Postgres exclusion constraints keeping each user's calendar free
+# of overlaps; see migration 0004
+ZOOMMEETING_NO_OVERLAP = 'zoommeeting_no_overlap'
+BOOKING_NO_OVERLAP = 'booking_no_overlap'
+
+def find_overlap(calendar, start_time, end_time):
+    """
+    Returns the entry of `calendar`, a queryset of one user's meetings or
+    bookings, that overlaps [start_time, end_time), or None.
+    Calendars are kept free of overlaps, so only the entry starting last before
+    `end_time` can overlap, and finding it is a single seek on the
+    (user, start_time) index instead of a scan of the calendar.
+    """
+    latest = calendar.filter(start_time__lt=end_time).order_by('-start_time').first()
+    if latest is not None and latest.end_time > start_time:
+        return latest
+    return None
+
+def calendar_overlaps(calendar, start_time, end_time):
+    """
+    In-memory counterpart of `find_overlap` for a sorted list of (start, end) pairs.
+    """
+    i = bisect_left(calendar, (end_time,))
+    return i > 0 and calendar[i - 1][1] > start_time
+
+class MeetingSeries(models.Model):
+    """
+    A meeting repeating by `rrule` (see api.recurrence), backed by a single
+    recurring Zoom meeting. Its occurrences are `ZoomMeeting` rows, created
+    in bulk as far ahead as they are needed, up to `expanded_until`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='meeting_series')
+    meeting_id = models.CharField(max_length=255, unique=True)
+    topic = models.CharField(max_length=255)
+    # Times of the first occurrence
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    rrule = models.CharField(max_length=255)
+    capacity = models.PositiveIntegerField(default=100)
+    # Every occurrence starting before this has been created
+    expanded_until = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.topic} - {self.rrule}"
 
 class ZoomMeeting(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='zoom_meetings')
-    meeting_id = models.CharField(max_length=255, unique=True)
+    meeting_id = models.CharField(max_length=255)
+    # Occurrences of a series share the series' Zoom meeting, and are told apart
+    # by Zoom's occurrence id; blank for single meetings
+    series = models.ForeignKey(MeetingSeries, on_delete=models.CASCADE, null=True, blank=True, related_name='occurrences')
+    occurrence_id = models.CharField(max_length=32, blank=True, default='')
     topic = models.CharField(max_length=255)
     start_time = models.DateTimeField(db_index=True)
     end_time = models.DateTimeField(db_index=True)
+    capacity = models.PositiveIntegerField(default=100)
+    # Denormalized count of bookings, maintained by reserve_seat and by the
+    # Booking delete signal, which calls release_seat, or release_seats for
+    # grouped deletes
+    booked_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also set by the seat updates, which bypass save(); read by the sync feed
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['user', 'start_time']),
             models.Index(fields=['user', 'end_time']),
         ]
+        constraints = [
+            models.CheckConstraint(check=Q(booked_count__lte=F('capacity')), name='zoommeeting_booked_within_capacity'),
+            models.UniqueConstraint(fields=['meeting_id', 'occurrence_id'], name='zoommeeting_unique_occurrence'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.topic} - {self.start_time}"
 
+    @classmethod
+    def reserve_seat(cls, meeting_id, seats=1):
+        """
+        Takes `seats` seats with a single conditional UPDATE.
+        Only the meeting's row is locked, and the call returns False instead of
+        overselling when the meeting does not have enough free seats.
+        """
+        return cls.objects.filter(
+            pk=meeting_id, booked_count__lte=F('capacity') - seats
+        ).update(booked_count=F('booked_count') + seats, updated_at=timezone.now()) == 1
+
+    @classmethod
+    def release_seat(cls, meeting_id, seats=1):
+        """
+        Gives back seats taken by `reserve_seat`.
+        """
+        cls.objects.filter(pk=meeting_id, booked_count__gte=seats).update(
+            booked_count=F('booked_count') - seats, updated_at=timezone.now()
+        )
+
+    @classmethod
+    def reserve_seats(cls, seats_by_meeting):
+        """
+        Bulk version of `reserve_seat` for meetings the caller has already locked
+        and checked for free seats. `seats_by_meeting` maps meeting ids to seats
+        and is applied with a single UPDATE.
+        """
+        cls._add_seats(seats_by_meeting, 1)
+
+    @classmethod
+    def release_seats(cls, seats_by_meeting):
+        """
+        Bulk version of `release_seat`, applied with a single UPDATE.
+        """
+        cls._add_seats(seats_by_meeting, -1)
+
+    @classmethod
+    def _add_seats(cls, seats_by_meeting, sign):
+        if not seats_by_meeting:
+            return
+        delta = Case(*[When(pk=pk, then=Value(sign * seats)) for pk, seats in seats_by_meeting.items()])
+        cls.objects.filter(pk__in=seats_by_meeting).update(booked_count=F('booked_count') + delta, updated_at=timezone.now())
+
+class BookingQuerySet(models.QuerySet):
+    def delete(self):
+        """
+        Deletes the bookings with their seats released, tombstones written and
+        caches invalidated in one batch, see `api.signals.grouped_booking_deletes`.
+        """
+        from .signals import grouped_booking_deletes
+
+        with grouped_booking_deletes():
+            return super().delete()
+
 class Booking(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
     zoom_meeting = models.ForeignKey(ZoomMeeting, on_delete=models.CASCADE, related_name='bookings')
+    # Copied from the meeting so the attendee's calendar can be searched by time
+    # on its own (user, start_time) index
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BookingQuerySet.as_manager()
 
     class Meta:
         unique_together = ('user', 'zoom_meeting')
+        indexes = [
+            models.Index(fields=['user', 'start_time']),
+            models.Index(fields=['user', 'updated_at']),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.start_time = self.zoom_meeting.start_time
+        self.end_time = self.zoom_meeting.end_time
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.zoom_meeting.topic}"
+
+class ArchivedZoomMeeting(models.Model):
+    """
+    A finished meeting moved out of `ZoomMeeting` by `archive_meetings`, with
+    its id and columns unchanged (see api.archive).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    meeting_id = models.CharField(max_length=255)
+    series = models.ForeignKey(MeetingSeries, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    occurrence_id = models.CharField(max_length=32, blank=True, default='')
+    topic = models.CharField(max_length=255)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    capacity = models.PositiveIntegerField()
+    booked_count = models.PositiveIntegerField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'start_time']),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} - {self.start_time} (archived)"
+
+class ArchivedBooking(models.Model):
+    """
+    A booking of an archived meeting, moved out of `Booking` with it.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    zoom_meeting = models.ForeignKey(ArchivedZoomMeeting, on_delete=models.CASCADE, related_name='bookings')
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'start_time']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.zoom_meeting_id} (archived)"
+
+class ZoomMeetingHistory(models.Model):
+    """
+    Read-only union of the live and archived meetings, a database view
+    created by migration 0008. Lists query it when asked for `history`.
+    """
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='+')
+    meeting_id = models.CharField(max_length=255)
+    series = models.ForeignKey(MeetingSeries, on_delete=models.DO_NOTHING, null=True, related_name='+')
+    occurrence_id = models.CharField(max_length=32)
+    topic = models.CharField(max_length=255)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    capacity = models.PositiveIntegerField()
+    booked_count = models.PositiveIntegerField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'api_zoommeeting_history'
+
+class BookingHistory(models.Model):
+    """
+    Read-only union of the live and archived bookings, like `ZoomMeetingHistory`.
+    """
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='+')
+    zoom_meeting = models.ForeignKey(ZoomMeetingHistory, on_delete=models.DO_NOTHING, related_name='bookings')
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'api_booking_history'
+
+class Tombstone(models.Model):
+    """
+    Records a deleted meeting or booking, so the sync feed can tell clients to
+    drop it. Kept for `SYNC_TOMBSTONE_DAYS`, see `prune_tombstones`.
+    """
+    KIND_MEETING = 'meeting'
+    KIND_BOOKING = 'booking'
+    KIND_CHOICES = [
+        (KIND_MEETING, 'Meeting'),
+        (KIND_BOOKING, 'Booking'),
+    ]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    # The booking's user; a plain column, since the user may be the one being deleted
+    owner_id = models.PositiveBigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'deleted_at']),
+            models.Index(fields=['owner_id', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} - {self.deleted_at}"
+
+class EmailOutbox(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_DEAD, 'Dead'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    from_email = models.CharField(max_length=255)
+    recipient = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient} - {self.subject} - {self.status}"
+
+
+class ZoomWebhookEvent(models.Model):
+    """
+    A meeting event delivered by Zoom's webhook, queued by the endpoint and
+    applied to the local meetings by `process_zoom_webhooks` (see api.webhooks).
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSED = 'processed'
+    STATUS_DEAD = 'dead'
+    STATUS_SKIPPED = 'skipped'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSED, 'Processed'),
+        (STATUS_DEAD, 'Dead'),
+        (STATUS_SKIPPED, 'Skipped'),
+    ]
+
+    event = models.CharField(max_length=64)
+    # The Zoom meeting the event is about; each meeting's events apply one at a time
+    meeting_id = models.CharField(max_length=64, blank=True)
+    # Zoom's time of the event, in milliseconds; events are applied in this order
+    event_ts = models.BigIntegerField()
+    payload = models.JSONField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'event_ts']),
+            models.Index(fields=['meeting_id', 'event_ts']),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.zoom_meeting.topic}"
\ No newline at end of file
+        return f"{self.event} - {self.event_ts} - {self.status}"
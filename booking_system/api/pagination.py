@@ -0,0 +1,220 @@
+import json
+from base64 import b64decode, b64encode
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .models import ZoomMeeting
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the full ordering key instead of using offsets.
+    The ordering comes from the view's OrderingFilter (or the view's `ordering`
+    attribute) with `id` appended as a tie-breaker, and the cursor stores the
+    values of every ordering field of the last row on the page, so fetching any
+    page is a single indexed range scan no matter how deep the client has paged.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        fields = self.get_ordering_fields(queryset.model, self.ordering, queryset.query.annotations)
+
+        position, reverse = self.decode_cursor(request, fields)
+        ordering = self.ordering if not reverse else tuple(self._flip(term) for term in self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(ordering, position))
+
+        # Fetch one extra row to know whether another page follows
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        self._set_page_state(
+            [self.get_position(instance) for instance in results[:1] + results[-1:]],
+            position is not None, has_more, reverse
+        )
+        return results
+
+    def paginate_rows(self, iter_rows, request, exclude=()):
+        """
+        Paginates `(start_time, id, data)` rows, such as the cached slots feed,
+        with the same cursors as `paginate_queryset`. `iter_rows(position, reverse)`
+        yields the rows following the cursor's `(start_time, id)` position, or
+        preceding it in reverse order when `reverse`.
+        Rows whose id is in `exclude` are skipped while the page is collected.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        self.ordering = ('start_time', 'id')
+        position, reverse = self.decode_row_cursor(request)
+
+        results = []
+        for row in iter_rows(tuple(position) if position is not None else None, reverse):
+            if row[1] not in exclude:
+                results.append(row)
+                if len(results) > page_size:
+                    break
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        self._set_page_state(
+            [[row[0].isoformat(), row[1]] for row in results[:1] + results[-1:]],
+            position is not None, has_more, reverse
+        )
+        return [row[2] for row in results]
+
+    def _set_page_state(self, edge_positions, has_cursor, has_more, reverse):
+        self.first_position = edge_positions[0] if edge_positions else None
+        self.last_position = edge_positions[-1] if edge_positions else None
+        if reverse:
+            self.has_next, self.has_previous = has_cursor, has_more
+        else:
+            self.has_next, self.has_previous = has_more, has_cursor
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Returns the ordering terms for the request, ending with an `id` tie-breaker.
+        """
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = tuple(ordering)
+        if ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering += ('-id' if ordering[-1].startswith('-') else 'id',)
+        return ordering
+
+    def get_ordering_fields(self, model, ordering, annotations=None):
+        """
+        Resolves each ordering term (which may span relations) to its model
+        field, or to the output field of an annotation such as a search rank.
+        """
+        fields = []
+        for term in ordering:
+            if annotations and term.lstrip('-') in annotations:
+                fields.append(annotations[term.lstrip('-')].output_field)
+                continue
+            current = model
+            for part in term.lstrip('-').split('__'):
+                field = current._meta.pk if part == 'pk' else current._meta.get_field(part)
+                current = field.related_model or current
+            fields.append(field)
+        return fields
+
+    def get_seek_filter(self, ordering, position):
+        """
+        Builds the row-value comparison `(a, b, id) > (x, y, z)` as nested Q objects,
+        honouring the direction of each ordering term.
+        """
+        condition = Q()
+        for index, term in enumerate(ordering):
+            name = term.lstrip('-')
+            lookup = 'lt' if term.startswith('-') else 'gt'
+            step = Q(**{f'{name}__{lookup}': position[index]})
+            for previous_term, value in zip(ordering[:index], position[:index]):
+                step &= Q(**{previous_term.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def get_position(self, instance):
+        values = []
+        for term in self.ordering:
+            if isinstance(instance, dict):
+                # A values() row, keyed by lookup
+                value = instance[term.lstrip('-')]
+            else:
+                value = instance
+                for part in term.lstrip('-').split('__'):
+                    value = getattr(value, part)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return values
+
+    def decode_cursor(self, request, fields):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            data = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = data['p']
+            if len(values) != len(fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(fields, values)]
+            return position, bool(data.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def decode_row_cursor(self, request):
+        return self.decode_cursor(request, self.get_ordering_fields(ZoomMeeting, self.ordering))
+
+    def encode_cursor(self, position, reverse):
+        data = {'p': position}
+        if reverse:
+            data['r'] = 1
+        encoded = b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_position is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.first_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    @staticmethod
+    def _flip(term):
+        return term[1:] if term.startswith('-') else f'-{term}'
@@ -0,0 +1,206 @@
+import calendar
+from bisect import insort
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice, takewhile
+from django.conf import settings
+from django.db import transaction
+from .cache import invalidate_future_meetings
+from .events import publish_slot_changes
+from .models import MeetingSeries, ZoomMeeting, calendar_overlaps
+from .search import index_meetings
+
+# Meeting series repeat by a subset of RFC 5545 RRULEs that Zoom's recurring
+# meetings can represent: FREQ=DAILY, WEEKLY (with BYDAY) or MONTHLY (on the
+# day of the month of the first occurrence), INTERVAL, and COUNT or UNTIL.
+# Times are UTC, like the single meetings.
+
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+# Largest INTERVAL Zoom accepts per frequency
+MAX_INTERVALS = {'DAILY': 99, 'WEEKLY': 50, 'MONTHLY': 10}
+# Zoom's recurrence types
+ZOOM_TYPES = {'DAILY': 1, 'WEEKLY': 2, 'MONTHLY': 3}
+# Expanding up to this means expanding the whole series
+END_OF_TIME = datetime.max.replace(tzinfo=dt_timezone.utc)
+
+
+class RecurrenceRule:
+    """
+    A parsed RRULE. `occurrences(start)` yields the start times of the series
+    beginning at `start`, lazily and in order.
+    """
+    def __init__(self, freq, interval=1, weekdays=(), count=None, until=None):
+        self.freq = freq
+        self.interval = interval
+        self.weekdays = sorted(set(weekdays))
+        self.count = count
+        self.until = until
+
+    @classmethod
+    def parse(cls, value):
+        """
+        Parses an RRULE such as 'FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10', raising
+        ValueError if it is malformed or Zoom cannot repeat a meeting by it.
+        """
+        parts = {}
+        for part in value.upper().removeprefix('RRULE:').split(';'):
+            name, sep, part_value = part.partition('=')
+            if not sep or name in parts:
+                raise ValueError(f"Malformed RRULE part '{part}'.")
+            parts[name] = part_value
+        unsupported = set(parts) - {'FREQ', 'INTERVAL', 'BYDAY', 'COUNT', 'UNTIL'}
+        if unsupported:
+            raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(unsupported))}.")
+
+        freq = parts.get('FREQ')
+        if freq not in MAX_INTERVALS:
+            raise ValueError('FREQ must be DAILY, WEEKLY or MONTHLY.')
+        try:
+            interval = int(parts.get('INTERVAL', 1))
+            count = int(parts['COUNT']) if 'COUNT' in parts else None
+        except ValueError:
+            raise ValueError('INTERVAL and COUNT must be integers.')
+        if not 1 <= interval <= MAX_INTERVALS[freq]:
+            raise ValueError(f'INTERVAL must be between 1 and {MAX_INTERVALS[freq]} for {freq} series.')
+        weekdays = []
+        if 'BYDAY' in parts:
+            if freq != 'WEEKLY':
+                raise ValueError('BYDAY is only supported for WEEKLY series.')
+            try:
+                weekdays = [WEEKDAYS.index(day) for day in parts['BYDAY'].split(',')]
+            except ValueError:
+                raise ValueError(f"BYDAY must list days among {','.join(WEEKDAYS)}.")
+        if ('COUNT' in parts) == ('UNTIL' in parts):
+            raise ValueError('Exactly one of COUNT and UNTIL is required.')
+        until = parse_until(parts['UNTIL']) if 'UNTIL' in parts else None
+        if count is not None and count < 1:
+            raise ValueError('COUNT must be at least 1.')
+        return cls(freq, interval, weekdays, count, until)
+
+    def __str__(self):
+        parts = [f'FREQ={self.freq}']
+        if self.interval != 1:
+            parts.append(f'INTERVAL={self.interval}')
+        if self.weekdays:
+            parts.append(f"BYDAY={','.join(WEEKDAYS[day] for day in self.weekdays)}")
+        if self.count is not None:
+            parts.append(f'COUNT={self.count}')
+        else:
+            parts.append(f"UNTIL={self.until.strftime('%Y%m%dT%H%M%SZ')}")
+        return ';'.join(parts)
+
+    def occurrences(self, start):
+        starts = takewhile(lambda value: self.until is None or value <= self.until, self._candidates(start))
+        return islice(starts, self.count)
+
+    def _candidates(self, start):
+        if self.freq == 'DAILY':
+            step = timedelta(days=self.interval)
+            while True:
+                yield start
+                start += step
+        elif self.freq == 'WEEKLY':
+            weekdays = self.weekdays or [start.weekday()]
+            week = start - timedelta(days=start.weekday())
+            while True:
+                for day in weekdays:
+                    value = week + timedelta(days=day)
+                    if value >= start:
+                        yield value
+                week += timedelta(weeks=self.interval)
+        else:
+            month = start.year * 12 + start.month - 1
+            while True:
+                year, month_index = divmod(month, 12)
+                # Months too short for the day are skipped, as RFC 5545 does
+                if start.day <= calendar.monthrange(year, month_index + 1)[1]:
+                    yield start.replace(year=year, month=month_index + 1)
+                month += self.interval
+
+    def zoom_recurrence(self, start):
+        """
+        Returns the `recurrence` object of a Zoom meeting repeating by this rule from `start`.
+        """
+        recurrence = {'type': ZOOM_TYPES[self.freq], 'repeat_interval': self.interval}
+        if self.freq == 'WEEKLY':
+            # Zoom numbers the days from Sunday = 1
+            weekdays = self.weekdays or [start.weekday()]
+            recurrence['weekly_days'] = ','.join(str((day + 1) % 7 + 1) for day in weekdays)
+        elif self.freq == 'MONTHLY':
+            recurrence['monthly_day'] = start.day
+        if self.count is not None:
+            recurrence['end_times'] = self.count
+        else:
+            recurrence['end_date_time'] = self.until.strftime('%Y-%m-%dT%H:%M:%SZ')
+        return recurrence
+
+
+def parse_until(value):
+    for date_format in ('%Y%m%dT%H%M%SZ', '%Y%m%d'):
+        try:
+            until = datetime.strptime(value, date_format).replace(tzinfo=dt_timezone.utc)
+        except ValueError:
+            continue
+        # A date includes the whole day
+        return until if 'T' in value else until + timedelta(days=1, microseconds=-1)
+    raise ValueError('UNTIL must be a UTC date (YYYYMMDD) or time (YYYYMMDDTHHMMSSZ).')
+
+
+def occurrence_id(start_time):
+    # Zoom identifies an occurrence by its start time in epoch milliseconds
+    return str(int(start_time.timestamp() * 1000))
+
+
+def expand_series(series, until=END_OF_TIME):
+    """
+    Creates the occurrences of `series` starting before `until` that were not
+    created yet, with a single INSERT, and returns them. Occurrences overlapping
+    another of the host's meetings are skipped.
+    """
+    if series.expanded_until >= until:
+        return []
+    with transaction.atomic():
+        # Locking the series keeps concurrent requests from creating an occurrence twice
+        series = MeetingSeries.objects.select_for_update().get(pk=series.pk)
+        if series.expanded_until >= until:
+            return []
+        duration = series.end_time - series.start_time
+        starts = [
+            start for start in takewhile(lambda start: start < until, RecurrenceRule.parse(series.rrule).occurrences(series.start_time))
+            if start >= series.expanded_until
+        ]
+        occurrences = []
+        if starts:
+            # The host's meetings around the new occurrences, sorted by start time,
+            # so each occurrence is checked for overlaps with a binary search
+            hosted = sorted(ZoomMeeting.objects.filter(
+                user_id=series.user_id, start_time__lt=starts[-1] + duration, end_time__gt=starts[0],
+            ).values_list('start_time', 'end_time'))
+            for start in starts:
+                if calendar_overlaps(hosted, start, start + duration):
+                    continue
+                insort(hosted, (start, start + duration))
+                occurrences.append(ZoomMeeting(
+                    user_id=series.user_id, series=series, meeting_id=series.meeting_id,
+                    occurrence_id=occurrence_id(start), topic=series.topic,
+                    start_time=start, end_time=start + duration, capacity=series.capacity,
+                ))
+            ZoomMeeting.objects.bulk_create(occurrences)
+        MeetingSeries.objects.filter(pk=series.pk).update(expanded_until=until)
+        # bulk_create skips the signals that keep the caches, events and search index current
+        if occurrences:
+            invalidate_future_meetings()
+            publish_slot_changes('meeting.created', [occurrence.pk for occurrence in occurrences])
+            index_meetings(occurrences, series._state.db)
+    return occurrences
+
+
+def expand_upcoming_series(now):
+    """
+    Creates the occurrences of every series starting within `SERIES_EXPANSION_DAYS`
+    of `now`, and returns how many were created.
+    """
+    until = now + timedelta(days=settings.SERIES_EXPANSION_DAYS)
+    created = 0
+    for series in MeetingSeries.objects.filter(expanded_until__lt=until).iterator():
+        created += len(expand_series(series, until))
+    return created
@@ -0,0 +1,140 @@
+import random
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.functional import LazyObject, empty
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY = 'default'
+
+# Sessions and users are read on the primary: they are read while
+# authenticating, before the router can tell whose request it is, and a user
+# who just logged in must find their session
+PRIMARY_APPS = {'auth', 'sessions'}
+
+# The request being handled, set by `ReplicaPinningMiddleware` so the router can
+# tell safe HTTP reads apart from reads in writes, scripts and workers
+current_request = ContextVar('current_request', default=None)
+
+
+def _pin_key(user_id):
+    return f'db:pinned:{user_id}'
+
+
+def pin_user_to_primary(user_id):
+    """
+    Routes the user's reads to the primary for `REPLICA_STICKY_SECONDS`, so they
+    see their own write even while the replicas are still catching up.
+    """
+    cache.set(_pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def resolved_user(request):
+    """
+    Returns the request's user once authentication has resolved it, or None.
+    Django's lazy session user is never loaded here: loading it reads the
+    session and the user, and those reads come back through the router.
+    """
+    user = request.__dict__.get('user')
+    if isinstance(user, LazyObject):
+        user = user._wrapped
+        return None if user is empty else user
+    return user
+
+
+def reads_use_primary():
+    """
+    Reads go to a replica only for safe HTTP requests of users without a recent
+    write, and never inside a transaction on the primary.
+    """
+    if connections[PRIMARY].in_atomic_block:
+        return True
+    request = current_request.get()
+    if request is None or request.method not in SAFE_METHODS:
+        return True
+    pinned = getattr(request, '_db_pinned', None)
+    if pinned is None:
+        user = resolved_user(request)
+        if user is None or not user.is_authenticated:
+            # Authentication has not run yet, decide again once it has
+            return False
+        pinned = request._db_pinned = bool(cache.get(_pin_key(user.pk)))
+    return pinned
+
+
+class ReplicaRouter:
+    """
+    Sends safe reads to a random database in `REPLICA_DATABASES` and everything
+    else to the primary. Replicas are kept up to date by replication, so
+    migrations only run on the primary.
+    """
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if not replicas or model._meta.app_label in PRIMARY_APPS or reads_use_primary():
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {PRIMARY, *settings.REPLICA_DATABASES}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Exposes the request to `ReplicaRouter`, and after a successful write pins
+    the user's reads to the primary for a short window.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = current_request.set(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        user_id = self.writer_id(request, response)
+        if user_id is not None:
+            pin_user_to_primary(user_id)
+        return response
+
+    async def __acall__(self, request):
+        token = current_request.set(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        user_id = self.writer_id(request, response)
+        if user_id is not None:
+            await cache.aset(_pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    def writer_id(self, request, response):
+        """
+        Returns the id of the user who just wrote successfully, if any.
+        """
+        if not settings.REPLICA_DATABASES or request.method in SAFE_METHODS or response.status_code >= 400:
+            return None
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.pk
+        return None
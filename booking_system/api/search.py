@@ -0,0 +1,190 @@
+import operator
+import re
+from functools import reduce
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import F, FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+# Indexed search over meeting topics. Views list the topic in `search_fields`
+# with DRF's '@' (full-text) prefix, e.g. '@zoom_meeting__topic'; the backend
+# for the queried database matches it through an index and ranks the results.
+
+SQLITE_TABLE = 'api_zoommeeting_topic_fts'
+WORD = re.compile(r'\w+')
+
+
+def meeting_path(meeting, name):
+    return f'{meeting}__{name}' if meeting else name
+
+
+class SearchBackend:
+    """
+    Unindexed fallback: case-insensitive substring match, every result ranked 0.
+    `meeting` is the lookup from the searched model to the meeting, '' for meetings.
+    """
+    def match(self, meeting, term):
+        return Q(**{meeting_path(meeting, 'topic__icontains'): term})
+
+    def rank(self, meeting, terms):
+        return Value(0.0)
+
+    def index(self, meetings, using):
+        pass
+
+    def remove(self, meeting_ids, using):
+        pass
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Terms of three characters or more match anywhere in the topic, like the
+    unindexed search, through a trigram GIN index. Shorter ones match word
+    prefixes through a `tsvector` GIN index, which also provides the rank.
+    Both indexes are on expressions, so Postgres keeps them up to date itself.
+    """
+    config = 'simple'
+
+    def vector(self, meeting):
+        from django.contrib.postgres.search import SearchVector
+
+        return SearchVector(meeting_path(meeting, 'topic'), config=self.config)
+
+    def query(self, words, joiner):
+        from django.contrib.postgres.search import SearchQuery
+
+        return SearchQuery(f' {joiner} '.join(f"'{word}':*" for word in words), search_type='raw', config=self.config)
+
+    def match(self, meeting, term):
+        from django.contrib.postgres.search import SearchVectorExact
+
+        words = WORD.findall(term)
+        if len(term) >= 3 or not words:
+            return super().match(meeting, term)
+        return Q(SearchVectorExact(self.vector(meeting), self.query(words, '&')))
+
+    def rank(self, meeting, terms):
+        from django.contrib.postgres.search import SearchRank
+
+        words = WORD.findall(' '.join(terms))
+        if not words:
+            return super().rank(meeting, terms)
+        return SearchRank(self.vector(meeting), self.query(words, '|'))
+
+
+class SQLiteRank(Func):
+    """
+    BM25 relevance of the meeting `meeting` points to for an FTS5 query,
+    higher being better, or 0 if it does not match.
+    """
+    output_field = FloatField()
+
+    def __init__(self, meeting, query):
+        super().__init__(F(meeting), Value(query))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        meeting, query = self.get_source_expressions()
+        meeting_sql, meeting_params = compiler.compile(meeting)
+        query_sql, query_params = compiler.compile(query)
+        sql = (
+            f'COALESCE((SELECT -rank FROM {SQLITE_TABLE} '
+            f'WHERE {SQLITE_TABLE} MATCH {query_sql} AND rowid = {meeting_sql}), 0)'
+        )
+        return sql, (*query_params, *meeting_params)
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    FTS5 index of the topics, for local development. Terms match word
+    prefixes, ignoring case and accents. Kept up to date by `index` and
+    `remove`, which the meeting signals call on every save and delete.
+    """
+    def query(self, words, joiner):
+        return f' {joiner} '.join(f'"{word}"*' for word in words)
+
+    def match(self, meeting, term):
+        words = WORD.findall(term)
+        if not words:
+            return super().match(meeting, term)
+        matches = RawSQL(f'SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s', (self.query(words, 'AND'),))
+        return Q(**{meeting_path(meeting, 'pk__in'): matches})
+
+    def rank(self, meeting, terms):
+        words = WORD.findall(' '.join(terms))
+        if not words:
+            return super().rank(meeting, terms)
+        return SQLiteRank(meeting or 'pk', self.query(words, 'OR'))
+
+    def index(self, meetings, using):
+        rows = [(meeting.pk, meeting.topic) for meeting in meetings]
+        with connections[using].cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [(pk,) for pk, topic in rows])
+            cursor.executemany(f'INSERT INTO {SQLITE_TABLE} (rowid, topic) VALUES (%s, %s)', rows)
+
+    def remove(self, meeting_ids, using):
+        with connections[using].cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [(pk,) for pk in meeting_ids])
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_backend(using=DEFAULT_DB_ALIAS):
+    """
+    Returns the `SEARCH_BACKEND` if set, otherwise the backend for the vendor of database `using`.
+    """
+    if settings.SEARCH_BACKEND:
+        return import_string(settings.SEARCH_BACKEND)()
+    return BACKENDS.get(connections[using].vendor, SearchBackend)()
+
+
+def index_meetings(meetings, using=DEFAULT_DB_ALIAS):
+    """
+    Adds meetings saved without signals, such as by `bulk_create`, to the search index.
+    """
+    get_backend(using).index(meetings, using)
+
+
+class IndexedSearchFilter(filters.SearchFilter):
+    """
+    `SearchFilter` that matches the '@' (meeting topic) search fields through
+    the search backend, and annotates the results with their `search_rank`.
+    As with `SearchFilter`, every term must match one of the search fields.
+    """
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+
+        backend = get_backend(queryset.db)
+        meetings = [field[1:].rpartition('__')[0] for field in search_fields if field.startswith('@')]
+        for term in search_terms:
+            condition = Q()
+            for field in search_fields:
+                if field.startswith('@'):
+                    condition |= backend.match(field[1:].rpartition('__')[0], term)
+                else:
+                    condition |= Q(**{self.construct_search(field, queryset): term})
+            queryset = queryset.filter(condition)
+        if meetings:
+            queryset = queryset.annotate(
+                search_rank=reduce(operator.add, (backend.rank(meeting, search_terms) for meeting in meetings))
+            )
+        return queryset
+
+
+class RankOrderingFilter(filters.OrderingFilter):
+    """
+    `OrderingFilter` that puts the best matches of a search first, unless
+    the request asks for another ordering.
+    """
+    def get_ordering(self, request, queryset, view):
+        if self.ordering_param not in request.query_params and 'search_rank' in queryset.query.annotations:
+            return ['-search_rank']
+        return super().get_ordering(request, queryset, view)
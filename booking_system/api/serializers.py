@@ -1,6 +1,95 @@
+from bisect import insort
+from collections import Counter, defaultdict
+from itertools import islice
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import Booking, ZoomMeeting
+from django.db import IntegrityError, connections, transaction
+from .events import publish_slot_changes
+from .models import BOOKING_NO_OVERLAP, ZOOMMEETING_NO_OVERLAP, Booking, MeetingSeries, ZoomMeeting, calendar_overlaps, find_overlap
+from .recurrence import RecurrenceRule
+
+def recheck_overlap(calendar, instance, message):
+    """
+    Repeats the overlap check of `validate()` once `instance` is written, on
+    databases without the Postgres exclusion constraints. The write holds
+    SQLite's write lock until commit, so no overlapping row can be committed
+    between this check and the commit, as one could between validate() and the write.
+    """
+    if connections[instance._state.db].vendor == 'postgresql':
+        return
+    if find_overlap(calendar.exclude(pk=instance.pk), instance.start_time, instance.end_time) is not None:
+        raise serializers.ValidationError(message)
+
+class RowSerializer:
+    """
+    Read-only fast path for list responses. Produces the same output as
+    `serializer_class(queryset, many=True).data` from `values()` rows: the
+    serializer's fields are inspected once, and each row is turned into a
+    dict with plain lookups, converting only columns whose representation
+    differs from the database value (e.g. datetimes).
+    """
+    # Fields whose representation is the database value itself
+    PLAIN_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField)
+    CONVERTED_FIELDS = (
+        serializers.DateTimeField, serializers.DateField, serializers.TimeField,
+        serializers.DecimalField, serializers.FloatField, serializers.UUIDField,
+    )
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._compiled = None
+
+    def compile(self, serializer, prefix=''):
+        columns = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            column = prefix + field.source.replace('.', '__')
+            if isinstance(field, serializers.BaseSerializer):
+                columns.append((name, None, None, self.compile(field, f'{column}__')))
+            elif isinstance(field, serializers.PrimaryKeyRelatedField) or type(field) in self.PLAIN_FIELDS:
+                # values() returns foreign keys as the related primary key
+                columns.append((name, column, None, None))
+            elif isinstance(field, self.CONVERTED_FIELDS):
+                columns.append((name, column, field.to_representation, None))
+            else:
+                raise TypeError(f"{type(field).__name__} '{name}' is not supported by RowSerializer.")
+        return columns
+
+    @property
+    def columns(self):
+        if self._compiled is None:
+            self._compiled = self.compile(self.serializer_class())
+        return self._compiled
+
+    def value_names(self, columns=None):
+        names = []
+        for name, column, convert, nested in columns or self.columns:
+            names.extend(self.value_names(nested) if nested else [column])
+        return names
+
+    def to_representation(self, row, columns=None):
+        data = {}
+        for name, column, convert, nested in columns or self.columns:
+            if nested:
+                data[name] = self.to_representation(row, nested)
+            else:
+                value = row[column]
+                data[name] = value if convert is None or value is None else convert(value)
+        return data
+
+    def values(self, queryset):
+        # Annotations, such as the search rank, stay available to order and page by
+        return queryset.values(*self.value_names(), *queryset.query.annotation_select)
+
+    def serialize(self, rows):
+        """
+        Serializes rows of `values(queryset)`, or `queryset` itself.
+        """
+        if hasattr(rows, 'values'):
+            rows = self.values(rows)
+        return [self.to_representation(row) for row in rows]
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,12 +102,100 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 class ZoomMeetingSerializer(serializers.ModelSerializer):
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Restricts the query to the serialized columns.
+        """
+        return queryset.only(*ZoomMeetingSerializer.Meta.fields)
+
     class Meta:
         model = ZoomMeeting
-        fields = ['id', 'user', 'meeting_id', 'topic', 'start_time', 'end_time', 'created_at']
-        read_only_fields = ['user', 'created_at']
+        fields = ['id', 'user', 'meeting_id', 'series', 'topic', 'start_time', 'end_time', 'capacity', 'booked_count', 'created_at']
+        read_only_fields = ['user', 'meeting_id', 'series', 'booked_count', 'created_at']
+
+    def validate(self, data):
+        start_time = data.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = data.get('end_time', getattr(self.instance, 'end_time', None))
+        if start_time >= end_time:
+            raise serializers.ValidationError("The meeting must end after it starts.")
+        # Check if the host already has a meeting at that time
+        request = self.context.get('request')
+        if request is not None and request.user.is_authenticated:
+            calendar = ZoomMeeting.objects.filter(user=request.user)
+            if self.instance is not None:
+                calendar = calendar.exclude(pk=self.instance.pk)
+            conflict = find_overlap(calendar, start_time, end_time)
+            if conflict is not None:
+                raise serializers.ValidationError(
+                    f"This meeting overlaps your meeting '{conflict.topic}' starting at {conflict.start_time.isoformat()}."
+                )
+        return data
+
+    def create(self, validated_data):
+        # The exclusion constraint on Postgres, or the recheck elsewhere, catches
+        # a concurrent overlap that slipped past validate()
+        try:
+            with transaction.atomic():
+                meeting = super().create(validated_data)
+                recheck_overlap(
+                    ZoomMeeting.objects.filter(user=meeting.user), meeting, "This meeting overlaps another of your meetings."
+                )
+                return meeting
+        except IntegrityError as exc:
+            if ZOOMMEETING_NO_OVERLAP in str(exc):
+                raise serializers.ValidationError("This meeting overlaps another of your meetings.")
+            raise
+
+class MeetingSeriesSerializer(serializers.ModelSerializer):
+    """
+    A repeating meeting. `start_time` and `end_time` are those of the first
+    occurrence, and `rrule` the RRULE it repeats by (see api.recurrence).
+    """
+    class Meta:
+        model = MeetingSeries
+        fields = ['id', 'user', 'meeting_id', 'topic', 'start_time', 'end_time', 'rrule', 'capacity', 'created_at']
+        read_only_fields = ['user', 'meeting_id', 'created_at']
+
+    def validate_rrule(self, value):
+        try:
+            return str(RecurrenceRule.parse(value))
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+
+    def validate(self, data):
+        start_time, end_time = data['start_time'], data['end_time']
+        if start_time >= end_time:
+            raise serializers.ValidationError("The meeting must end after it starts.")
+        limit = settings.SERIES_MAX_OCCURRENCES
+        starts = list(islice(RecurrenceRule.parse(data['rrule']).occurrences(start_time), limit + 1))
+        if len(starts) > limit:
+            raise serializers.ValidationError(f"A series can have at most {limit} occurrences.")
+        duration = end_time - start_time
+        if any(later - earlier < duration for earlier, later in zip(starts, starts[1:])):
+            raise serializers.ValidationError("Each occurrence must end before the next one starts.")
+        # Check every occurrence against the host's meetings, with one query
+        request = self.context.get('request')
+        if request is not None and request.user.is_authenticated:
+            hosted = sorted(ZoomMeeting.objects.filter(
+                user=request.user, start_time__lt=starts[-1] + duration, end_time__gt=starts[0],
+            ).values_list('start_time', 'end_time'))
+            for start in starts:
+                if calendar_overlaps(hosted, start, start + duration):
+                    raise serializers.ValidationError(
+                        f"The occurrence starting at {start.isoformat()} overlaps one of your meetings."
+                    )
+        return data
 
 class BookingSerializer(serializers.ModelSerializer):
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Joins the nested meeting and restricts both tables to the serialized columns.
+        """
+        meeting_fields = [f'zoom_meeting__{field}' for field in ZoomMeetingSerializer.Meta.fields]
+        return queryset.select_related('zoom_meeting').only('id', 'user', 'zoom_meeting', 'created_at', *meeting_fields)
+
     zoom_meeting = ZoomMeetingSerializer(read_only=True)
     zoom_meeting_id = serializers.PrimaryKeyRelatedField(
         queryset=ZoomMeeting.objects.all(),
@@ -35,6 +212,192 @@ class BookingSerializer(serializers.ModelSerializer):
         # Check if the user has already booked this meeting
         user = self.context['request'].user
         zoom_meeting = data['zoom_meeting']
-        if Booking.objects.filter(user=user, zoom_meeting=zoom_meeting).exists():
+        existing = Booking.objects.filter(user=user, zoom_meeting=zoom_meeting)
+        if self.instance is not None:
+            existing = existing.exclude(pk=self.instance.pk)
+        if existing.exists():
             raise serializers.ValidationError("You have already booked this meeting.")
-        return data
\ No newline at end of file
+        # Check if the user has booked another meeting at that time
+        calendar = Booking.objects.filter(user=user)
+        if self.instance is not None:
+            calendar = calendar.exclude(pk=self.instance.pk)
+        if find_overlap(calendar, zoom_meeting.start_time, zoom_meeting.end_time) is not None:
+            raise serializers.ValidationError("This meeting overlaps another of your bookings.")
+        return data
+
+    def create(self, validated_data):
+        # The seat and the booking row are taken in one transaction; the unique
+        # constraint still catches a concurrent duplicate that slipped past validate()
+        try:
+            with transaction.atomic():
+                if not ZoomMeeting.reserve_seat(validated_data['zoom_meeting'].pk):
+                    raise serializers.ValidationError("This meeting is fully booked.")
+                booking = super().create(validated_data)
+                recheck_overlap(
+                    Booking.objects.filter(user=booking.user), booking, "This meeting overlaps another of your bookings."
+                )
+                return booking
+        except IntegrityError as exc:
+            raise self.integrity_error(exc)
+
+    def update(self, instance, validated_data):
+        old_meeting_id = instance.zoom_meeting_id
+        new_meeting = validated_data.get('zoom_meeting', instance.zoom_meeting)
+        if new_meeting.pk == old_meeting_id:
+            return super().update(instance, validated_data)
+        try:
+            with transaction.atomic():
+                if not ZoomMeeting.reserve_seat(new_meeting.pk):
+                    raise serializers.ValidationError("This meeting is fully booked.")
+                ZoomMeeting.release_seat(old_meeting_id)
+                publish_slot_changes('seats.changed', [old_meeting_id])
+                booking = super().update(instance, validated_data)
+                recheck_overlap(
+                    Booking.objects.filter(user=booking.user), booking, "This meeting overlaps another of your bookings."
+                )
+                return booking
+        except IntegrityError as exc:
+            raise self.integrity_error(exc)
+
+    @staticmethod
+    def integrity_error(exc):
+        if BOOKING_NO_OVERLAP in str(exc):
+            return serializers.ValidationError("This meeting overlaps another of your bookings.")
+        return serializers.ValidationError("You have already booked this meeting.")
+
+# Fast paths for the list responses of the two serializers above
+zoom_meeting_rows = RowSerializer(ZoomMeetingSerializer)
+booking_rows = RowSerializer(BookingSerializer)
+
+class BulkBookingSerializer(serializers.Serializer):
+    """
+    Books every user in `user_ids` onto every meeting in `zoom_meeting_ids`.
+    Only staff may pass `user_ids`; everyone else books for themselves.
+    Saving returns one result per (user, meeting) pair, and the created bookings
+    are kept in `self.bookings`.
+    """
+    BOOKED = 'booked'
+    ALREADY_BOOKED = 'already_booked'
+    FULLY_BOOKED = 'fully_booked'
+    TIME_CONFLICT = 'time_conflict'
+    MEETING_NOT_FOUND = 'meeting_not_found'
+    USER_NOT_FOUND = 'user_not_found'
+
+    zoom_meeting_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+    user_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, required=False)
+
+    def validate_user_ids(self, value):
+        if not self.context['request'].user.is_staff:
+            raise serializers.ValidationError("Only staff can book for other users.")
+        return list(dict.fromkeys(value))
+
+    def validate_zoom_meeting_ids(self, value):
+        return list(dict.fromkeys(value))
+
+    def validate(self, data):
+        items = len(data['zoom_meeting_ids']) * len(data.get('user_ids', [None]))
+        if items > settings.BOOKING_BULK_MAX_ITEMS:
+            raise serializers.ValidationError(f"At most {settings.BOOKING_BULK_MAX_ITEMS} bookings can be made at once.")
+        return data
+
+    def create(self, validated_data):
+        requester = self.context['request'].user
+        meeting_ids = validated_data['zoom_meeting_ids']
+        with transaction.atomic():
+            # Single bookings take their seat on the meeting row before inserting,
+            # so locking the meetings here also keeps them from racing this batch
+            meetings = {meeting.pk: meeting for meeting in ZoomMeeting.objects.select_for_update().filter(pk__in=meeting_ids)}
+            if 'user_ids' in validated_data:
+                user_ids = validated_data['user_ids']
+                users = User.objects.only('id', 'username', 'email').in_bulk(user_ids)
+            else:
+                user_ids = [requester.pk]
+                users = {requester.pk: requester}
+            existing = set(
+                Booking.objects.filter(user__in=users, zoom_meeting__in=meetings).values_list('user_id', 'zoom_meeting_id')
+            )
+            # The users' bookings around the requested meetings, sorted by start time
+            # per user, so each pair is checked for overlaps with a binary search
+            calendars = defaultdict(list)
+            if meetings:
+                window = Booking.objects.filter(
+                    user__in=users,
+                    start_time__lt=max(meeting.end_time for meeting in meetings.values()),
+                    end_time__gt=min(meeting.start_time for meeting in meetings.values()),
+                ).order_by('start_time')
+                for user_id, start_time, end_time in window.values_list('user_id', 'start_time', 'end_time'):
+                    calendars[user_id].append((start_time, end_time))
+
+            results = []
+            self.bookings = []
+            seats = Counter()
+            for meeting_id in meeting_ids:
+                meeting = meetings.get(meeting_id)
+                for user_id in user_ids:
+                    result = {'user_id': user_id, 'zoom_meeting_id': meeting_id}
+                    if meeting is None:
+                        result['status'] = self.MEETING_NOT_FOUND
+                    elif user_id not in users:
+                        result['status'] = self.USER_NOT_FOUND
+                    elif (user_id, meeting_id) in existing:
+                        result['status'] = self.ALREADY_BOOKED
+                    elif calendar_overlaps(calendars[user_id], meeting.start_time, meeting.end_time):
+                        result['status'] = self.TIME_CONFLICT
+                    elif meeting.booked_count + seats[meeting_id] >= meeting.capacity:
+                        result['status'] = self.FULLY_BOOKED
+                    else:
+                        result['status'] = self.BOOKED
+                        seats[meeting_id] += 1
+                        insort(calendars[user_id], (meeting.start_time, meeting.end_time))
+                        # bulk_create skips save(), which copies the meeting's times
+                        self.bookings.append(Booking(
+                            user=users[user_id], zoom_meeting=meeting,
+                            start_time=meeting.start_time, end_time=meeting.end_time,
+                        ))
+                    results.append(result)
+
+            ZoomMeeting.reserve_seats(seats)
+            # Every row was checked under the meeting locks, so a conflict here is a
+            # concurrent single booking on another meeting; fail the whole batch
+            # rather than dropping the row and leaking its seat
+            try:
+                Booking.objects.bulk_create(self.bookings)
+            except IntegrityError:
+                raise serializers.ValidationError("These bookings conflict with a booking made at the same time.")
+            booking_ids = {(booking.user_id, booking.zoom_meeting_id): booking.pk for booking in self.bookings}
+            for result in results:
+                if result['status'] == self.BOOKED:
+                    result['booking_id'] = booking_ids.get((result['user_id'], result['zoom_meeting_id']))
+        return results
+
+class BulkBookingCancelSerializer(serializers.Serializer):
+    """
+    Cancels the bookings in `booking_ids`. Staff may cancel any booking, other
+    users only their own. Saving returns one result per id, and the cancelled
+    bookings are kept in `self.bookings`.
+    """
+    CANCELLED = 'cancelled'
+    NOT_FOUND = 'not_found'
+
+    booking_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+    def validate_booking_ids(self, value):
+        if len(value) > settings.BOOKING_BULK_MAX_ITEMS:
+            raise serializers.ValidationError(f"At most {settings.BOOKING_BULK_MAX_ITEMS} bookings can be cancelled at once.")
+        return list(dict.fromkeys(value))
+
+    def create(self, validated_data):
+        requester = self.context['request'].user
+        booking_ids = validated_data['booking_ids']
+        with transaction.atomic():
+            bookings = Booking.objects.select_related('user', 'zoom_meeting').filter(pk__in=booking_ids)
+            if not requester.is_staff:
+                bookings = bookings.filter(user=requester)
+            self.bookings = list(bookings.select_for_update(of=('self',)))
+            # The queryset delete gives the seats back in one grouped UPDATE
+            Booking.objects.filter(pk__in=[booking.pk for booking in self.bookings]).delete()
+        cancelled = {booking.pk for booking in self.bookings}
+        return [
+            {'booking_id': booking_id, 'status': self.CANCELLED if booking_id in cancelled else self.NOT_FOUND}
+            for booking_id in booking_ids
+        ]
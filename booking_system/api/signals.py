@@ -0,0 +1,109 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import token_user_cache
+from .cache import invalidate_booked_meeting_ids, invalidate_future_meetings
+from .events import publish_meeting_deleted, publish_slot_changes
+from .models import Booking, Tombstone, ZoomMeeting
+from .search import get_backend
+
+
+@receiver([post_save, post_delete], sender=ZoomMeeting)
+def zoom_meeting_changed(sender, instance, **kwargs):
+    invalidate_future_meetings()
+
+
+@receiver(post_save, sender=Booking)
+def booking_changed(sender, instance, **kwargs):
+    # Bookings change the meeting's free seats as well as the user's own booked set
+    invalidate_future_meetings()
+    invalidate_booked_meeting_ids(instance.user_id)
+
+
+@receiver(post_save, sender=ZoomMeeting)
+def zoom_meeting_saved(sender, instance, created, using, update_fields, **kwargs):
+    if created:
+        publish_slot_changes('meeting.created', [instance.pk])
+    if update_fields is None or 'topic' in update_fields:
+        get_backend(using).index([instance], using)
+
+
+@receiver(post_delete, sender=ZoomMeeting)
+def zoom_meeting_deleted(sender, instance, using, **kwargs):
+    Tombstone.objects.create(kind=Tombstone.KIND_MEETING, object_id=instance.pk)
+    publish_meeting_deleted(instance.pk)
+    get_backend(using).remove([instance.pk], using)
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, **kwargs):
+    publish_slot_changes('seats.changed', [instance.zoom_meeting_id])
+
+
+# Bookings deleted inside grouped_booking_deletes(), handled together on exit
+_grouped = threading.local()
+
+
+@contextmanager
+def grouped_booking_deletes():
+    """
+    Collects the bookings deleted inside the block, by queryset deletes or
+    cascades, and releases their seats with one release_seats UPDATE, writes
+    their tombstones with one INSERT and invalidates each user's cache once
+    on exit, instead of doing it for each booking.
+    """
+    if getattr(_grouped, 'bookings', None) is not None:
+        # The outermost block handles the bookings
+        yield
+        return
+    _grouped.bookings = bookings = []
+    try:
+        yield
+    finally:
+        _grouped.bookings = None
+    if not bookings:
+        return
+    ZoomMeeting.release_seats(Counter(meeting_id for _, _, meeting_id in bookings))
+    Tombstone.objects.bulk_create([
+        Tombstone(kind=Tombstone.KIND_BOOKING, object_id=pk, owner_id=user_id) for pk, user_id, _ in bookings
+    ])
+    invalidate_future_meetings()
+    for user_id in {user_id for _, user_id, _ in bookings}:
+        invalidate_booked_meeting_ids(user_id)
+    publish_slot_changes('seats.changed', {meeting_id for _, _, meeting_id in bookings})
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    grouped = getattr(_grouped, 'bookings', None)
+    if grouped is not None:
+        # Kept as ids: the deleted instances lose their pk once the delete is done
+        grouped.append((instance.pk, instance.user_id, instance.zoom_meeting_id))
+        return
+    # Every deletion gives its seat back, including user and meeting cascades
+    ZoomMeeting.release_seat(instance.zoom_meeting_id)
+    Tombstone.objects.create(kind=Tombstone.KIND_BOOKING, object_id=instance.pk, owner_id=instance.user_id)
+    invalidate_future_meetings()
+    invalidate_booked_meeting_ids(instance.user_id)
+    publish_slot_changes('seats.changed', [instance.zoom_meeting_id])
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Deactivation and password changes must also reach tokens cached by every
+    # worker; again on commit, in case a worker cached the old row in between
+    token_user_cache.invalidate_user(instance.pk)
+    transaction.on_commit(lambda: token_user_cache.invalidate_user(instance.pk))
+
+
+if apps.is_installed('rest_framework_simplejwt.token_blacklist'):
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+    @receiver(post_save, sender=BlacklistedToken)
+    def token_blacklisted(sender, instance, **kwargs):
+        token_user_cache.invalidate_token(instance.token.jti)
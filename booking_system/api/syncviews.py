@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from django.utils.http import parse_etags
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .cache import get_bookings_version, get_future_meetings_version
+from .models import Booking, Tombstone, ZoomMeeting
+from .routers import PRIMARY
+from .serializers import booking_rows, zoom_meeting_rows
+
+
+class SyncTokenExpired(APIException):
+    status_code = 410
+    default_detail = 'The sync token is too old, fetch a full snapshot without a token.'
+    default_code = 'sync_token_expired'
+
+
+def encode_sync_token(moment):
+    """
+    Sync tokens are opaque to clients; they hold a timestamp in microseconds.
+    """
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_sync_token(token):
+    microseconds = int(token)
+    if microseconds < 0:
+        raise ValueError(token)
+    return datetime(1970, 1, 1, tzinfo=dt_timezone.utc) + timedelta(microseconds=microseconds)
+
+
+class SyncView(APIView):
+    """
+    View that lets polling clients keep the slots and their bookings up to date.
+    GET without `token` returns every upcoming meeting and all of the user's bookings.
+    GET with the `sync_token` of an earlier response returns only the meetings and
+    bookings created, changed or deleted since then.
+    Responses carry an ETag built from the cached change counters, so a poll
+    sending it back in If-None-Match gets a 304 without any database query.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Changes to the upcoming meetings and the user's bookings since a sync token.",
+        manual_parameters=[
+            openapi.Parameter(
+                'token', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description="`sync_token` of the previous response; omit for a full snapshot."
+            ),
+        ],
+        security=[{'Bearer': []}]
+    )
+    def get(self, request, *args, **kwargs):
+        user = request.user
+        # Read before the rows, so a change racing this request moves the
+        # counters past the ETag and the next poll picks it up
+        etag = f'"{user.pk}-{get_future_meetings_version()}-{get_bookings_version(user.pk)}"'
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=304, headers={'ETag': etag})
+
+        now = timezone.now()
+        since = self.get_since(now)
+        # Read from the primary: a lagging replica could miss a change the
+        # counters already count, and the ETag would then hide it
+        meetings = ZoomMeeting.objects.using(PRIMARY).filter(start_time__gte=now)
+        bookings = Booking.objects.using(PRIMARY).filter(user=user)
+        deleted = {'meetings': [], 'bookings': []}
+        if since is not None:
+            meetings = meetings.filter(updated_at__gt=since)
+            bookings = bookings.filter(updated_at__gt=since)
+            tombstones = Tombstone.objects.using(PRIMARY).filter(deleted_at__gt=since)
+            deleted['meetings'] = list(
+                tombstones.filter(kind=Tombstone.KIND_MEETING).values_list('object_id', flat=True)
+            )
+            deleted['bookings'] = list(
+                tombstones.filter(kind=Tombstone.KIND_BOOKING, owner_id=user.pk).values_list('object_id', flat=True)
+            )
+        meetings = meetings.order_by('start_time', 'id')
+        bookings = bookings.order_by('id')
+
+        next_since = now - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+        if since is not None:
+            next_since = max(since, next_since)
+        data = {
+            'sync_token': encode_sync_token(next_since),
+            'meetings': zoom_meeting_rows.serialize(meetings),
+            'bookings': booking_rows.serialize(bookings),
+            'deleted': deleted,
+        }
+        return Response(data, headers={'ETag': etag, 'Cache-Control': 'private, no-cache'})
+
+    def get_since(self, now):
+        token = self.request.query_params.get('token')
+        if not token:
+            return None
+        try:
+            since = decode_sync_token(token)
+        except (ValueError, OverflowError):
+            raise serializers.ValidationError({'token': "Invalid sync token."})
+        # Deletions before the oldest tombstones kept can no longer be reported
+        if since < now - timedelta(days=settings.SYNC_TOMBSTONE_DAYS):
+            raise SyncTokenExpired()
+        return since
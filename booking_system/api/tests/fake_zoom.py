@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeZoomServer:
+    """
+    Minimal local stand-in for the Zoom OAuth and meetings API.
+
+    `delay` slows every response down, `responses` is a list of status codes
+    returned (and consumed) before normal handling resumes, and `requests`
+    counts calls per `METHOD path`.
+    """
+    def __init__(self, delay=0, token_expires_in=3600):
+        self.delay = delay
+        self.token_expires_in = token_expires_in
+        self.responses = []
+        self.requests = Counter()
+        self.meetings = {}
+        self.next_id = 1000
+        self.tokens_issued = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f'http://{host}:{port}'
+
+    @property
+    def settings(self):
+        """
+        Settings overrides pointing the Zoom gateway at this server.
+        """
+        return {
+            'ZOOM_API_BASE_URL': f'{self.url}/v2',
+            'ZOOM_OAUTH_URL': f'{self.url}/oauth/token',
+            'ZOOM_API_KEY': 'client-id',
+            'ZOOM_API_SECRET': 'client-secret',
+            'ZOOM_API_ACCOUNT_ID': 'account-id',
+            'ZOOM_RETRY_BACKOFF': 0.01,
+        }
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def handle(self, method, path, body, query=None):
+        """
+        Returns `(status, payload)` for a request.
+        """
+        with self._lock:
+            self.requests[f'{method} {path}'] += 1
+            if self.responses:
+                return self.responses.pop(0), {'message': 'injected failure'}
+            if method == 'POST' and path == '/oauth/token':
+                self.tokens_issued += 1
+                return 200, {
+                    'access_token': f'token-{self.tokens_issued}',
+                    'token_type': 'bearer',
+                    'expires_in': self.token_expires_in,
+                }
+            if method == 'POST' and path == '/v2/users/me/meetings':
+                self.next_id += 1
+                meeting = dict(body, id=self.next_id)
+                self.meetings[self.next_id] = meeting
+                return 201, meeting
+            if path.startswith('/v2/meetings/'):
+                meeting_id = int(path.rsplit('/', 1)[-1])
+                if meeting_id not in self.meetings:
+                    return 404, {'code': 3001, 'message': 'Meeting does not exist'}
+                if method == 'GET':
+                    return 200, self.meetings[meeting_id]
+                if method == 'DELETE':
+                    occurrence_id = (query or {}).get('occurrence_id')
+                    if occurrence_id:
+                        # Only that occurrence of a recurring meeting is cancelled
+                        self.meetings[meeting_id].setdefault('cancelled_occurrences', []).extend(occurrence_id)
+                    else:
+                        del self.meetings[meeting_id]
+                    return 204, None
+            return 404, {'message': 'Not found'}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                body = json.loads(raw) if raw and self.headers.get('Content-Type') == 'application/json' else {}
+                if server.delay:
+                    time.sleep(server.delay)
+                url = urlparse(self.path)
+                status, payload = server.handle(self.command, url.path, body, parse_qs(url.query))
+                data = json.dumps(payload).encode() if payload is not None else b''
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up waiting, e.g. after a read timeout
+                    self.close_connection = True
+
+            do_GET = do_POST = do_DELETE = do_PATCH = _respond
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,69 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.archive import archive_batch
+from api.models import ArchivedBooking, ArchivedZoomMeeting, Booking, Tombstone, ZoomMeeting
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.host = User.objects.create_user(username='host', password='12345')
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        now = timezone.now()
+        # Three meetings that ended long ago, one last week and one tomorrow
+        self.meetings = []
+        for i, days in enumerate([-300, -200, -100, -7, 1]):
+            start = now + timedelta(days=days)
+            meeting = ZoomMeeting.objects.create(
+                user=self.host, meeting_id=f'archive-{i}', topic=f'Retro {i}',
+                start_time=start, end_time=start + timedelta(hours=1), booked_count=1,
+            )
+            Booking.objects.create(user=self.user, zoom_meeting=meeting)
+            self.meetings.append(meeting)
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command('archive_meetings', *args, stdout=out)
+        return out.getvalue().strip()
+
+    def test_moves_finished_meetings_in_batches(self):
+        with self.assertNumQueries(7):
+            self.assertEqual(archive_batch(timezone.now() - timedelta(days=90), 2), (2, 2))
+        self.assertEqual(self.archive('--batch-size', '2'), 'Archived 1 meeting(s) and 1 booking(s).')
+        self.assertEqual(
+            sorted(ArchivedZoomMeeting.objects.values_list('id', flat=True)), [meeting.pk for meeting in self.meetings[:3]]
+        )
+        self.assertEqual(ZoomMeeting.objects.count(), 2)
+        self.assertEqual(Booking.objects.count(), 2)
+        archived = ArchivedBooking.objects.select_related('zoom_meeting').get(zoom_meeting=self.meetings[0].pk)
+        self.assertEqual((archived.user_id, archived.zoom_meeting.topic), (self.user.pk, 'Retro 0'))
+        self.assertLess(timezone.now() - archived.archived_at, timedelta(minutes=1))
+        # Archiving is not deletion, so the sync feed is not told to drop anything
+        self.assertFalse(Tombstone.objects.exists())
+        self.assertEqual(self.archive(), 'Archived 0 meeting(s) and 0 booking(s).')
+
+    def test_lists_include_archived_rows_on_request(self):
+        self.archive()
+        self.client.force_authenticate(user=self.user)
+        url = reverse('booking_list_create')
+        response = self.client.get(url)
+        self.assertEqual([booking['zoom_meeting']['topic'] for booking in response.data['results']], ['Retro 3', 'Retro 4'])
+        response = self.client.get(url, {'history': 'true', 'page_size': 2})
+        self.assertEqual([booking['zoom_meeting']['topic'] for booking in response.data['results']], ['Retro 0', 'Retro 1'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([booking['zoom_meeting']['topic'] for booking in response.data['results']], ['Retro 2', 'Retro 3'])
+        response = self.client.get(url, {'history': 'true', 'search': 'retro'})
+        self.assertEqual(len(response.data['results']), 5)
+
+        self.client.force_authenticate(user=self.host)
+        url = reverse('zoom_meeting_list_create')
+        response = self.client.get(url, {'history': 'true', 'ordering': '-start_time'})
+        self.assertEqual([meeting['topic'] for meeting in response.data['results']], [f'Retro {i}' for i in range(4, -1, -1)])
+        self.assertEqual(response.data['results'][-1]['booked_count'], 1)
+        self.assertEqual(len(self.client.get(url).data['results']), 2)
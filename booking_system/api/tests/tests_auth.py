@@ -0,0 +1,112 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import SystemCheckError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import TokenUserCache, token_user_cache
+
+ALL_HASHERS = [
+    'api.hashers.TunableBCryptSHA256PasswordHasher',
+    'api.hashers.TunableArgon2PasswordHasher',
+    'api.hashers.TunableScryptPasswordHasher',
+]
+
+
+@override_settings(PASSWORD_BCRYPT_ROUNDS=4, PASSWORD_HASHERS=ALL_HASHERS)
+class PasswordHashingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def login(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'testuser', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+
+    def test_hash_uses_configured_cost(self):
+        self.assertTrue(self.user.password.startswith('bcrypt_sha256$$2b$04$'))
+
+    def test_rehash_on_login_when_cost_changes(self):
+        with self.settings(PASSWORD_BCRYPT_ROUNDS=5):
+            self.login()
+        self.assertTrue(self.user.password.startswith('bcrypt_sha256$$2b$05$'))
+
+    def test_rehash_on_login_when_hasher_changes(self):
+        hashers = [ALL_HASHERS[2], ALL_HASHERS[0], ALL_HASHERS[1]]
+        with self.settings(PASSWORD_HASHERS=hashers, PASSWORD_SCRYPT_WORK_FACTOR=2**10):
+            self.login()
+            self.assertTrue(self.user.password.startswith('scrypt$1024$'))
+            # The upgraded hash keeps working
+            self.login()
+
+    def test_argon2(self):
+        hashers = [ALL_HASHERS[1], ALL_HASHERS[0]]
+        with self.settings(PASSWORD_HASHERS=hashers, PASSWORD_ARGON2_MEMORY_COST=1024, PASSWORD_ARGON2_PARALLELISM=1):
+            self.login()
+            self.assertTrue(self.user.password.startswith('argon2$argon2id$v=19$m=1024,t=2,p=1$'))
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        token_user_cache.clear()
+        self.addCleanup(token_user_cache.clear)
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.url = reverse('booking_list_create')
+
+    def test_repeat_requests_skip_user_query(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        # Only the bookings query is left
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIn(self.client.get(self.url).status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    def test_changes_in_another_worker_evict_the_user(self):
+        self.client.get(self.url)
+        # Another worker's cache saw the change; this one only shares the cache backend
+        other_worker = TokenUserCache()
+        other_worker.invalidate_user(self.user.pk)
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.client.get(self.url)
+        other_worker.invalidate_token(token['jti'])
+        self.assertIsNone(token_user_cache.get(token['jti']))
+
+    @override_settings(JWT_USER_CACHE_TIMEOUT=0)
+    def test_cache_can_be_disabled(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    @override_settings(JWT_USER_CACHE_MAX_ENTRIES=2)
+    def test_cache_is_bounded(self):
+        users = [User.objects.create_user(username=f'user{i}') for i in range(3)]
+        tokens = [AccessToken.for_user(user) for user in users]
+        for user, token in zip(users, tokens):
+            token_user_cache.set(token['jti'], user, token['exp'], token_user_cache.user_version(user.pk))
+        self.assertIsNone(token_user_cache.get(tokens[0]['jti']))
+        self.assertEqual(token_user_cache.get(tokens[2]['jti']), users[2])
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    def test_process_local_cache_is_reported_on_deploy(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://redis:6379/0'}}
+        with override_settings(CACHES=locmem), self.assertRaisesMessage(SystemCheckError, 'api.W001'):
+            call_command('check', deploy=True, tags=['caches'], fail_level='WARNING')
+        with override_settings(CACHES=redis):
+            call_command('check', deploy=True, tags=['caches'], fail_level='WARNING')
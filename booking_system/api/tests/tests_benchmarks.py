@@ -0,0 +1,52 @@
+from django.test import TestCase
+from api.models import Booking, ZoomMeeting
+from benchmarks import fixtures, serialization
+from benchmarks.runner import compare_reports, percentile
+
+
+class FixturesTest(TestCase):
+    def test_seed(self):
+        dataset = fixtures.seed(users=20, meetings=10, bookings_per_user=3)
+        self.assertEqual(len(dataset.users), 20)
+        self.assertEqual(len(dataset.hosts), 2)
+        self.assertEqual(Booking.objects.count(), 60)
+        self.assertFalse(Booking.objects.filter(zoom_meeting__in=dataset.open_meetings).exists())
+        # booked_count matches the seeded bookings
+        for meeting in ZoomMeeting.objects.all():
+            self.assertEqual(meeting.booked_count, meeting.bookings.count())
+
+
+class RunnerTest(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_compare_reports(self):
+        def report(p95, rps):
+            return {'scenarios': {'slots': {
+                'latency_ms': {'p50': 10, 'p95': p95, 'p99': 40},
+                'requests_per_second': rps,
+                'queries_per_request': {'mean': 2},
+            }}}
+
+        rows, regressions = compare_reports(report(20, 100), report(30, 95), threshold=10)
+        self.assertEqual(len(rows), 5)
+        self.assertEqual([(name, metric) for name, metric, *_ in regressions], [('slots', 'p95_ms')])
+        rows, regressions = compare_reports(report(20, 100), report(20, 80), threshold=10)
+        self.assertEqual([(name, metric) for name, metric, *_ in regressions], [('slots', 'rps')])
+
+
+class SerializationBenchmarkTest(TestCase):
+    def test_run(self):
+        fixtures.seed(users=10, meetings=20, bookings_per_user=2)
+        report = serialization.run(repeat=1)
+        self.assertEqual(report['meetings']['rows'], 20)
+        self.assertEqual(report['bookings']['rows'], 20)
+        self.assertEqual(report['meetings']['variants']['model_serializer+json']['speedup'], 1)
+
+    def test_differing_output_fails(self):
+        with self.assertRaises(AssertionError):
+            serialization.compare_variants([('a', lambda: b'[]'), ('b', lambda: b'[1]')], rows=0, repeat=1)
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import queue
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.asyncviews import _stream_events, slot_events
+from api.events import KEEPALIVE, RESYNC, SLOTS_CHANNEL, InProcessBroker, RedisBroker, _pending, get_broker
+from api.models import ZoomMeeting
+
+
+class RecordingBroker(InProcessBroker):
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        super().publish(channel, message)
+
+
+def parse_frame(frame):
+    lines = dict(line.split(': ', 1) for line in frame.strip().split('\n'))
+    return lines['event'], json.loads(lines['data'])
+
+
+class InProcessBrokerTest(SimpleTestCase):
+    async def test_publish_from_another_thread(self):
+        broker = InProcessBroker()
+        async with broker.subscribe(SLOTS_CHANNEL) as queue:
+            async with broker.subscribe('other') as other:
+                self.assertEqual(broker.subscriber_count(), 2)
+                await asyncio.to_thread(broker.publish, SLOTS_CHANNEL, 'hello')
+                self.assertEqual(await asyncio.wait_for(queue.get(), 1), 'hello')
+                self.assertTrue(other.empty())
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    @override_settings(EVENTS_QUEUE_SIZE=2)
+    async def test_slow_subscriber_is_told_to_resync(self):
+        broker = InProcessBroker()
+        async with broker.subscribe(SLOTS_CHANNEL) as queue:
+            for i in range(3):
+                broker.publish(SLOTS_CHANNEL, str(i))
+            await asyncio.sleep(0)
+            self.assertEqual(queue.get_nowait(), RESYNC)
+            self.assertTrue(queue.empty())
+
+    @override_settings(EVENTS_KEEPALIVE_SECONDS=0.01)
+    async def test_keepalive(self):
+        broker = InProcessBroker()
+        async with broker.subscribe(SLOTS_CHANNEL) as queue:
+            self.assertEqual(await asyncio.wait_for(queue.get(), 1), KEEPALIVE)
+        self.assertFalse(broker._keepalives)
+
+
+class FlakyRedis:
+    """
+    Redis client double: publishing fails, and the first pub/sub connection
+    drops before any message arrives.
+    """
+    def __init__(self):
+        self.connections = 0
+        self.messages = queue.Queue()
+
+    def publish(self, channel, message):
+        raise ConnectionError('Redis is down')
+
+    def pubsub(self, **kwargs):
+        return self
+
+    def psubscribe(self, pattern):
+        self.connections += 1
+
+    def listen(self):
+        if self.connections == 1:
+            raise ConnectionError('Connection reset by peer')
+        while True:
+            yield self.messages.get()
+
+    def close(self):
+        pass
+
+
+class RedisBrokerTest(SimpleTestCase):
+    async def test_survives_redis_failures(self):
+        redis = FlakyRedis()
+        broker = RedisBroker(client=redis)
+        broker.reconnect_delay = 0.01
+        with self.assertLogs('api.events', 'ERROR'):
+            broker.publish(SLOTS_CHANNEL, 'lost')
+        with self.assertLogs('api.events', 'ERROR'):
+            async with broker.subscribe(SLOTS_CHANNEL) as subscriber:
+                # The listener reconnects and tells subscribers they may have missed events
+                self.assertEqual(await asyncio.wait_for(subscriber.get(), 1), RESYNC)
+                redis.messages.put({'channel': f'events:{SLOTS_CHANNEL}'.encode(), 'data': b'hello'})
+                self.assertEqual(await asyncio.wait_for(subscriber.get(), 1), 'hello')
+        self.assertEqual(redis.connections, 2)
+
+
+@override_settings(EVENTS_BROKER='api.tests.tests_events.RecordingBroker')
+class SlotEventsTest(TestCase):
+    def setUp(self):
+        get_broker().published.clear()
+        # Changes left over from earlier tests, which never commit
+        _pending.events = {}
+        self.client = APIClient()
+        self.host = User.objects.create_user(username='host', password='12345')
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        start = timezone.now() + timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.meeting = ZoomMeeting.objects.create(
+                user=self.host, meeting_id='events-1', topic='Meeting', capacity=3,
+                start_time=start, end_time=start + timedelta(minutes=30)
+            )
+
+    def events(self):
+        return [parse_frame(message) for channel, message in get_broker().published]
+
+    def test_meeting_and_booking_changes_are_published(self):
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('booking_list_create'), {'zoom_meeting_id': self.meeting.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('booking_detail', kwargs={'pk': response.data['id']}))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.meeting.delete()
+        events = self.events()
+        self.assertEqual([event for event, data in events], ['meeting.created', 'seats.changed', 'seats.changed', 'meeting.deleted'])
+        self.assertEqual(events[1][1]['booked_count'], 1)
+        self.assertEqual(events[2][1]['booked_count'], 0)
+        self.assertEqual(events[3][1], {'id': events[0][1]['id']})
+
+    def test_bulk_booking_publishes_once_per_meeting(self):
+        staff = User.objects.create_user(username='staff', password='12345', is_staff=True)
+        self.client.force_authenticate(user=staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('booking_bulk_create'),
+                {'zoom_meeting_ids': [self.meeting.pk], 'user_ids': [self.user.pk, staff.pk]},
+                format='json'
+            )
+        event, data = self.events()[-1]
+        self.assertEqual(len(self.events()), 2)
+        self.assertEqual((event, data['booked_count']), ('seats.changed', 2))
+
+    def test_nothing_is_published_before_commit(self):
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=False):
+            self.client.post(reverse('booking_list_create'), {'zoom_meeting_id': self.meeting.pk})
+        self.assertEqual(len(self.events()), 1)
+
+
+class SlotEventsStreamTest(SimpleTestCase):
+    async def test_stream(self):
+        # Called directly rather than through the test client, which wraps the
+        # stream so that closing it no longer reaches the subscription
+        response = await slot_events(AsyncRequestFactory().get(reverse('async_slot_events')))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+        get_broker().publish(SLOTS_CHANNEL, 'event: seats.changed\ndata: {"id": 1}\n\n')
+        self.assertEqual(await asyncio.wait_for(anext(stream), 1), b'event: seats.changed\ndata: {"id": 1}\n\n')
+        # An ASGI server cancels the stream when the client disconnects
+        task = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(get_broker().subscriber_count(), 0)
+
+    async def test_closed_stream_unsubscribes(self):
+        stream = _stream_events(SLOTS_CHANNEL)
+        await anext(stream)
+        self.assertEqual(get_broker().subscriber_count(), 1)
+        await stream.aclose()
+        self.assertEqual(get_broker().subscriber_count(), 0)
@@ -0,0 +1,112 @@
+import csv
+import io
+from datetime import timedelta
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from api.exportviews import csv_cell, ics_line, ics_text, iterate_rows
+from api.models import Booking, ZoomMeeting
+
+
+class ExportFormattingTest(SimpleTestCase):
+    def test_ics_line_folding(self):
+        self.assertEqual(ics_line('SUMMARY:short'), 'SUMMARY:short\r\n')
+        folded = ics_line('SUMMARY:' + 'é' * 60)
+        lines = folded.split('\r\n')[:-1]
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        self.assertTrue(all(line.startswith(' ') for line in lines[1:]))
+        self.assertEqual(''.join(line[1:] if i else line for i, line in enumerate(lines)), 'SUMMARY:' + 'é' * 60)
+
+    def test_escaping(self):
+        self.assertEqual(ics_text('Plan; review, notes\nnext'), 'Plan\\; review\\, notes\\nnext')
+        self.assertEqual(csv_cell('=HYPERLINK("x")'), '\'=HYPERLINK("x")')
+        self.assertEqual(csv_cell(-1), -1)
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ScheduleExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.host = User.objects.create_user(username='host', password='12345')
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        start = timezone.now() + timedelta(days=1)
+        self.meetings = [
+            ZoomMeeting.objects.create(
+                user=self.host, meeting_id=f'export-{i}', topic=f'Meeting {i}, part {i}',
+                start_time=start + timedelta(hours=i), end_time=start + timedelta(hours=i, minutes=30)
+            )
+            for i in range(5)
+        ]
+        for meeting in self.meetings:
+            ZoomMeeting.reserve_seat(meeting.pk)
+            Booking.objects.create(user=self.user, zoom_meeting=meeting)
+
+    def read(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_bookings_csv(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('booking_export', kwargs={'file_format': 'csv'}))
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="bookings.csv"')
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual([row['zoom_meeting_id'] for row in rows], [f'export-{i}' for i in range(5)])
+        self.assertEqual(rows[1]['topic'], 'Meeting 1, part 1')
+        listed = self.client.get(reverse('booking_list_create'), {'ordering': 'start_time'}).data['results']
+        self.assertEqual(rows[0]['start_time'], listed[0]['zoom_meeting']['start_time'])
+
+    def test_bookings_ics(self):
+        self.client.force_authenticate(user=self.user)
+        body = self.read(self.client.get(reverse('booking_export', kwargs={'file_format': 'ics'})))
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+        self.assertEqual(body.count('BEGIN:VEVENT'), 5)
+        self.assertIn('SUMMARY:Meeting 0\\, part 0\r\n', body)
+        self.assertIn(f"DTSTART:{self.meetings[0].start_time.strftime('%Y%m%dT%H%M%SZ')}\r\n", body)
+
+    def test_hosted_meetings(self):
+        self.client.force_authenticate(user=self.host)
+        rows = list(csv.DictReader(io.StringIO(self.read(
+            self.client.get(reverse('zoom_meeting_export', kwargs={'file_format': 'csv'}))
+        ))))
+        self.assertEqual([row['booked_count'] for row in rows], ['1'] * 5)
+        self.client.force_authenticate(user=self.user)
+        body = self.read(self.client.get(reverse('zoom_meeting_export', kwargs={'file_format': 'ics'})))
+        self.assertNotIn('BEGIN:VEVENT', body)
+
+    async def test_streams_under_asgi(self):
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        response = await self.async_client.get(reverse('booking_export', kwargs={'file_format': 'csv'}), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # An async iterator is sent chunk by chunk, a sync one only once read whole
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([row['zoom_meeting_id'] for row in rows], [f'export-{i}' for i in range(5)])
+
+    def test_other_users_schedule_is_for_staff(self):
+        self.client.force_authenticate(user=self.host)
+        url = reverse('booking_export', kwargs={'file_format': 'csv'})
+        self.assertEqual(self.client.get(url, {'user': self.user.pk}).status_code, status.HTTP_403_FORBIDDEN)
+        self.host.is_staff = True
+        self.host.save()
+        self.assertEqual(self.read(self.client.get(url, {'user': self.user.pk})).count('export-'), 5)
+
+    def test_unknown_format(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('booking_export', kwargs={'file_format': 'pdf'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_batches_without_server_side_cursors(self):
+        queryset = Booking.objects.filter(user=self.user).values('id', 'start_time')
+        with patch.dict(connection.settings_dict, DISABLE_SERVER_SIDE_CURSORS=True):
+            with self.assertNumQueries(3):
+                rows = list(iterate_rows(queryset, 2))
+        self.assertEqual([row['id'] for row in rows], list(Booking.objects.order_by('start_time').values_list('id', flat=True)))
@@ -0,0 +1,91 @@
+import re
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.metrics import Histogram, registry
+from api.tests.fake_zoom import FakeZoomServer
+
+
+def server_timing(response):
+    """
+    Parses a Server-Timing header into `{name: (milliseconds, calls)}`.
+    """
+    timings = {}
+    for entry in response['Server-Timing'].split(', '):
+        match = re.match(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) calls")?', entry)
+        timings[match[1]] = (float(match[2]), int(match[3] or 0))
+    return timings
+
+
+class PerformanceMiddlewareTest(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='12345')
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_sampled_request_has_server_timing(self):
+        response = self.client.get(reverse('booking_list_create'))
+        timings = server_timing(response)
+        self.assertEqual(set(timings), {'total', 'db', 'smtp', 'zoom'})
+        self.assertGreaterEqual(timings['db'][1], 1)
+        self.assertEqual(timings['zoom'][1], 0)
+        self.assertGreaterEqual(timings['total'][0], timings['db'][0])
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_zoom_time_is_recorded(self):
+        with FakeZoomServer(delay=0.05) as server, self.settings(**server.settings):
+            start = timezone.now() + timedelta(days=1)
+            response = self.client.post(reverse('zoom_meeting_list_create'), {
+                'topic': 'Office Hours', 'start_time': start, 'end_time': start + timedelta(minutes=30),
+            })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        milliseconds, calls = server_timing(response)['zoom']
+        # The token and the meeting request
+        self.assertEqual(calls, 2)
+        self.assertGreaterEqual(milliseconds, 100)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_request_is_only_counted(self):
+        response = self.client.get(reverse('booking_list_create'))
+        self.assertNotIn('Server-Timing', response)
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('booking_http_requests_total{method="GET",route="api/bookings/",status="200"} 1', body)
+        self.assertNotIn('booking_db_queries_total{', body)
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('booking_list_create'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('booking_http_request_duration_seconds_count{method="GET",route="api/bookings/"} 1', body)
+        self.assertRegex(body, r'booking_db_queries_total\{route="api/bookings/"\} [1-9]')
+        self.assertIn('booking_slots_cache_future_hits_total', body)
+        self.assertIn('booking_zoom_token_fetches_total', body)
+
+    @override_settings(METRICS_AUTH_TOKEN='scrape-secret')
+    def test_metrics_endpoint_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class HistogramTest(TestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram('latency_seconds', 'Latency.', ('route',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value, route='a')
+        self.assertEqual(list(histogram.collect())[2:], [
+            'latency_seconds_bucket{route="a",le="0.1"} 1',
+            'latency_seconds_bucket{route="a",le="1.0"} 2',
+            'latency_seconds_bucket{route="a",le="+Inf"} 3',
+            'latency_seconds_sum{route="a"} 5.55',
+            'latency_seconds_count{route="a"} 3',
+        ])
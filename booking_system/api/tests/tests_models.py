@@ -3,7 +3,9 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
 from django.test import TestCase
-from api.models import ZoomMeeting, Booking
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from api.models import ZoomMeeting, Booking, Tombstone, find_overlap
 
 class ModelTests(TestCase):
     def setUp(self):
@@ -34,3 +36,95 @@ class ModelTests(TestCase):
         self.assertEqual(self.user.bookings.count(), 1)
 
 
+
+    def test_reserve_seat_stops_at_capacity(self):
+        self.zoom_meeting.capacity = 2
+        self.zoom_meeting.save()
+        self.assertTrue(ZoomMeeting.reserve_seat(self.zoom_meeting.id))
+        self.assertTrue(ZoomMeeting.reserve_seat(self.zoom_meeting.id))
+        self.assertFalse(ZoomMeeting.reserve_seat(self.zoom_meeting.id))
+        self.zoom_meeting.refresh_from_db()
+        self.assertEqual(self.zoom_meeting.booked_count, 2)
+
+    def test_release_seat(self):
+        ZoomMeeting.reserve_seat(self.zoom_meeting.id)
+        ZoomMeeting.release_seat(self.zoom_meeting.id)
+        ZoomMeeting.release_seat(self.zoom_meeting.id)
+        self.zoom_meeting.refresh_from_db()
+        self.assertEqual(self.zoom_meeting.booked_count, 0)
+
+    def test_deleted_bookings_release_their_seat(self):
+        attendees = [User.objects.create_user(username=f'attendee{i}', password='12345') for i in range(3)]
+        for attendee in attendees:
+            ZoomMeeting.reserve_seat(self.zoom_meeting.id)
+            Booking.objects.create(user=attendee, zoom_meeting=self.zoom_meeting)
+        # A user deletion cascades to their bookings without going through the views
+        attendees[0].delete()
+        Booking.objects.filter(user=attendees[1]).delete()
+        self.zoom_meeting.refresh_from_db()
+        self.assertEqual(self.zoom_meeting.booked_count, 1)
+        self.assertEqual(self.zoom_meeting.bookings.count(), 1)
+
+    def test_queryset_deletes_release_seats_together(self):
+        meetings = [self.zoom_meeting] + [
+            ZoomMeeting.objects.create(
+                user=self.user, meeting_id=f'grouped-{i}', topic=f'Grouped {i}',
+                start_time=self.zoom_meeting.start_time + timedelta(hours=2 * i),
+                end_time=self.zoom_meeting.end_time + timedelta(hours=2 * i),
+            )
+            for i in range(1, 3)
+        ]
+        attendees = [User.objects.create_user(username=f'attendee{i}', password='12345') for i in range(4)]
+        for meeting in meetings:
+            ZoomMeeting.reserve_seats({meeting.id: len(attendees)})
+            Booking.objects.bulk_create([
+                Booking(user=attendee, zoom_meeting=meeting, start_time=meeting.start_time, end_time=meeting.end_time)
+                for attendee in attendees
+            ])
+
+        def delete_counting_queries(bookings):
+            with CaptureQueriesContext(connection) as queries:
+                bookings.delete()
+            return len(queries)
+
+        # One booking or many, the seats, tombstones and caches cost the same queries
+        single = delete_counting_queries(Booking.objects.filter(zoom_meeting=meetings[0], user=attendees[0]))
+        self.assertEqual(delete_counting_queries(Booking.objects.filter(user__in=attendees[1:])), single)
+        self.assertEqual(
+            [meeting.booked_count for meeting in ZoomMeeting.objects.filter(pk__in=[m.pk for m in meetings]).order_by('pk')],
+            [0, 1, 1],
+        )
+        self.assertEqual(Tombstone.objects.filter(kind=Tombstone.KIND_BOOKING).count(), 10)
+
+    def test_reserve_and_release_seats(self):
+        other = ZoomMeeting.objects.create(
+            user=self.user, meeting_id='other', topic='Other',
+            start_time=self.zoom_meeting.start_time, end_time=self.zoom_meeting.end_time
+        )
+        ZoomMeeting.reserve_seats({self.zoom_meeting.id: 3, other.id: 1})
+        ZoomMeeting.release_seats({self.zoom_meeting.id: 1})
+        self.zoom_meeting.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.zoom_meeting.booked_count, 2)
+        self.assertEqual(other.booked_count, 1)
+
+    def test_find_overlap(self):
+        start = self.zoom_meeting.start_time
+        for i in range(1, 4):
+            ZoomMeeting.objects.create(
+                user=self.user, meeting_id=f'later-{i}', topic=f'Later {i}',
+                start_time=start + timedelta(hours=2 * i), end_time=start + timedelta(hours=2 * i + 1)
+            )
+        calendar = ZoomMeeting.objects.filter(user=self.user)
+        with self.assertNumQueries(1):
+            conflict = find_overlap(calendar, start + timedelta(minutes=30), start + timedelta(minutes=90))
+        self.assertEqual(conflict, self.zoom_meeting)
+        self.assertEqual(find_overlap(calendar, start + timedelta(hours=4, minutes=30), start + timedelta(hours=6)).topic, 'Later 2')
+        # Back-to-back meetings do not overlap
+        self.assertIsNone(find_overlap(calendar, self.zoom_meeting.end_time, start + timedelta(hours=2)))
+        self.assertIsNone(find_overlap(calendar, start - timedelta(hours=1), start))
+
+    def test_booking_copies_meeting_times(self):
+        booking = Booking.objects.create(user=self.user, zoom_meeting=self.zoom_meeting)
+        self.assertEqual(booking.start_time, self.zoom_meeting.start_time)
+        self.assertEqual(booking.end_time, self.zoom_meeting.end_time)
@@ -0,0 +1,87 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.models import Booking, ZoomMeeting
+from api.routers import ReplicaRouter
+
+
+class ReplicaRouterTest(TransactionTestCase):
+    # The replica is a test mirror of the default database; TransactionTestCase
+    # commits, so data written through one connection is visible to the other
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.meeting = ZoomMeeting.objects.create(
+            user=User.objects.create_user(username='host', password='12345'),
+            meeting_id='123456', topic='Test Meeting',
+            start_time=timezone.now() + timedelta(days=1), end_time=timezone.now() + timedelta(days=1, hours=1)
+        )
+
+    def get(self, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(primary), len(replica)
+
+    def test_safe_reads_use_replica(self):
+        Booking.objects.create(user=self.user, zoom_meeting=self.meeting)
+        primary, replica = self.get(reverse('booking_list_create'))
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_reads_stick_to_primary_after_own_write(self):
+        response = self.client.post(reverse('booking_list_create'), {'zoom_meeting_id': self.meeting.pk})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        primary, replica = self.get(reverse('booking_list_create'))
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        # Other users are not pinned
+        self.client.force_authenticate(user=User.objects.create_user(username='other', password='12345'))
+        primary, replica = self.get(reverse('booking_list_create'))
+        self.assertEqual(primary, 0)
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_pin_expires(self):
+        self.client.post(reverse('booking_list_create'), {'zoom_meeting_id': self.meeting.pk})
+        primary, replica = self.get(reverse('booking_list_create'))
+        self.assertEqual(primary, 0)
+
+    def test_session_authenticated_reads(self):
+        client = APIClient()
+        client.login(username='testuser', password='12345')
+        Booking.objects.create(user=self.user, zoom_meeting=self.meeting)
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = client.get(reverse('booking_list_create'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        # The session and the user come from the primary, the bookings from the replica
+        self.assertTrue(replica)
+        self.assertFalse([query for query in replica if 'django_session' in query['sql'] or 'auth_user' in query['sql']])
+
+    def test_cached_booked_set_is_read_from_primary(self):
+        # Booked by another process, so this user's reads are not pinned
+        Booking.objects.create(user=self.user, zoom_meeting=self.meeting)
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(reverse('available_slots'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in replica if 'api_booking' in query['sql']])
+
+    def test_reads_outside_requests_and_in_transactions_use_primary(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Booking), 'default')
+        with transaction.atomic():
+            self.assertEqual(router.db_for_read(Booking), 'default')
+        self.assertEqual(router.db_for_write(Booking), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'api'))
@@ -0,0 +1,76 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.models import Booking, ZoomMeeting
+from api.search import SQLITE_TABLE, index_meetings
+
+
+class TopicSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('zoom_meeting_list_create')
+        start = timezone.now() + timedelta(days=1)
+        self.meetings = {}
+        for i, topic in enumerate(['Quarterly planning', 'Planning planning planning', 'Café catch-up', 'Retro']):
+            self.meetings[topic] = ZoomMeeting.objects.create(
+                user=self.user, meeting_id=f'search-{i}', topic=topic,
+                start_time=start + timedelta(hours=i), end_time=start + timedelta(hours=i, minutes=30)
+            )
+
+    def search(self, query, **params):
+        response = self.client.get(self.url, {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [meeting['topic'] for meeting in response.data['results']]
+
+    def test_prefix_match_ranked(self):
+        self.assertEqual(self.search('plan'), ['Planning planning planning', 'Quarterly planning'])
+        self.assertEqual(self.search('cafe'), ['Café catch-up'])
+        self.assertEqual(self.search('quarterly plan'), ['Quarterly planning'])
+        self.assertEqual(self.search('nothing'), [])
+
+    def test_results_match_serializer_fields(self):
+        response = self.client.get(self.url, {'search': 'retro'})
+        self.assertNotIn('search_rank', response.data['results'][0])
+
+    def test_explicit_ordering(self):
+        self.assertEqual(self.search('plan', ordering='start_time'), ['Quarterly planning', 'Planning planning planning'])
+
+    def test_pages_follow_rank(self):
+        ZoomMeeting.objects.filter(pk=self.meetings['Retro'].pk).update(topic='Planning')
+        index_meetings([ZoomMeeting.objects.get(pk=self.meetings['Retro'].pk)])
+        topics, url, params = [], self.url, {'search': 'planning', 'page_size': 1}
+        while url:
+            response = self.client.get(url, params)
+            topics += [meeting['topic'] for meeting in response.data['results']]
+            url, params = response.data['next'], None
+        self.assertEqual(topics, ['Planning planning planning', 'Planning', 'Quarterly planning'])
+
+    def test_index_follows_saves_and_deletes(self):
+        meeting = self.meetings['Retro']
+        meeting_id = meeting.pk
+        meeting.topic = 'Sprint review'
+        meeting.save()
+        self.assertEqual(self.search('sprint'), ['Sprint review'])
+        self.assertEqual(self.search('retro'), [])
+        meeting.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {SQLITE_TABLE} WHERE rowid = %s', [meeting_id])
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_booking_search_matches_topic_or_username(self):
+        other = User.objects.create_user(username='planner')
+        for user in (self.user, other):
+            Booking.objects.create(user=user, zoom_meeting=self.meetings['Retro'])
+        Booking.objects.create(user=self.user, zoom_meeting=self.meetings['Quarterly planning'])
+        url = reverse('booking_list_create')
+        response = self.client.get(url, {'search': 'quarterly'})
+        self.assertEqual([booking['zoom_meeting']['topic'] for booking in response.data['results']], ['Quarterly planning'])
+        # Every term must match the topic or the username
+        response = self.client.get(url, {'search': 'testuser retro'})
+        self.assertEqual([booking['zoom_meeting']['topic'] for booking in response.data['results']], ['Retro'])
@@ -1,9 +1,15 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from types import SimpleNamespace
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.renderers import JSONRenderer
 from api.models import ZoomMeeting, Booking
-from api.serializers import UserSerializer, ZoomMeetingSerializer, BookingSerializer
+from api.renderers import ORJSONParser, ORJSONRenderer
+from api.serializers import UserSerializer, ZoomMeetingSerializer, BookingSerializer, booking_rows, zoom_meeting_rows
 
 class SerializerTests(TestCase):
     def setUp(self):
@@ -27,9 +33,59 @@ class SerializerTests(TestCase):
 
     def test_zoom_meeting_serializer(self):
         serializer = ZoomMeetingSerializer(instance=self.zoom_meeting)
-        self.assertEqual(set(serializer.data.keys()), set(['id', 'user', 'meeting_id', 'topic', 'start_time', 'end_time', 'created_at']))
+        self.assertEqual(set(serializer.data.keys()), set(['id', 'user', 'meeting_id', 'series', 'topic', 'start_time', 'end_time', 'capacity', 'booked_count', 'created_at']))
 
     def test_booking_serializer(self):
         booking = Booking.objects.create(user=self.user, zoom_meeting=self.zoom_meeting)
         serializer = BookingSerializer(instance=booking)
         self.assertEqual(set(serializer.data.keys()), set(['id', 'user', 'zoom_meeting', 'created_at']))
+
+    def test_overlap_committed_after_validation_is_caught(self):
+        later = ZoomMeeting.objects.create(
+            user=self.user, meeting_id='later', topic='Later',
+            start_time=self.zoom_meeting.start_time + timedelta(minutes=30),
+            end_time=self.zoom_meeting.end_time + timedelta(minutes=30),
+        )
+        request = SimpleNamespace(user=self.user)
+        serializer = BookingSerializer(data={'zoom_meeting_id': later.pk}, context={'request': request})
+        self.assertTrue(serializer.is_valid())
+        # A concurrent request books an overlapping meeting between validate() and save()
+        Booking.objects.create(user=self.user, zoom_meeting=self.zoom_meeting)
+        with self.assertRaises(ValidationError):
+            serializer.save(user=self.user)
+        later.refresh_from_db()
+        self.assertEqual((later.booked_count, later.bookings.count()), (0, 0))
+
+    def test_row_serializers_match_model_serializers(self):
+        booking = Booking.objects.create(user=self.user, zoom_meeting=self.zoom_meeting)
+        self.assertEqual(
+            zoom_meeting_rows.serialize(ZoomMeeting.objects.all()),
+            ZoomMeetingSerializer(ZoomMeeting.objects.all(), many=True).data
+        )
+        self.assertEqual(
+            booking_rows.serialize(Booking.objects.all()),
+            BookingSerializer([booking], many=True).data
+        )
+
+
+class RendererTests(SimpleTestCase):
+    data = {
+        'topic': 'Café\u2028planning',
+        'start_time': timezone.now(),
+        'capacity': Decimal('1.50'),
+        'ids': [1, 2],
+        'nested': {3: None},
+    }
+
+    def test_renders_like_json_renderer(self):
+        self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indented_output_falls_back(self):
+        rendered = ORJSONRenderer().render(self.data, 'application/json; indent=2')
+        self.assertEqual(rendered, JSONRenderer().render(self.data, 'application/json; indent=2'))
+
+    def test_parser(self):
+        parsed = ORJSONParser().parse(BytesIO('{"topic": "Café", "ids": [1]}'.encode()))
+        self.assertEqual(parsed, {'topic': 'Café', 'ids': [1]})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"topic":'))
@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.models import Booking, EmailOutbox, MeetingSeries, ZoomMeeting
+from api.recurrence import RecurrenceRule, expand_series
+from api.tests.fake_zoom import FakeZoomServer
+
+
+class RecurrenceRuleTest(SimpleTestCase):
+    start = datetime(2030, 1, 30, 9, 0, tzinfo=dt_timezone.utc)  # A Wednesday
+
+    def occurrences(self, rrule):
+        return [value.date().isoformat() for value in RecurrenceRule.parse(rrule).occurrences(self.start)]
+
+    def test_weekly(self):
+        self.assertEqual(
+            self.occurrences('FREQ=WEEKLY;BYDAY=MO,WE;COUNT=4'),
+            ['2030-01-30', '2030-02-04', '2030-02-06', '2030-02-11'],
+        )
+        self.assertEqual(self.occurrences('FREQ=WEEKLY;INTERVAL=2;UNTIL=20300227'), ['2030-01-30', '2030-02-13', '2030-02-27'])
+
+    def test_daily_and_monthly(self):
+        self.assertEqual(self.occurrences('FREQ=DAILY;INTERVAL=3;COUNT=3'), ['2030-01-30', '2030-02-02', '2030-02-05'])
+        # February has no 30th
+        self.assertEqual(self.occurrences('FREQ=MONTHLY;COUNT=3'), ['2030-01-30', '2030-03-30', '2030-04-30'])
+
+    def test_invalid_rules(self):
+        for rrule in ['FREQ=YEARLY;COUNT=2', 'FREQ=WEEKLY', 'FREQ=DAILY;COUNT=2;UNTIL=20300201',
+                      'FREQ=DAILY;BYDAY=MO;COUNT=2', 'FREQ=WEEKLY;BYDAY=XX;COUNT=2', 'FREQ=DAILY;BYHOUR=9;COUNT=2']:
+            with self.assertRaises(ValueError, msg=rrule):
+                RecurrenceRule.parse(rrule)
+
+    def test_zoom_recurrence(self):
+        rule = RecurrenceRule.parse('rrule:freq=weekly;byday=su,mo;until=20300301')
+        self.assertEqual(str(rule), 'FREQ=WEEKLY;BYDAY=MO,SU;UNTIL=20300301T235959Z')
+        self.assertEqual(rule.zoom_recurrence(self.start), {
+            'type': 2, 'repeat_interval': 1, 'weekly_days': '2,1', 'end_date_time': '2030-03-01T23:59:59Z',
+        })
+
+
+@override_settings(SERIES_EXPANSION_DAYS=14)
+class MeetingSeriesViewsTest(TestCase):
+    def setUp(self):
+        self.server = FakeZoomServer().start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(**self.server.settings)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='host', email='host@example.com', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.start = (timezone.now() + timedelta(days=1)).replace(microsecond=0)
+        self.data = {
+            'topic': 'Office Hours',
+            'start_time': self.start,
+            'end_time': self.start + timedelta(minutes=45),
+            'rrule': 'FREQ=WEEKLY;COUNT=8',
+        }
+
+    def create_series(self, **data):
+        response = self.client.post(reverse('zoom_series_list_create'), dict(self.data, **data))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return MeetingSeries.objects.get(pk=response.data['id'])
+
+    def test_create_series(self):
+        series = self.create_series()
+        # One recurring Zoom meeting backs every occurrence
+        self.assertEqual(self.server.requests['POST /v2/users/me/meetings'], 1)
+        zoom_meeting = self.server.meetings[int(series.meeting_id)]
+        self.assertEqual(zoom_meeting['type'], 8)
+        self.assertEqual(zoom_meeting['recurrence']['end_times'], 8)
+        # Only the occurrences of the next two weeks exist so far
+        occurrences = list(series.occurrences.order_by('start_time'))
+        self.assertEqual([occurrence.start_time for occurrence in occurrences], [self.start, self.start + timedelta(weeks=1)])
+        self.assertEqual({occurrence.meeting_id for occurrence in occurrences}, {series.meeting_id})
+        self.assertEqual(occurrences[0].occurrence_id, str(int(self.start.timestamp() * 1000)))
+        response = self.client.get(reverse('zoom_meeting_list_create'), {'search': 'office'})
+        self.assertEqual([meeting['series'] for meeting in response.data['results']], [series.pk] * 2)
+
+    def test_create_overlapping_series(self):
+        ZoomMeeting.objects.create(
+            user=self.user, meeting_id='single', topic='Standup',
+            start_time=self.start + timedelta(weeks=5), end_time=self.start + timedelta(weeks=5, minutes=15),
+        )
+        response = self.client.post(reverse('zoom_series_list_create'), self.data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.server.meetings)
+        response = self.client.post(reverse('zoom_series_list_create'), dict(self.data, rrule='FREQ=DAILY;COUNT=61'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_occurrences_are_created_lazily(self):
+        series = self.create_series()
+        url = reverse('zoom_series_occurrences', kwargs={'pk': series.pk})
+        response = self.client.get(url, {'start': self.start + timedelta(weeks=3), 'end': self.start + timedelta(weeks=5)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        # Weeks 0, 1 at creation, then weeks 2 to 4 on demand
+        self.assertEqual(series.occurrences.count(), 5)
+        series.refresh_from_db()
+        with self.assertNumQueries(0):
+            self.assertEqual(expand_series(series, self.start + timedelta(weeks=5)), [])
+        call_command('expand_series', stdout=StringIO())
+        self.assertEqual(series.occurrences.count(), 5)
+        self.assertEqual(len(expand_series(series)), 3)
+
+    def test_only_the_host_expands_occurrences(self):
+        series = self.create_series()
+        other = User.objects.create_user(username='attendee', password='12345')
+        self.client.force_authenticate(user=other)
+        url = reverse('zoom_series_occurrences', kwargs={'pk': series.pk})
+        response = self.client.get(url, {'start': self.start, 'end': self.start + timedelta(days=365)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(series.occurrences.count(), 2)
+
+    def test_delete_series_keeps_past_occurrences(self):
+        series = self.create_series()
+        attendee = User.objects.create_user(username='attendee', email='attendee@example.com')
+        past, upcoming = series.occurrences.order_by('start_time')
+        started = timezone.now() - timedelta(minutes=10)
+        ZoomMeeting.objects.filter(pk=past.pk).update(start_time=started, end_time=started + timedelta(minutes=45))
+        for occurrence in (past, upcoming):
+            Booking.objects.create(user=attendee, zoom_meeting=occurrence)
+        response = self.client.delete(reverse('zoom_series_detail', kwargs={'pk': series.pk}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(ZoomMeeting.objects.values_list('pk', 'series')), [(past.pk, None)])
+        self.assertEqual(list(Booking.objects.values_list('zoom_meeting', flat=True)), [past.pk])
+        self.assertEqual(EmailOutbox.objects.filter(subject='Booking Cancellation').count(), 1)
+
+    def test_book_series(self):
+        series = self.create_series()
+        attendee = User.objects.create_user(username='attendee', email='attendee@example.com')
+        self.client.force_authenticate(user=attendee)
+        response = self.client.post(reverse('zoom_series_book', kwargs={'pk': series.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data['results']], ['booked'] * 8)
+        self.assertEqual(Booking.objects.filter(user=attendee).count(), 8)
+        self.assertEqual(set(series.occurrences.values_list('booked_count', flat=True)), {1})
+        response = self.client.post(reverse('zoom_series_book', kwargs={'pk': series.pk}))
+        self.assertEqual([result['status'] for result in response.data['results']], ['already_booked'] * 8)
+
+    def test_delete_occurrence_and_series(self):
+        series = self.create_series()
+        attendee = User.objects.create_user(username='attendee', email='attendee@example.com')
+        first, second = series.occurrences.order_by('start_time')
+        Booking.objects.create(user=attendee, zoom_meeting=second)
+        response = self.client.delete(reverse('zoom_meeting_detail', kwargs={'pk': first.pk}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.server.meetings[int(series.meeting_id)]['cancelled_occurrences'], [first.occurrence_id])
+        response = self.client.delete(reverse('zoom_series_detail', kwargs={'pk': series.pk}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(self.server.meetings)
+        self.assertFalse(ZoomMeeting.objects.exists())
+        self.assertEqual(EmailOutbox.objects.get(subject='Booking Cancellation').recipient, 'attendee@example.com')
@@ -0,0 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.models import Booking, Tombstone, ZoomMeeting
+from api.syncviews import encode_sync_token
+
+
+@override_settings(SYNC_OVERLAP_SECONDS=0)
+class SyncViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.host = User.objects.create_user(username='host', email='host@example.com', password='12345')
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='12345')
+        self.client.force_authenticate(user=self.user)
+        start = timezone.now() + timedelta(days=1)
+        self.meetings = [
+            ZoomMeeting.objects.create(
+                user=self.host, meeting_id=f'sync-{i}', topic=f'Meeting {i}',
+                start_time=start + timedelta(hours=i), end_time=start + timedelta(hours=i, minutes=30)
+            )
+            for i in range(3)
+        ]
+        self.booking = Booking.objects.create(user=self.user, zoom_meeting=self.meetings[0])
+        ZoomMeeting.reserve_seat(self.meetings[0].pk)
+        self.url = reverse('sync')
+
+    def test_snapshot(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([m['id'] for m in response.data['meetings']], [m.pk for m in self.meetings])
+        self.assertEqual([b['id'] for b in response.data['bookings']], [self.booking.pk])
+        self.assertEqual(response.data['deleted'], {'meetings': [], 'bookings': []})
+        self.assertTrue(response.data['sync_token'])
+        self.assertTrue(response['ETag'])
+
+    def test_unchanged_poll_is_not_modified(self):
+        response = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.url, {'token': response.data['sync_token']}, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(response.content)
+
+    def test_delta_returns_only_changes(self):
+        first = self.client.get(self.url)
+        deleted_meeting_id = self.meetings[2].pk
+        response = self.client.post(reverse('booking_list_create'), {'zoom_meeting_id': self.meetings[1].pk})
+        new_booking_id = response.data['id']
+        self.meetings[2].delete()
+        self.client.delete(reverse('booking_detail', kwargs={'pk': self.booking.pk}))
+
+        response = self.client.get(
+            self.url, {'token': first.data['sync_token']}, HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        # Both bookings changed the seat counts of their meetings
+        self.assertEqual([m['id'] for m in response.data['meetings']], [self.meetings[0].pk, self.meetings[1].pk])
+        self.assertEqual([b['id'] for b in response.data['bookings']], [new_booking_id])
+        self.assertEqual(response.data['deleted'], {'meetings': [deleted_meeting_id], 'bookings': [self.booking.pk]})
+
+    def test_moved_booking_is_reported(self):
+        first = self.client.get(self.url)
+        response = self.client.put(
+            reverse('booking_detail', kwargs={'pk': self.booking.pk}), {'zoom_meeting_id': self.meetings[2].pk}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.url, {'token': first.data['sync_token']})
+        self.assertEqual(
+            [(b['id'], b['zoom_meeting']['id']) for b in response.data['bookings']], [(self.booking.pk, self.meetings[2].pk)]
+        )
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.start_time, self.meetings[2].start_time)
+
+    def test_other_users_deletions_are_private(self):
+        other = User.objects.create_user(username='other', password='12345')
+        first = self.client.get(self.url)
+        Booking.objects.create(user=other, zoom_meeting=self.meetings[1]).delete()
+        response = self.client.get(self.url, {'token': first.data['sync_token']})
+        self.assertEqual(response.data['deleted']['bookings'], [])
+        self.assertEqual(response.data['bookings'], [])
+
+    def test_invalid_and_expired_tokens(self):
+        response = self.client.get(self.url, {'token': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        expired = encode_sync_token(timezone.now() - timedelta(days=365))
+        response = self.client.get(self.url, {'token': expired})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(self.url)
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    def test_prune_tombstones(self):
+        deleted_meeting_id = self.meetings[2].pk
+        self.meetings[2].delete()
+        Tombstone.objects.create(
+            kind=Tombstone.KIND_BOOKING, object_id=99, owner_id=self.user.pk,
+            deleted_at=timezone.now() - timedelta(days=60)
+        )
+        call_command('prune_tombstones', stdout=StringIO())
+        self.assertEqual(list(Tombstone.objects.values_list('object_id', flat=True)), [deleted_meeting_id])
@@ -0,0 +1,108 @@
+from unittest.mock import patch
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from api.throttling import LocalBucketStore, get_store, parse_rate
+
+RATES = {'ip': '100/min', 'user': '100/min', 'auth': '2/min', 'bookings': '2/min', 'zoom': '5/min', 'zoom_global': '1/min'}
+
+
+class LocalBucketStoreTest(SimpleTestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('30/min'), (2, 30))
+        self.assertEqual(parse_rate('4/s'), (0.25, 4))
+
+    @patch('api.throttling.time.monotonic')
+    def test_burst_then_refill(self, monotonic):
+        store = LocalBucketStore()
+        monotonic.return_value = 1000
+        self.assertEqual([store.consume('a', 10, 3) for _ in range(3)], [0, 0, 0])
+        self.assertEqual(store.consume('a', 10, 3), 10)
+        self.assertEqual(store.consume('b', 10, 3), 0)
+        # One token comes back every interval
+        monotonic.return_value = 1004
+        self.assertEqual(store.consume('a', 10, 3), 6)
+        monotonic.return_value = 1010
+        self.assertEqual(store.consume('a', 10, 3), 0)
+        self.assertEqual(store.consume('a', 10, 3), 10)
+
+    @patch('api.throttling.time.monotonic', return_value=1000)
+    def test_full_buckets_are_pruned(self, monotonic):
+        store = LocalBucketStore()
+        store.max_keys = 2
+        store.consume('a', 1, 5)
+        store.consume('b', 1, 5)
+        monotonic.return_value = 1010
+        store.consume('c', 1, 5)
+        self.assertEqual(list(store._buckets), ['c'])
+
+
+@override_settings(
+    THROTTLE_STORE='api.throttling.LocalBucketStore',
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': RATES},
+)
+class ThrottledViewsTest(TestCase):
+    def setUp(self):
+        # Primary keys are reused once each test rolls back
+        get_store().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+
+    def test_auth_endpoints_share_a_bucket(self):
+        self.client.post(reverse('register'), {'username': 'new', 'password': 'new12345'})
+        self.client.post(reverse('token_obtain_pair'), {'username': 'testuser', 'password': '12345'})
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'testuser', 'password': '12345'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_forwarded_for_header_is_not_trusted(self):
+        for i in range(3):
+            response = self.client.post(
+                reverse('token_obtain_pair'), {'username': 'testuser', 'password': '12345'},
+                HTTP_X_FORWARDED_FOR=f'203.0.113.{i}',
+            )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_scope_limits_writes_only(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('booking_list_create')
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, {}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(url, {}).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        # Other users have buckets of their own
+        self.client.force_authenticate(user=User.objects.create_user(username='other'))
+        self.assertEqual(self.client.post(url, {}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_global_rate_is_shared_by_all_clients(self):
+        url = reverse('zoom_meeting_detail', kwargs={'pk': 999})
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(user=User.objects.create_user(username='other'))
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '60')
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {**RATES, 'user': '1/min'}})
+    def test_user_rate_covers_every_endpoint(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get(reverse('booking_list_create')).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse('sync')).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    async def test_async_views(self):
+        user = await User.objects.acreate(username='async')
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+        for _ in range(2):
+            response = await self.async_client.post(
+                reverse('async_booking_create'), {}, content_type='application/json', headers=headers
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = await self.async_client.post(
+            reverse('async_booking_create'), {}, content_type='application/json', headers=headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
@@ -1,14 +1,29 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
 from unittest.mock import patch
-from api.models import ZoomMeeting, Booking
-from api.utils import send_booking_confirmation, send_booking_cancellation
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from api.models import ZoomMeeting, Booking, EmailOutbox
+from api.utils import (
+    send_booking_confirmation, send_booking_cancellation, send_booking_cancellations,
+    send_bulk_emails, process_outbox_batch
+)
+
+
+class FailingEmailBackend(EmailBackend):
+    """
+    In-memory backend that rejects messages addressed to `bad@example.com`.
+    """
+    def send_messages(self, messages):
+        if any('bad@example.com' in message.to for message in messages):
+            raise OSError('recipient refused')
+        return super().send_messages(messages)
 
 class UtilsTests(TestCase):
     def setUp(self):
-        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='12345')
         self.zoom_meeting = ZoomMeeting.objects.create(
             user=self.user,
             meeting_id='123456789',
@@ -19,13 +34,77 @@ class UtilsTests(TestCase):
         self.booking = Booking.objects.create(user=self.user, zoom_meeting=self.zoom_meeting)
 
     def test_send_booking_confirmation(self):
-        # Mock the email sending function and test it's called with correct parameters
-        with patch('api.utils.send_mail') as mock_send_mail:
-            send_booking_confirmation(self.user.email, self.booking)
-            mock_send_mail.assert_called_once()
+        # The email is queued in the outbox instead of being sent in the request
+        send_booking_confirmation(self.user.email, self.booking)
+        self.assertEqual(len(mail.outbox), 0)
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.subject, 'Booking Confirmation')
+        self.assertEqual(email.recipient, self.user.email)
+        self.assertEqual(email.status, EmailOutbox.STATUS_PENDING)
 
     def test_send_booking_cancellation(self):
-        # Mock the email sending function and test it's called with correct parameters
-        with patch('api.utils.send_mail') as mock_send_mail:
-            send_booking_cancellation(self.user.email, self.booking)
-            mock_send_mail.assert_called_once()
\ No newline at end of file
+        send_booking_cancellation(self.user.email, self.booking)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailOutbox.objects.get().subject, 'Booking Cancellation')
+
+    def test_process_outbox_batch_sends_due_emails(self):
+        send_booking_confirmation(self.user.email, self.booking)
+        sent, failed = process_outbox_batch()
+        self.assertEqual((sent, failed), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.status, EmailOutbox.STATUS_SENT)
+        self.assertIsNotNone(email.sent_at)
+
+    def test_process_outbox_batch_retries_with_backoff(self):
+        send_booking_confirmation(self.user.email, self.booking)
+        with patch('api.utils.get_connection', side_effect=OSError('smtp down')):
+            sent, failed = process_outbox_batch()
+        self.assertEqual((sent, failed), (0, 1))
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.status, EmailOutbox.STATUS_PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, 'smtp down')
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        # Not due yet, so the next run leaves it alone
+        self.assertEqual(process_outbox_batch(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_process_outbox_batch_dead_letters_after_max_attempts(self):
+        send_booking_confirmation(self.user.email, self.booking)
+        with patch('api.utils.get_connection', side_effect=OSError('smtp down')):
+            process_outbox_batch()
+            EmailOutbox.objects.update(next_attempt_at=timezone.now())
+            process_outbox_batch()
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.status, EmailOutbox.STATUS_DEAD)
+        self.assertEqual(email.attempts, 2)
+
+    def test_send_booking_cancellations_queues_one_email_per_booking(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='12345')
+        Booking.objects.create(user=other, zoom_meeting=self.zoom_meeting)
+        send_booking_cancellations(self.zoom_meeting, self.zoom_meeting.bookings.all())
+        self.assertEqual(
+            set(EmailOutbox.objects.values_list('recipient', flat=True)),
+            {'test@example.com', 'other@example.com'}
+        )
+
+    @override_settings(EMAIL_BACKEND='api.tests.tests_utils.FailingEmailBackend')
+    def test_send_bulk_emails_reports_per_recipient_results(self):
+        messages = [
+            ('Subject', 'Body', 'from@example.com', f'user{i}@example.com') for i in range(5)
+        ]
+        messages.insert(2, ('Subject', 'Body', 'from@example.com', 'bad@example.com'))
+        results = send_bulk_emails(messages, chunk_size=2, max_workers=2)
+        self.assertEqual([result.recipient for result in results], [m[3] for m in messages])
+        self.assertEqual([result.sent for result in results], [True, True, False, True, True, True])
+        self.assertEqual(results[2].error, 'recipient refused')
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_send_bulk_emails_reuses_connection_per_chunk(self):
+        messages = [('Subject', 'Body', 'from@example.com', f'user{i}@example.com') for i in range(6)]
+        with patch('api.utils.get_connection', wraps=mail.get_connection) as mock_get_connection:
+            send_bulk_emails(messages, chunk_size=3, max_workers=2)
+        self.assertEqual(mock_get_connection.call_count, 2)
@@ -1,11 +1,19 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.db import IntegrityError, connection
 from django.contrib.auth.models import User
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
-from api.models import ZoomMeeting, Booking
+from rest_framework_simplejwt.tokens import AccessToken
+from api.cache import _future_meetings_key, get_future_meetings_version
+from api.models import ZoomMeeting, Booking, EmailOutbox
+from api.tests.fake_zoom import FakeZoomServer
+from api.zoom_utils import get_gateway
 from django.utils import timezone
 from datetime import timedelta
+from unittest.mock import patch
 
 class RegisterViewTest(TestCase):
     def setUp(self):
@@ -50,7 +58,7 @@ class BookingListCreateViewTest(TestCase):
         Booking.objects.create(user=self.user, zoom_meeting=self.zoom_meeting)
         response = self.client.get(self.booking_list_create_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_create_booking(self):
         self.client.force_authenticate(user=self.user)
@@ -60,6 +68,49 @@ class BookingListCreateViewTest(TestCase):
         #print(f"Response Data: {response.data}")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(EmailOutbox.objects.filter(subject='Booking Confirmation').count(), 1)
+
+    def test_create_booking_takes_a_seat(self):
+        response = self.client.post(self.booking_list_create_url, {'zoom_meeting_id': self.zoom_meeting.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.zoom_meeting.refresh_from_db()
+        self.assertEqual(self.zoom_meeting.booked_count, 1)
+
+    def test_create_booking_when_meeting_is_full(self):
+        self.zoom_meeting.capacity = 0
+        self.zoom_meeting.save()
+        response = self.client.post(self.booking_list_create_url, {'zoom_meeting_id': self.zoom_meeting.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Booking.objects.count(), 0)
+
+    def test_create_duplicate_booking_releases_seat(self):
+        # Simulates a concurrent duplicate that passes validate() and hits the unique constraint
+        Booking.objects.create(user=self.user, zoom_meeting=self.zoom_meeting)
+        with patch('api.serializers.BookingSerializer.validate', side_effect=lambda data: data):
+            response = self.client.post(self.booking_list_create_url, {'zoom_meeting_id': self.zoom_meeting.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.zoom_meeting.refresh_from_db()
+        self.assertEqual(self.zoom_meeting.booked_count, 0)
+
+    def test_create_overlapping_booking(self):
+        host = User.objects.create_user(username='host', password='12345')
+        start = self.zoom_meeting.start_time
+        overlapping = ZoomMeeting.objects.create(
+            user=host, meeting_id='overlapping', topic='Overlapping',
+            start_time=start + timedelta(minutes=30), end_time=start + timedelta(minutes=90)
+        )
+        adjacent = ZoomMeeting.objects.create(
+            user=host, meeting_id='adjacent', topic='Adjacent',
+            start_time=self.zoom_meeting.end_time, end_time=self.zoom_meeting.end_time + timedelta(hours=1)
+        )
+        self.client.post(self.booking_list_create_url, {'zoom_meeting_id': self.zoom_meeting.id})
+        response = self.client.post(self.booking_list_create_url, {'zoom_meeting_id': overlapping.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('overlaps', str(response.data))
+        response = self.client.post(self.booking_list_create_url, {'zoom_meeting_id': adjacent.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        booking = Booking.objects.get(pk=response.data['id'])
+        self.assertEqual((booking.start_time, booking.end_time), (adjacent.start_time, adjacent.end_time))
 
     def test_create_booking_invalid_data(self):
         data = {'zoom_meeting': 9999}  # Non-existent meeting ID
@@ -105,12 +156,17 @@ class BookingRetrieveUpdateDestroyViewTest(TestCase):
 
 
     def test_delete_booking(self):
+        ZoomMeeting.objects.filter(pk=self.zoom_meeting.pk).update(booked_count=1)
         response = self.client.delete(self.booking_detail_url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Booking.objects.count(), 0)
+        self.assertEqual(EmailOutbox.objects.filter(subject='Booking Cancellation').count(), 1)
+        self.zoom_meeting.refresh_from_db()
+        self.assertEqual(self.zoom_meeting.booked_count, 0)
 
 class AvailableSlotsViewTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = User.objects.create_user(username='testuser', password='12345')
         self.client.force_authenticate(user=self.user)
@@ -133,14 +189,14 @@ class AvailableSlotsViewTest(TestCase):
     def test_list_available_slots(self):
         response = self.client.get(self.available_slots_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test_booked_slot_not_listed(self):
         Booking.objects.create(user=self.user, zoom_meeting=self.zoom_meeting1)
         response = self.client.get(self.available_slots_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['id'], self.zoom_meeting2.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['id'], self.zoom_meeting2.id)
 
     def test_past_meetings_not_listed(self):
         past_meeting = ZoomMeeting.objects.create(
@@ -152,9 +208,461 @@ class AvailableSlotsViewTest(TestCase):
         )
         response = self.client.get(self.available_slots_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        self.assertNotIn(past_meeting.id, [meeting['id'] for meeting in response.data])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertNotIn(past_meeting.id, [meeting['id'] for meeting in response.data['results']])
+
+    def test_full_meetings_not_listed(self):
+        self.zoom_meeting1.capacity = 0
+        self.zoom_meeting1.save()
+        response = self.client.get(self.available_slots_url)
+        self.assertEqual([meeting['id'] for meeting in response.data['results']], [self.zoom_meeting2.id])
 
     def test_unauthenticated_user_can_access(self):
         response = self.client.get(self.available_slots_url)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_anonymous_user_sees_all_slots(self):
+        self.client.force_authenticate(user=None)
+        Booking.objects.create(user=self.user, zoom_meeting=self.zoom_meeting1)
+        response = self.client.get(self.available_slots_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_cached_slots_follow_new_meetings_and_bookings(self):
+        self.client.get(self.available_slots_url)
+        new_meeting = ZoomMeeting.objects.create(
+            user=self.user,
+            meeting_id='555666777',
+            topic='Test Meeting 3',
+            start_time=timezone.now() + timedelta(days=3),
+            end_time=timezone.now() + timedelta(days=3, hours=1)
+        )
+        response = self.client.get(self.available_slots_url)
+        self.assertIn(new_meeting.id, [meeting['id'] for meeting in response.data['results']])
+        Booking.objects.create(user=self.user, zoom_meeting=new_meeting)
+        response = self.client.get(self.available_slots_url)
+        self.assertNotIn(new_meeting.id, [meeting['id'] for meeting in response.data['results']])
+
+    def test_repeated_requests_skip_the_database(self):
+        self.client.get(self.available_slots_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.available_slots_url)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_cache_stats_require_staff(self):
+        response = self.client.get(reverse('slots_cache_stats'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(self.available_slots_url)
+        response = self.client.get(reverse('slots_cache_stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('future_hit_ratio', response.data)
+
+class ZoomMeetingViewsTest(TestCase):
+    def setUp(self):
+        self.server = FakeZoomServer().start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(**self.server.settings)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', email='host@example.com', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.data = {
+            'topic': 'Office Hours',
+            'start_time': timezone.now() + timedelta(days=1),
+            'end_time': timezone.now() + timedelta(days=1, minutes=45),
+        }
+
+    def test_create_meeting(self):
+        response = self.client.post(reverse('zoom_meeting_list_create'), self.data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        meeting = ZoomMeeting.objects.get()
+        self.assertIn(int(meeting.meeting_id), self.server.meetings)
+        self.assertEqual(self.server.meetings[int(meeting.meeting_id)]['duration'], 45)
+
+    @override_settings(ZOOM_CIRCUIT_FAILURE_THRESHOLD=1, ZOOM_MAX_RETRIES=0)
+    def test_create_meeting_when_zoom_is_down(self):
+        get_gateway().get_access_token()
+        self.server.responses = [503]
+        response = self.client.post(reverse('zoom_meeting_list_create'), self.data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # The breaker is now open, so the next call fails fast without reaching Zoom
+        response = self.client.post(reverse('zoom_meeting_list_create'), self.data)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(self.server.requests['POST /v2/users/me/meetings'], 1)
+        self.assertEqual(ZoomMeeting.objects.count(), 0)
+
+    def test_create_overlapping_meeting(self):
+        self.client.post(reverse('zoom_meeting_list_create'), self.data)
+        data = dict(self.data, start_time=self.data['start_time'] + timedelta(minutes=30), end_time=self.data['end_time'] + timedelta(hours=1))
+        response = self.client.post(reverse('zoom_meeting_list_create'), data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Office Hours', str(response.data))
+        # The conflict is caught before the meeting is created on Zoom
+        self.assertEqual(self.server.requests['POST /v2/users/me/meetings'], 1)
+        # Other hosts can still use the slot
+        other = User.objects.create_user(username='other', email='other@example.com', password='12345')
+        self.client.force_authenticate(user=other)
+        response = self.client.post(reverse('zoom_meeting_list_create'), data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_create_meeting_ending_before_start(self):
+        data = dict(self.data, end_time=self.data['start_time'] - timedelta(minutes=1))
+        response = self.client.post(reverse('zoom_meeting_list_create'), data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.server.meetings)
+
+    def test_delete_meeting_cancels_bookings(self):
+        self.client.post(reverse('zoom_meeting_list_create'), self.data)
+        meeting = ZoomMeeting.objects.get()
+        attendee = User.objects.create_user(username='attendee', email='attendee@example.com', password='12345')
+        Booking.objects.create(user=attendee, zoom_meeting=meeting)
+        response = self.client.delete(reverse('zoom_meeting_detail', kwargs={'pk': meeting.pk}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(ZoomMeeting.objects.count(), 0)
+        self.assertEqual(
+            EmailOutbox.objects.get(subject='Booking Cancellation').recipient, 'attendee@example.com'
+        )
+
+class CursorPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+        start = timezone.now() + timedelta(days=1)
+        # Pairs of meetings share a start time to exercise the `id` tie-breaker
+        self.meetings = [
+            ZoomMeeting.objects.create(
+                user=self.user,
+                meeting_id=str(i),
+                topic=f'Meeting {i}',
+                start_time=start + timedelta(hours=i // 2),
+                end_time=start + timedelta(hours=i // 2, minutes=30)
+            )
+            for i in range(7)
+        ]
+
+    def collect_pages(self, url, direction='next'):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            page = [meeting['id'] for meeting in response.data['results']]
+            ids = ids + page if direction == 'next' else page + ids
+            url = response.data[direction]
+        return ids, response
+
+    def test_pages_follow_start_time_then_id(self):
+        ids, _ = self.collect_pages(reverse('available_slots') + '?page_size=2')
+        self.assertEqual(ids, [meeting.id for meeting in self.meetings])
+
+    def test_previous_links_walk_back(self):
+        url = reverse('zoom_meeting_list_create') + '?page_size=3'
+        _, last = self.collect_pages(url)
+        ids, _ = self.collect_pages(last.data['previous'], direction='previous')
+        self.assertEqual(ids, [meeting.id for meeting in self.meetings[:6]])
+
+    def test_slots_previous_links_skip_booked_meetings(self):
+        Booking.objects.create(user=self.user, zoom_meeting=self.meetings[1])
+        url = reverse('available_slots') + '?page_size=2'
+        ids, last = self.collect_pages(url)
+        self.assertNotIn(self.meetings[1].id, ids)
+        ids, _ = self.collect_pages(last.data['previous'], direction='previous')
+        # The last page holds meetings 6 and 7, so walking back yields everything before it
+        self.assertEqual(ids, [meeting.id for meeting in self.meetings[:5] if meeting != self.meetings[1]])
+
+    @override_settings(SLOTS_CACHE_WINDOW=2)
+    def test_slots_pages_span_cache_windows(self):
+        Booking.objects.create(user=self.user, zoom_meeting=self.meetings[1])
+        Booking.objects.create(user=self.user, zoom_meeting=self.meetings[2])
+        url = reverse('available_slots') + '?page_size=2'
+        ids, last = self.collect_pages(url)
+        expected = [meeting.id for meeting in self.meetings if meeting not in self.meetings[1:3]]
+        self.assertEqual(ids, expected)
+        ids, _ = self.collect_pages(last.data['previous'], direction='previous')
+        self.assertEqual(ids, expected[:-1])
+        # Every page reads a window or two, whatever the length of the feed
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    @override_settings(SLOTS_CACHE_LOCK_TIMEOUT=0.05)
+    def test_slots_recompute_when_the_lock_holder_stalls(self):
+        key = _future_meetings_key(get_future_meetings_version(), None, False)
+        cache.add(f'{key}:lock', 'stalled', 60)
+        response = self.client.get(reverse('available_slots'))
+        self.assertEqual(len(response.data['results']), 7)
+
+    def test_ordering_parameter_is_respected(self):
+        ids, _ = self.collect_pages(reverse('zoom_meeting_list_create') + '?page_size=2&ordering=-start_time')
+        expected = sorted(self.meetings, key=lambda m: (m.start_time, m.id), reverse=True)
+        self.assertEqual(ids, [meeting.id for meeting in expected])
+
+    def test_booking_list_pages_on_related_start_time(self):
+        for meeting in reversed(self.meetings):
+            Booking.objects.create(user=self.user, zoom_meeting=meeting)
+        response = self.client.get(reverse('booking_list_create') + '?page_size=4')
+        ids = [booking['zoom_meeting']['id'] for booking in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ids += [booking['zoom_meeting']['id'] for booking in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        # Ties on start time fall back to the booking id, which runs opposite to the meeting id here
+        expected = sorted(self.meetings, key=lambda m: (m.start_time, -m.id))
+        self.assertEqual(ids, [meeting.id for meeting in expected])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('available_slots') + '?cursor=garbage')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class QueryCountTest(TestCase):
+    """
+    Guards against N+1 queries: listing more rows must not issue more queries.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.host = User.objects.create_user(username='host', password='12345')
+
+    def create_rows(self, count):
+        start = timezone.now() + timedelta(days=1)
+        for i in range(count):
+            ZoomMeeting.objects.create(
+                user=self.user,
+                meeting_id=f'{count}-{i}',
+                topic=f'Meeting {i}',
+                start_time=start + timedelta(hours=i),
+                end_time=start + timedelta(hours=i, minutes=30)
+            )
+            hosted = ZoomMeeting.objects.create(
+                user=self.host,
+                meeting_id=f'{count}-{i}-hosted',
+                topic=f'Hosted {i}',
+                start_time=start + timedelta(hours=i),
+                end_time=start + timedelta(hours=i, minutes=30)
+            )
+            Booking.objects.create(user=self.user, zoom_meeting=hosted)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries), len(response.data['results'])
+
+    def assert_constant_queries(self, url):
+        self.create_rows(1)
+        small_queries, small_rows = self.count_queries(url)
+        self.create_rows(5)
+        large_queries, large_rows = self.count_queries(url)
+        self.assertGreater(large_rows, small_rows)
+        self.assertEqual(small_queries, large_queries)
+
+    def test_booking_list_query_count(self):
+        self.assert_constant_queries(reverse('booking_list_create'))
+
+    def test_booking_list_with_search_query_count(self):
+        self.assert_constant_queries(reverse('booking_list_create') + '?search=Hosted')
+
+    def test_zoom_meeting_list_query_count(self):
+        self.assert_constant_queries(reverse('zoom_meeting_list_create'))
+
+    def test_available_slots_query_count(self):
+        self.assert_constant_queries(reverse('available_slots'))
+
+
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        self.server = FakeZoomServer().start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(**self.server.settings)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='host@example.com', password='12345')
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.meeting = ZoomMeeting.objects.create(
+            user=self.user, meeting_id='123456', topic='Test Meeting',
+            start_time=timezone.now() + timedelta(days=1), end_time=timezone.now() + timedelta(days=1, hours=1)
+        )
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.post(reverse('async_booking_create'), {'zoom_meeting_id': self.meeting.pk}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_available_slots(self):
+        response = await self.async_client.get(reverse('async_available_slots'), headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([slot['id'] for slot in response.json()['results']], [self.meeting.pk])
+
+    async def test_create_and_cancel_booking(self):
+        response = await self.async_client.post(
+            reverse('async_booking_create'), {'zoom_meeting_id': self.meeting.pk}, content_type='application/json', headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        booking = await Booking.objects.aget()
+        await self.meeting.arefresh_from_db()
+        self.assertEqual(self.meeting.booked_count, 1)
+
+        response = await self.async_client.get(reverse('async_available_slots'), headers=self.headers)
+        self.assertEqual(response.json()['results'], [])
+
+        response = await self.async_client.delete(reverse('async_booking_cancel', kwargs={'pk': booking.pk}), headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await Booking.objects.aexists())
+        await self.meeting.arefresh_from_db()
+        self.assertEqual(self.meeting.booked_count, 0)
+
+    async def test_duplicate_booking(self):
+        await Booking.objects.acreate(user=self.user, zoom_meeting=self.meeting)
+        response = await self.async_client.post(
+            reverse('async_booking_create'), {'zoom_meeting_id': self.meeting.pk}, content_type='application/json', headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_create_and_delete_meeting(self):
+        data = {
+            'topic': 'Office Hours',
+            'start_time': (timezone.now() + timedelta(days=2)).isoformat(),
+            'end_time': (timezone.now() + timedelta(days=2, minutes=30)).isoformat(),
+        }
+        response = await self.async_client.post(reverse('async_zoom_meeting_create'), data, content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        meeting = await ZoomMeeting.objects.aget(pk=response.json()['id'])
+        self.assertEqual(self.server.meetings[int(meeting.meeting_id)]['duration'], 30)
+
+        response = await self.async_client.delete(reverse('async_zoom_meeting_delete', kwargs={'pk': meeting.pk}), headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(self.server.meetings)
+        self.assertFalse(await ZoomMeeting.objects.filter(pk=meeting.pk).aexists())
+
+
+class BulkBookingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.host = User.objects.create_user(username='host', email='host@example.com', password='12345')
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='12345')
+        self.staff = User.objects.create_user(username='staff', email='staff@example.com', password='12345', is_staff=True)
+        self.team = [
+            User.objects.create_user(username=f'member{i}', email=f'member{i}@example.com', password='12345')
+            for i in range(3)
+        ]
+        start = timezone.now() + timedelta(days=1)
+        self.meetings = [
+            ZoomMeeting.objects.create(
+                user=self.host, meeting_id=f'bulk-{i}', topic=f'Meeting {i}', capacity=2,
+                start_time=start + timedelta(hours=i), end_time=start + timedelta(hours=i, minutes=30)
+            )
+            for i in range(2)
+        ]
+
+    def test_bulk_book_meetings(self):
+        self.client.force_authenticate(user=self.user)
+        Booking.objects.create(user=self.user, zoom_meeting=self.meetings[0])
+        response = self.client.post(
+            reverse('booking_bulk_create'), {'zoom_meeting_ids': [m.pk for m in self.meetings] + [999]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['already_booked', 'booked', 'meeting_not_found'])
+        booking = Booking.objects.get(user=self.user, zoom_meeting=self.meetings[1])
+        self.assertEqual(response.data['results'][1]['booking_id'], booking.pk)
+        self.assertEqual(EmailOutbox.objects.filter(recipient='test@example.com').count(), 1)
+
+    def test_bulk_booking_race_keeps_seats(self):
+        self.client.force_authenticate(user=self.user)
+        # A single booking committed between the checks and the insert trips the overlap constraint
+        with patch.object(Booking.objects, 'bulk_create', side_effect=IntegrityError('booking_no_overlap')):
+            response = self.client.post(
+                reverse('booking_bulk_create'), {'zoom_meeting_ids': [m.pk for m in self.meetings]}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([m.booked_count for m in ZoomMeeting.objects.filter(pk__in=[m.pk for m in self.meetings])], [0, 0])
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_only_staff_can_book_for_others(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse('booking_bulk_create'), {'zoom_meeting_ids': [self.meetings[0].pk], 'user_ids': [self.team[0].pk]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_staff_books_team_up_to_capacity(self):
+        self.client.force_authenticate(user=self.staff)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                reverse('booking_bulk_create'),
+                {'zoom_meeting_ids': [m.pk for m in self.meetings], 'user_ids': [u.pk for u in self.team]},
+                format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['booked', 'booked', 'fully_booked'] * 2)
+        self.assertEqual(Booking.objects.count(), 4)
+        for meeting in self.meetings:
+            meeting.refresh_from_db()
+            self.assertEqual(meeting.booked_count, 2)
+        self.assertEqual(EmailOutbox.objects.count(), 4)
+        # The number of queries does not grow with the number of bookings
+        self.assertLessEqual(len(context.captured_queries), 12)
+
+    def test_bulk_book_overlapping_meetings(self):
+        start = self.meetings[1].start_time
+        overlapping = ZoomMeeting.objects.create(
+            user=self.staff, meeting_id='bulk-overlapping', topic='Overlapping',
+            start_time=start + timedelta(minutes=15), end_time=start + timedelta(minutes=45)
+        )
+        Booking.objects.create(user=self.user, zoom_meeting=self.meetings[0])
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse('booking_bulk_create'), {'zoom_meeting_ids': [self.meetings[1].pk, overlapping.pk]}, format='json'
+        )
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['booked', 'time_conflict'])
+        booking = Booking.objects.get(pk=response.data['results'][0]['booking_id'])
+        self.assertEqual(booking.start_time, self.meetings[1].start_time)
+
+    @override_settings(BOOKING_BULK_MAX_ITEMS=2)
+    def test_bulk_size_limit(self):
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.post(
+            reverse('booking_bulk_create'),
+            {'zoom_meeting_ids': [self.meetings[0].pk], 'user_ids': [u.pk for u in self.team]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_booking_refreshes_available_slots(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(len(self.client.get(reverse('available_slots')).data['results']), 2)
+        self.client.post(reverse('booking_bulk_create'), {'zoom_meeting_ids': [self.meetings[0].pk]}, format='json')
+        response = self.client.get(reverse('available_slots'))
+        self.assertEqual([slot['id'] for slot in response.data['results']], [self.meetings[1].pk])
+
+    def test_bulk_cancel(self):
+        own = Booking.objects.create(user=self.user, zoom_meeting=self.meetings[0])
+        others = Booking.objects.create(user=self.team[0], zoom_meeting=self.meetings[0])
+        ZoomMeeting.reserve_seats({self.meetings[0].pk: 2})
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse('booking_bulk_cancel'), {'booking_ids': [own.pk, others.pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data['results']], ['cancelled', 'not_found'])
+        self.assertEqual(list(Booking.objects.all()), [others])
+        self.meetings[0].refresh_from_db()
+        self.assertEqual(self.meetings[0].booked_count, 1)
+        self.assertEqual(EmailOutbox.objects.filter(subject='Booking Cancellation').count(), 1)
+
+    def test_staff_bulk_cancel(self):
+        bookings = [Booking.objects.create(user=member, zoom_meeting=self.meetings[1]) for member in self.team[:2]]
+        ZoomMeeting.reserve_seats({self.meetings[1].pk: 2})
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.post(reverse('booking_bulk_cancel'), {'booking_ids': [b.pk for b in bookings]}, format='json')
+        self.assertEqual([result['status'] for result in response.data['results']], ['cancelled', 'cancelled'])
+        self.assertFalse(Booking.objects.exists())
+        self.meetings[1].refresh_from_db()
+        self.assertEqual(self.meetings[1].booked_count, 0)
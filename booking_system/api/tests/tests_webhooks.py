@@ -0,0 +1,207 @@
+import json
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from api.models import Booking, EmailOutbox, MeetingSeries, ZoomMeeting, ZoomWebhookEvent
+from api.webhooks import claim_webhook_batch, process_webhook_batch, sign
+
+SECRET = 'webhook-secret'
+
+
+@override_settings(ZOOM_WEBHOOK_SECRET_TOKEN=SECRET)
+class ZoomWebhookTest(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username='host', email='host@example.com', password='12345')
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='12345')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='12345')
+        self.start = (timezone.now() + timedelta(days=1)).replace(microsecond=0)
+        self.meeting = self.create_meeting('123', self.start)
+        for user in (self.user, self.other):
+            Booking.objects.create(user=user, zoom_meeting=self.meeting)
+        ZoomMeeting.objects.filter(pk=self.meeting.pk).update(booked_count=2)
+
+    def create_meeting(self, meeting_id, start, user=None, **kwargs):
+        return ZoomMeeting.objects.create(
+            user=user or self.host, meeting_id=meeting_id, topic='Planning',
+            start_time=start, end_time=start + timedelta(hours=1), **kwargs,
+        )
+
+    def deliver(self, event, payload, timestamp=None, secret=SECRET, **fields):
+        body = json.dumps({'event': event, 'event_ts': int(time.time() * 1000), 'payload': payload, **fields}).encode()
+        timestamp = str(timestamp or int(time.time()))
+        return self.client.post(
+            reverse('zoom_webhook'), body, content_type='application/json',
+            headers={
+                'x-zm-request-timestamp': timestamp,
+                'x-zm-signature': 'v0=' + sign(secret, b'v0:' + timestamp.encode() + b':' + body),
+            },
+        )
+
+    def test_rejects_unsigned_and_stale_deliveries(self):
+        payload = {'object': {'id': 123}}
+        self.assertEqual(self.deliver('meeting.deleted', payload, secret='wrong').status_code, status.HTTP_401_UNAUTHORIZED)
+        stale = int(time.time()) - 600
+        self.assertEqual(self.deliver('meeting.deleted', payload, timestamp=stale).status_code, status.HTTP_401_UNAUTHORIZED)
+        with override_settings(ZOOM_WEBHOOK_SECRET_TOKEN=None):
+            self.assertEqual(self.deliver('meeting.deleted', payload).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(ZoomWebhookEvent.objects.exists())
+
+    def test_url_validation(self):
+        response = self.deliver('endpoint.url_validation', {'plainToken': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'plainToken': 'abc', 'encryptedToken': sign(SECRET, b'abc')})
+
+    def test_rejects_malformed_deliveries(self):
+        for event, payload, fields in [
+            ('endpoint.url_validation', {}, {}),
+            ('endpoint.url_validation', {'plainToken': 123}, {}),
+            ('meeting.deleted', {'object': {'id': 123}}, {'event_ts': 'yesterday'}),
+            ('meeting.deleted', {'object': {'id': 123}}, {'event_ts': 1.5}),
+            ('meeting.deleted', {'object': {'id': 123}}, {'event_ts': 2 ** 64}),
+            ('meeting.deleted', ['not', 'an', 'object'], {}),
+            (['meeting.deleted'], {'object': {'id': 123}}, {}),
+            ('meeting.deleted', {'object': {}}, {}),
+        ]:
+            response = self.deliver(event, payload, **fields)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, (event, payload, fields))
+            self.assertEqual(response.json(), {'detail': 'Invalid payload.'})
+        self.assertFalse(ZoomWebhookEvent.objects.exists())
+
+    def test_queues_events_without_applying_them(self):
+        with self.assertNumQueries(1):
+            response = self.deliver('meeting.deleted', {'object': {'id': 123}})
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.deliver('meeting.started', {'object': {'id': 123}}).status_code, status.HTTP_204_NO_CONTENT)
+        event = ZoomWebhookEvent.objects.get()
+        self.assertEqual((event.event, event.status), ('meeting.deleted', ZoomWebhookEvent.STATUS_PENDING))
+        self.assertTrue(ZoomMeeting.objects.filter(pk=self.meeting.pk).exists())
+
+    def test_time_change_moves_bookings(self):
+        # The other attendee is already booked at the new time, in another host's meeting
+        clash = self.create_meeting('456', self.start + timedelta(hours=3), user=self.user)
+        Booking.objects.create(user=self.other, zoom_meeting=clash)
+        new_start = self.start + timedelta(hours=2, minutes=30)
+        self.deliver('meeting.updated', {'object': {
+            'id': 123, 'topic': 'Quarterly planning', 'start_time': new_start.isoformat(), 'duration': 90,
+        }})
+        self.assertEqual(process_webhook_batch(), (1, 0))
+        self.meeting.refresh_from_db()
+        self.assertEqual(
+            (self.meeting.topic, self.meeting.start_time, self.meeting.end_time, self.meeting.booked_count),
+            ('Quarterly planning', new_start, new_start + timedelta(minutes=90), 1),
+        )
+        booking = Booking.objects.get(zoom_meeting=self.meeting)
+        self.assertEqual((booking.user, booking.start_time, booking.end_time), (self.user, new_start, self.meeting.end_time))
+        self.assertEqual(EmailOutbox.objects.get(subject='Booking Cancellation').recipient, 'other@example.com')
+        self.assertEqual(ZoomWebhookEvent.objects.get().status, ZoomWebhookEvent.STATUS_PROCESSED)
+
+    def test_deletion_cancels_bookings(self):
+        series = MeetingSeries.objects.create(
+            user=self.host, meeting_id='789', topic='Standup', start_time=self.start,
+            end_time=self.start + timedelta(minutes=15), rrule='FREQ=DAILY;COUNT=3', expanded_until=self.start,
+        )
+        first, second = [
+            self.create_meeting('789', self.start + timedelta(days=days), series=series, occurrence_id=str(days))
+            for days in (2, 3)
+        ]
+        Booking.objects.create(user=self.user, zoom_meeting=second)
+        self.deliver('meeting.deleted', {'object': {'id': 789, 'occurrences': [{'occurrence_id': '3'}]}})
+        self.deliver('meeting.deleted', {'object': {'id': 123}})
+        out = StringIO()
+        call_command('process_zoom_webhooks', '--once', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Processed 2 event(s), 0 failed.')
+        self.assertEqual(list(ZoomMeeting.objects.all()), [first])
+        self.assertTrue(MeetingSeries.objects.exists())
+        self.assertEqual(
+            sorted(EmailOutbox.objects.values_list('recipient', flat=True)),
+            ['other@example.com', 'test@example.com', 'test@example.com'],
+        )
+
+    def test_deletion_keeps_started_meetings(self):
+        series = MeetingSeries.objects.create(
+            user=self.host, meeting_id='789', topic='Standup', start_time=self.start,
+            end_time=self.start + timedelta(minutes=15), rrule='FREQ=DAILY;COUNT=3', expanded_until=self.start,
+        )
+        started = self.create_meeting('789', timezone.now() - timedelta(minutes=5), series=series, occurrence_id='1')
+        self.create_meeting('789', self.start + timedelta(days=1), series=series, occurrence_id='2')
+        Booking.objects.create(user=self.user, zoom_meeting=started)
+        self.deliver('meeting.deleted', {'object': {'id': 789}})
+        self.assertEqual(process_webhook_batch(), (1, 0))
+        self.assertEqual(list(ZoomMeeting.objects.filter(meeting_id='789').values_list('pk', 'series')), [(started.pk, None)])
+        self.assertTrue(Booking.objects.filter(zoom_meeting=started).exists())
+        self.assertFalse(MeetingSeries.objects.exists())
+        self.assertFalse(EmailOutbox.objects.filter(subject='Booking Cancellation').exists())
+
+    def test_conflicting_time_change_does_not_hold_back_the_meeting(self):
+        clash = self.create_meeting('456', self.start + timedelta(hours=3))
+        self.deliver('meeting.updated', {'object': {
+            'id': 123, 'start_time': (self.start + timedelta(hours=3, minutes=30)).isoformat(),
+        }})
+        self.deliver('meeting.deleted', {'object': {'id': 123}})
+        self.assertEqual(process_webhook_batch(), (1, 1))
+        conflict = ZoomWebhookEvent.objects.get(event='meeting.updated')
+        self.assertEqual(conflict.status, ZoomWebhookEvent.STATUS_SKIPPED)
+        self.assertIn(f'overlap meeting {clash.pk}', conflict.last_error)
+        self.assertEqual(list(ZoomMeeting.objects.all()), [clash])
+
+    @override_settings(ZOOM_WEBHOOK_MAX_ATTEMPTS=2)
+    def test_failed_events_hold_back_the_meeting(self):
+        self.deliver('meeting.updated', {'object': {'id': 123, 'start_time': 'not a time'}})
+        self.deliver('meeting.deleted', {'object': {'id': 123}})
+        self.assertEqual(process_webhook_batch(), (0, 1))
+        self.assertTrue(ZoomMeeting.objects.filter(pk=self.meeting.pk).exists())
+        self.assertEqual(process_webhook_batch(), (0, 1))
+        failed = ZoomWebhookEvent.objects.get(event='meeting.updated')
+        self.assertEqual((failed.status, failed.attempts), (ZoomWebhookEvent.STATUS_DEAD, 2))
+        # The dead event still holds back the deletion
+        self.assertEqual(process_webhook_batch(), (0, 0))
+        self.assertTrue(ZoomMeeting.objects.filter(pk=self.meeting.pk).exists())
+        failed.payload['object']['start_time'] = (self.start + timedelta(hours=2)).isoformat()
+        failed.save(update_fields=['payload'])
+        out = StringIO()
+        call_command('process_zoom_webhooks', '--retry-dead', '--once', stdout=out)
+        self.assertEqual(out.getvalue().split('\n')[:2], ['Requeued 1 dead event(s).', 'Processed 2 event(s), 0 failed.'])
+        self.assertFalse(ZoomMeeting.objects.filter(pk=self.meeting.pk).exists())
+
+    def test_older_events_are_skipped(self):
+        now = int(time.time() * 1000)
+        self.deliver('meeting.updated', {'object': {'id': 123, 'topic': 'Newest'}}, event_ts=now)
+        self.deliver('meeting.updated', {'object': {'id': 123, 'topic': 'Older'}}, event_ts=now - 1000)
+        self.assertEqual(process_webhook_batch(), (2, 0))
+        # A retry of an event older than the one applied arrives late
+        self.deliver('meeting.updated', {'object': {'id': 123, 'topic': 'Oldest'}}, event_ts=now - 2000)
+        self.assertEqual(process_webhook_batch(), (1, 0))
+        self.meeting.refresh_from_db()
+        self.assertEqual(self.meeting.topic, 'Newest')
+        self.assertEqual(
+            dict(ZoomWebhookEvent.objects.values_list('payload__object__topic', 'status')),
+            {'Oldest': ZoomWebhookEvent.STATUS_SKIPPED, 'Older': ZoomWebhookEvent.STATUS_PROCESSED,
+             'Newest': ZoomWebhookEvent.STATUS_PROCESSED},
+        )
+
+    def test_events_behind_another_workers_lock_wait(self):
+        self.create_meeting('456', self.start + timedelta(hours=3))
+        self.deliver('meeting.updated', {'object': {'id': 123, 'topic': 'First'}})
+        self.deliver('meeting.updated', {'object': {'id': 456, 'topic': 'Other'}})
+        self.deliver('meeting.updated', {'object': {'id': 123, 'topic': 'Second'}})
+        locked = ZoomWebhookEvent.objects.get(payload__object__topic='First')
+        # SQLite has no row locks; leave out the event another worker would hold
+        select_for_update = QuerySet.select_for_update
+        with mock.patch.object(
+            QuerySet, 'select_for_update', lambda qs, **kwargs: select_for_update(qs, **kwargs).exclude(pk=locked.pk),
+        ):
+            self.assertEqual([event.meeting_id for event in claim_webhook_batch(10)], ['456'])
+            self.assertEqual(process_webhook_batch(), (1, 0))
+        self.meeting.refresh_from_db()
+        self.assertEqual(self.meeting.topic, 'Planning')
+        self.assertEqual(process_webhook_batch(), (2, 0))
+        self.meeting.refresh_from_db()
+        self.assertEqual(self.meeting.topic, 'Second')
@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from api.tests.fake_zoom import FakeZoomServer
+from api.zoom_utils import (
+    CircuitBreaker, ZoomAPIError, ZoomGateway, ZoomUnavailableError,
+    create_zoom_meeting, delete_zoom_meeting, get_gateway, get_zoom_meeting, token_metrics
+)
+
+
+class ZoomGatewayTests(SimpleTestCase):
+    def setUp(self):
+        self.server = FakeZoomServer().start()
+        self.addCleanup(self.server.stop)
+        self.settings_override = override_settings(**self.server.settings)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_meeting_lifecycle(self):
+        start = datetime(2030, 1, 1, 10, 0, tzinfo=dt_timezone.utc)
+        meeting = create_zoom_meeting('Standup', start, 30)
+        self.assertEqual(meeting['start_time'], '2030-01-01T10:00:00Z')
+        self.assertEqual(get_zoom_meeting(meeting['id'])['topic'], 'Standup')
+        self.assertEqual(delete_zoom_meeting(meeting['id']), {'status': 204})
+        self.assertEqual(delete_zoom_meeting(meeting['id']), {'status': 404})
+
+    def test_token_and_connections_are_reused(self):
+        for _ in range(3):
+            create_zoom_meeting('Standup', '2030-01-01T10:00:00Z', 30)
+        self.assertEqual(self.server.tokens_issued, 1)
+
+    def test_async_clients_close_with_their_loop(self):
+        gateway = get_gateway()
+
+        async def get_clients():
+            return await gateway._get_async_client(), await gateway._get_async_client()
+
+        first, again = asyncio.run(get_clients())
+        self.assertIs(first, again)
+        self.assertTrue(first.is_closed)
+        second, _ = asyncio.run(get_clients())
+        self.assertIsNot(second, first)
+        self.assertTrue(second.is_closed)
+        self.assertFalse(gateway._async_clients)
+
+    def test_unexpected_errors_end_the_half_open_trial(self):
+        gateway = ZoomGateway.from_settings()
+        gateway.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+
+        async def cancelled(rejected_token=None):
+            raise asyncio.CancelledError()
+
+        for call, error in [
+            (lambda: gateway.request('GET', '/users/me'), KeyError),
+            (lambda: asyncio.run(gateway.arequest('GET', '/users/me')), asyncio.CancelledError),
+        ]:
+            gateway.breaker.record_failure()
+            time.sleep(0.06)
+            with mock.patch.object(gateway, 'get_access_token', side_effect=KeyError('access_token')), \
+                    mock.patch.object(gateway, 'aget_access_token', cancelled):
+                with self.assertRaises(error):
+                    call()
+            self.assertEqual(gateway.breaker.state, CircuitBreaker.OPEN)
+        time.sleep(0.06)
+        self.assertEqual(gateway.request('GET', '/meetings/1').status_code, 404)
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_expired_token_is_refreshed_once(self):
+        create_zoom_meeting('Standup', '2030-01-01T10:00:00Z', 30)
+        self.server.responses = [401]
+        create_zoom_meeting('Standup', '2030-01-01T10:00:00Z', 30)
+        self.assertEqual(self.server.tokens_issued, 2)
+
+    def test_idempotent_calls_are_retried(self):
+        meeting = create_zoom_meeting('Standup', '2030-01-01T10:00:00Z', 30)
+        self.server.responses = [503, 502]
+        self.assertEqual(get_zoom_meeting(meeting['id'])['id'], meeting['id'])
+
+    def test_create_is_not_retried_on_server_error(self):
+        get_gateway().get_access_token()
+        self.server.responses = [500]
+        with self.assertRaises(ZoomAPIError):
+            create_zoom_meeting('Standup', '2030-01-01T10:00:00Z', 30)
+        self.assertEqual(self.server.requests['POST /v2/users/me/meetings'], 1)
+
+    @override_settings(ZOOM_READ_TIMEOUT=0.1, ZOOM_MAX_RETRIES=0)
+    def test_slow_responses_time_out(self):
+        get_gateway().get_access_token()
+        self.server.delay = 1
+        started = time.monotonic()
+        with self.assertRaises(ZoomAPIError):
+            get_zoom_meeting(1)
+        self.assertLess(time.monotonic() - started, 0.9)
+
+    @override_settings(ZOOM_CIRCUIT_FAILURE_THRESHOLD=2, ZOOM_MAX_RETRIES=0)
+    def test_circuit_opens_after_repeated_failures(self):
+        get_gateway().get_access_token()
+        self.server.responses = [503, 503]
+        for _ in range(2):
+            with self.assertRaises(ZoomAPIError):
+                get_zoom_meeting(1)
+        with self.assertRaises(ZoomUnavailableError):
+            get_zoom_meeting(1)
+        self.assertEqual(self.server.requests['GET /v2/meetings/1'], 2)
+
+
+class ZoomTokenCacheTests(SimpleTestCase):
+    """
+    Each ZoomGateway instance stands in for a separate worker process sharing the cache.
+    """
+    def setUp(self):
+        self.server = FakeZoomServer().start()
+        self.addCleanup(self.server.stop)
+        self.settings_override = override_settings(**self.server.settings)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        token_metrics.reset()
+
+    def test_workers_share_one_token(self):
+        tokens = {ZoomGateway.from_settings().get_access_token() for _ in range(4)}
+        self.assertEqual(len(tokens), 1)
+        self.assertEqual(self.server.tokens_issued, 1)
+        self.assertEqual(token_metrics.snapshot()['fetches'], 1)
+        self.assertEqual(token_metrics.snapshot()['cache_hits'], 3)
+
+    def test_concurrent_refresh_is_single_flight(self):
+        self.server.delay = 0.2
+        gateways = [ZoomGateway.from_settings() for _ in range(8)]
+        tokens = []
+        threads = [threading.Thread(target=lambda g=g: tokens.append(g.get_access_token())) for g in gateways]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.server.tokens_issued, 1)
+        self.assertEqual(set(tokens), {'token-1'})
+        self.assertGreater(token_metrics.snapshot()['waits'], 0)
+
+    def test_rejected_token_is_replaced_once_for_all_workers(self):
+        first, second = ZoomGateway.from_settings(), ZoomGateway.from_settings()
+        stale = first.get_access_token()
+        second.get_access_token()
+        fresh = first.get_access_token(rejected_token=stale)
+        self.assertNotEqual(fresh, stale)
+        # The second worker picks up the refreshed token instead of fetching its own
+        self.assertEqual(second.get_access_token(rejected_token=stale), fresh)
+        self.assertEqual(self.server.tokens_issued, 2)
+
+    def test_expired_shared_token_is_refetched(self):
+        # Tokens are dropped a minute before Zoom expires them, leaving one second here
+        self.server.token_expires_in = 61
+        gateway = ZoomGateway.from_settings()
+        gateway.get_access_token()
+        time.sleep(1.1)
+        self.assertEqual(gateway.get_access_token(), 'token-2')
+        self.assertEqual(self.server.tokens_issued, 2)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_half_open_after_reset_timeout(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow_request())
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow_request())
+        # Only one trial call is let through while half-open
+        self.assertFalse(breaker.allow_request())
+        breaker.record_success()
+        self.assertTrue(breaker.allow_request())
@@ -0,0 +1,211 @@
+import threading
+import time
+from functools import lru_cache
+from types import SimpleNamespace
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from .metrics import throttle_store_errors, throttled_requests
+
+# Token-bucket rate limiting. A rate of "N/period" lets a client burst N
+# requests, then refills one token every period/N. Each bucket is stored as a
+# single timestamp, the moment it will be full again (the generic cell rate
+# algorithm), so a check is one atomic read-modify-write of one key.
+
+KEY_PREFIX = 'throttle:'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """
+    Returns the seconds between tokens and the bucket capacity of a "N/period" rate.
+    """
+    count, period = rate.split('/')
+    count = int(count)
+    return PERIODS[period[0]] / count, count
+
+
+class LocalBucketStore:
+    """
+    Buckets kept in this process. Exact for a single process; with several
+    workers each enforces the limits on its own share of the traffic.
+    """
+    # Full buckets are dropped once the store holds this many
+    max_keys = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def consume(self, key, interval, capacity):
+        """
+        Takes a token from the bucket `key`. Returns 0 if there was one,
+        otherwise the seconds until there will be.
+        """
+        now = time.monotonic()
+        with self._lock:
+            full_at = max(self._buckets.get(key, now), now)
+            wait = full_at - now - (capacity - 1) * interval
+            if wait > 0:
+                return wait
+            self._buckets[key] = full_at + interval
+            if len(self._buckets) > self.max_keys:
+                self._buckets = {key: value for key, value in self._buckets.items() if value > now}
+        return 0
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# KEYS[1]: bucket, ARGV: seconds between tokens, capacity. Redis's own clock
+# is used, so the processes sharing a bucket need not agree on the time.
+CONSUME_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local full_at = math.max(tonumber(redis.call('GET', KEYS[1]) or 0), now)
+local wait = full_at - now - (tonumber(ARGV[2]) - 1) * interval
+if wait > 0 then
+    return tostring(wait)
+end
+redis.call('SET', KEYS[1], tostring(full_at + interval), 'PX', math.ceil((full_at + interval - now) * 1000))
+return '0'
+"""
+
+
+class RedisBucketStore:
+    """
+    Buckets shared by every process through Redis, one script call per check.
+    While Redis is unreachable the buckets of this process are used instead.
+    """
+    def __init__(self, url=None):
+        import redis
+
+        self.errors = (redis.RedisError,)
+        self.redis = redis.Redis.from_url(
+            url or settings.THROTTLE_REDIS_URL, socket_timeout=settings.THROTTLE_REDIS_TIMEOUT
+        )
+        self.script = self.redis.register_script(CONSUME_SCRIPT)
+        self.fallback = LocalBucketStore()
+
+    def consume(self, key, interval, capacity):
+        try:
+            return float(self.script(keys=[key], args=[interval, capacity]))
+        except self.errors:
+            throttle_store_errors.inc()
+            return self.fallback.consume(key, interval, capacity)
+
+    def clear(self):
+        self.fallback.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Returns this process's bucket store, an instance of the `THROTTLE_STORE` class.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = import_string(settings.THROTTLE_STORE)()
+        return _store
+
+
+@receiver(setting_changed)
+def reset_store(setting, **kwargs):
+    global _store
+    if setting in ('THROTTLE_STORE', 'REST_FRAMEWORK'):
+        with _store_lock:
+            _store = None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Takes a token from each bucket returned by `get_buckets`, as
+    `(key, scope)` pairs, and lets the request through if all had one.
+    Scopes without a rate in `DEFAULT_THROTTLE_RATES` are not limited.
+    """
+    def __init__(self):
+        self.rates = api_settings.DEFAULT_THROTTLE_RATES
+        self._wait = None
+
+    def get_buckets(self, request, view):
+        raise NotImplementedError('.get_buckets() must be overridden')
+
+    def allow_request(self, request, view):
+        store = get_store()
+        for key, scope in self.get_buckets(request, view):
+            rate = self.rates.get(scope)
+            if rate is None:
+                continue
+            wait = store.consume(KEY_PREFIX + key, *parse_rate(rate))
+            if wait:
+                self._wait = wait
+                throttled_requests.inc(scope=scope)
+                return False
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+class UserThrottle(TokenBucketThrottle):
+    """
+    Limits every authenticated user to the 'user' rate across all endpoints.
+    """
+    def get_buckets(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return [(f'user:{request.user.pk}', 'user')]
+        return []
+
+
+class IPThrottle(TokenBucketThrottle):
+    """
+    Limits anonymous requests to the 'ip' rate per client address.
+    Authenticated requests count against their user instead, so clients
+    behind one NAT do not share a bucket.
+    """
+    def get_buckets(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return []
+        return [(f'ip:{self.get_ident(request)}', 'ip')]
+
+
+class ScopedThrottle(TokenBucketThrottle):
+    """
+    Limits the writes to views with a `throttle_scope`, which send email or
+    call Zoom: per client at the scope's rate, and across all clients at the
+    '<scope>_global' rate if there is one. Reads are only limited per client.
+    """
+    def get_buckets(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None or request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return []
+        if request.user and request.user.is_authenticated:
+            client = f'user:{request.user.pk}'
+        else:
+            client = f'ip:{self.get_ident(request)}'
+        return [(f'{scope}:{client}', scope), (f'{scope}:global', f'{scope}_global')]
+
+
+def check_throttles(request, scope=None):
+    """
+    Applies the default throttles to a request outside of a DRF view, as
+    if it were made to a view with `throttle_scope = scope`. Returns None
+    if it is allowed, otherwise the seconds to wait.
+    """
+    view = SimpleNamespace(throttle_scope=scope)
+    waits = []
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, view):
+            waits.append(throttle.wait())
+    return max(waits) if waits else None
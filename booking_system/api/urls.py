@@ -1,20 +1,43 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
 from .bookingviews import (
-    RegisterView, BookingListCreateView, BookingRetrieveUpdateDestroyView,
-    AvailableSlotsView
+    RegisterView, LoginView, BookingListCreateView, BookingRetrieveUpdateDestroyView,
+    AvailableSlotsView, SlotsCacheStatsView, BulkBookingView, BulkBookingCancelView, SeriesBookingView
 )
 from .zoomviews import (
-    ZoomMeetingListCreateView, ZoomMeetingRetrieveDestroyView
+    ZoomMeetingListCreateView, ZoomMeetingRetrieveDestroyView,
+    MeetingSeriesListCreateView, MeetingSeriesRetrieveDestroyView, MeetingSeriesOccurrencesView
 )
+from .syncviews import SyncView
+from .exportviews import BookingExportView, ZoomMeetingExportView
+from .webhookviews import zoom_webhook
+from . import asyncviews
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
-    path('login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('login/', LoginView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('slots/', AvailableSlotsView.as_view(), name='available_slots'),
+    path('slots/cache-stats/', SlotsCacheStatsView.as_view(), name='slots_cache_stats'),
     path('bookings/', BookingListCreateView.as_view(), name='booking_list_create'),
+    path('bookings/bulk/', BulkBookingView.as_view(), name='booking_bulk_create'),
+    path('bookings/bulk/cancel/', BulkBookingCancelView.as_view(), name='booking_bulk_cancel'),
+    path('bookings/export.<str:file_format>', BookingExportView.as_view(), name='booking_export'),
     path('bookings/<int:pk>/', BookingRetrieveUpdateDestroyView.as_view(), name='booking_detail'),
+    path('sync/', SyncView.as_view(), name='sync'),
     path('zoom/meetings/', ZoomMeetingListCreateView.as_view(), name='zoom_meeting_list_create'),
+    path('zoom/meetings/export.<str:file_format>', ZoomMeetingExportView.as_view(), name='zoom_meeting_export'),
     path('zoom/meetings/<int:pk>/', ZoomMeetingRetrieveDestroyView.as_view(), name='zoom_meeting_detail'),
+    path('zoom/series/', MeetingSeriesListCreateView.as_view(), name='zoom_series_list_create'),
+    path('zoom/series/<int:pk>/', MeetingSeriesRetrieveDestroyView.as_view(), name='zoom_series_detail'),
+    path('zoom/series/<int:pk>/occurrences/', MeetingSeriesOccurrencesView.as_view(), name='zoom_series_occurrences'),
+    path('zoom/series/<int:pk>/book/', SeriesBookingView.as_view(), name='zoom_series_book'),
+    path('zoom/webhook/', zoom_webhook, name='zoom_webhook'),
+    # ASGI-native variants, for deployments served by uvicorn
+    path('async/slots/', asyncviews.available_slots, name='async_available_slots'),
+    path('async/slots/events/', asyncviews.slot_events, name='async_slot_events'),
+    path('async/bookings/', asyncviews.booking_create, name='async_booking_create'),
+    path('async/bookings/<int:pk>/', asyncviews.booking_cancel, name='async_booking_cancel'),
+    path('async/zoom/meetings/', asyncviews.zoom_meeting_create, name='async_zoom_meeting_create'),
+    path('async/zoom/meetings/<int:pk>/', asyncviews.zoom_meeting_delete, name='async_zoom_meeting_delete'),
 ]
\ No newline at end of file
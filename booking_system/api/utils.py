@@ -1,22 +1,186 @@
-from django.core.mail import send_mail
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .metrics import timed
+from .models import EmailOutbox
+
+EmailResult = namedtuple('EmailResult', ['recipient', 'sent', 'error'])
+
+def enqueue_email(subject, message, from_email, recipient):
+    """
+    Stores an outgoing email in the outbox instead of sending it.
+    The row is written in the caller's transaction, so it only becomes visible
+    to the outbox worker if the surrounding request commits.
+    """
+    return EmailOutbox.objects.create(
+        subject=subject,
+        message=message,
+        from_email=from_email,
+        recipient=recipient,
+    )
+
+def enqueue_emails(messages):
+    """
+    Bulk version of `enqueue_email`.
+    Takes already rendered (subject, message, from_email, recipient) tuples and
+    stores them with a single INSERT.
+    """
+    return EmailOutbox.objects.bulk_create([
+        EmailOutbox(subject=subject, message=message, from_email=from_email, recipient=recipient)
+        for subject, message, from_email, recipient in messages
+    ])
 
 def send_booking_confirmation(user_email, booking):
     subject = 'Booking Confirmation'
     message = f'Your booking for {booking.zoom_meeting.topic} from {booking.zoom_meeting.start_time} to {booking.zoom_meeting.end_time} has been confirmed.'
-    send_mail(subject, message, 'from@example.com', [user_email])
+    enqueue_email(subject, message, 'from@example.com', user_email)
 
 def send_booking_cancellation(user_email, booking):
     subject = 'Booking Cancellation'
     message = f'Your booking for {booking.zoom_meeting.topic} from {booking.zoom_meeting.start_time} to {booking.zoom_meeting.end_time} has been cancelled.'
-    send_mail(subject, message, 'from@example.com', [user_email])
+    enqueue_email(subject, message, 'from@example.com', user_email)
+
+def send_booking_cancellations(meeting, bookings):
+    """
+    Queues a cancellation email for every booking of a deleted meeting.
+    All messages are rendered up front and inserted in one batch instead of one
+    row per booking.
+    """
+    subject = 'Booking Cancellation'
+    message = f'Your booking for {meeting.topic} from {meeting.start_time} to {meeting.end_time} has been cancelled.'
+    recipients = bookings.values_list('user__email', flat=True)
+    return enqueue_emails(
+        (subject, message, 'from@example.com', recipient) for recipient in recipients if recipient
+    )
+
+def send_booking_confirmations(bookings):
+    """
+    Queues a confirmation email for each booking of a bulk booking, in one batch.
+    The bookings need their `user` and `zoom_meeting` loaded.
+    """
+    subject = 'Booking Confirmation'
+    return enqueue_emails(
+        (subject, f'Your booking for {booking.zoom_meeting.topic} from {booking.zoom_meeting.start_time} to {booking.zoom_meeting.end_time} has been confirmed.', 'from@example.com', booking.user.email)
+        for booking in bookings if booking.user.email
+    )
+
+def send_bulk_booking_cancellations(bookings):
+    """
+    Queues a cancellation email for each booking of a bulk cancellation, in one batch.
+    The bookings need their `user` and `zoom_meeting` loaded.
+    """
+    subject = 'Booking Cancellation'
+    return enqueue_emails(
+        (subject, f'Your booking for {booking.zoom_meeting.topic} from {booking.zoom_meeting.start_time} to {booking.zoom_meeting.end_time} has been cancelled.', 'from@example.com', booking.user.email)
+        for booking in bookings if booking.user.email
+    )
 
 def send_zoom_meeting_creation(user_email, meeting):
     subject = 'Zoom Meeting Created'
     message = f'Your Zoom meeting "{meeting.topic}" has been created for {meeting.start_time}.'
-    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user_email])
+    enqueue_email(subject, message, settings.DEFAULT_FROM_EMAIL, user_email)
 
 def send_zoom_meeting_deletion(user_email, meeting):
     subject = 'Zoom Meeting Deleted'
     message = f'Your Zoom meeting "{meeting.topic}" scheduled for {meeting.start_time} has been deleted.'
-    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user_email])
\ No newline at end of file
+    enqueue_email(subject, message, settings.DEFAULT_FROM_EMAIL, user_email)
+
+def get_retry_delay(attempts):
+    """
+    Returns the exponential backoff delay before the next delivery attempt.
+    """
+    base = settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS
+    return timedelta(seconds=min(base * (2 ** (attempts - 1)), settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS))
+
+def claim_outbox_batch(batch_size):
+    """
+    Returns up to `batch_size` due outbox rows, locked for the current transaction.
+    Rows locked by another worker are skipped rather than waited on.
+    """
+    return list(
+        EmailOutbox.objects.select_for_update(skip_locked=True)
+        .filter(status=EmailOutbox.STATUS_PENDING, next_attempt_at__lte=timezone.now())
+        .order_by('next_attempt_at', 'id')[:batch_size]
+    )
+
+def mark_delivery_failed(email, error):
+    """
+    Records a failed delivery and either schedules a retry or moves the email
+    to the dead-letter state once the attempt limit is reached.
+    """
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = EmailOutbox.STATUS_DEAD
+    else:
+        email.next_attempt_at = timezone.now() + get_retry_delay(email.attempts)
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+def _send_email_chunk(messages):
+    """
+    Sends a chunk of messages over a single SMTP connection.
+    Each message is sent on its own so one rejected recipient does not abort the rest.
+    """
+    results = []
+    try:
+        with timed('smtp'):
+            connection = get_connection()
+            connection.open()
+    except Exception as exc:
+        return [EmailResult(recipient, False, str(exc)) for _, _, _, recipient in messages]
+    try:
+        for subject, message, from_email, recipient in messages:
+            try:
+                with timed('smtp'):
+                    connection.send_messages([EmailMessage(subject, message, from_email, [recipient], connection=connection)])
+            except Exception as exc:
+                results.append(EmailResult(recipient, False, str(exc)))
+            else:
+                results.append(EmailResult(recipient, True, ''))
+    finally:
+        connection.close()
+    return results
+
+def send_bulk_emails(messages, chunk_size=None, max_workers=None):
+    """
+    Sends rendered (subject, message, from_email, recipient) tuples in chunks,
+    reusing one connection per chunk and spreading chunks over a small thread pool.
+    Returns an `EmailResult` per message, in the same order as `messages`.
+    """
+    messages = list(messages)
+    chunk_size = chunk_size or settings.EMAIL_BULK_CHUNK_SIZE
+    max_workers = max_workers or settings.EMAIL_BULK_MAX_WORKERS
+    chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+    if len(chunks) <= 1:
+        return [result for chunk in chunks for result in _send_email_chunk(chunk)]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        return [result for chunk_results in executor.map(_send_email_chunk, chunks) for result in chunk_results]
+
+def process_outbox_batch(batch_size=None):
+    """
+    Delivers one batch of due outbox emails.
+    Returns a tuple of (sent, failed) counts.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    with transaction.atomic():
+        batch = claim_outbox_batch(batch_size)
+        results = send_bulk_emails(
+            (email.subject, email.message, email.from_email, email.recipient) for email in batch
+        )
+        sent_ids = []
+        for email, result in zip(batch, results):
+            if result.sent:
+                sent_ids.append(email.id)
+            else:
+                mark_delivery_failed(email, result.error)
+        EmailOutbox.objects.filter(id__in=sent_ids).update(
+            status=EmailOutbox.STATUS_SENT,
+            attempts=F('attempts') + 1,
+            sent_at=timezone.now(),
+        )
+    return len(sent_ids), len(batch) - len(sent_ids)
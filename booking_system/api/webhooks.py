@@ -0,0 +1,274 @@
+import hashlib
+import hmac
+import json
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .events import publish_slot_changes
+from .models import Booking, MeetingSeries, ZoomMeeting, ZoomWebhookEvent, find_overlap
+from .signals import grouped_booking_deletes
+from .utils import send_bulk_booking_cancellations
+
+# Zoom notifies the webhook endpoint of changes made to meetings on its side.
+# The endpoint only checks the signature and queues the event; the
+# process_zoom_webhooks worker applies queued events to the local meetings in
+# batches, in the order Zoom emitted them.
+
+
+class WebhookConflict(Exception):
+    """
+    An event that contradicts the local data, e.g. a time change onto another
+    of the host's meetings. Retrying cannot apply it, so it is skipped with
+    the conflict recorded instead of holding back its meeting's later events.
+    """
+
+
+def sign(secret, message):
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret, timestamp, body, signature, now=None):
+    """
+    Checks the `x-zm-signature` header of a delivery: 'v0=' followed by the
+    HMAC-SHA256, keyed with the webhook's secret token, of 'v0:<timestamp>:<body>'.
+    Deliveries timestamped more than `ZOOM_WEBHOOK_TOLERANCE_SECONDS` away are
+    rejected, so a captured delivery cannot be replayed later.
+    """
+    try:
+        age = (now or time.time()) - int(timestamp)
+    except (TypeError, ValueError):
+        return False
+    if abs(age) > settings.ZOOM_WEBHOOK_TOLERANCE_SECONDS:
+        return False
+    expected = 'v0=' + sign(secret, b'v0:' + timestamp.encode() + b':' + body)
+    return hmac.compare_digest(expected, signature or '')
+
+
+def read_delivery(body):
+    """
+    Parses a delivery's body into its (event, event_ts, payload), raising
+    ValueError when the JSON does not have the shape Zoom sends.
+    """
+    try:
+        delivery = json.loads(body)
+        event, event_ts, payload = delivery['event'], delivery.get('event_ts', 0), delivery.get('payload') or {}
+    except (KeyError, TypeError, AttributeError):
+        raise ValueError("Invalid payload.")
+    if not isinstance(event, str) or not isinstance(payload, dict):
+        raise ValueError("Invalid payload.")
+    # event_ts goes into a BigIntegerField; bool is an int subclass but never a timestamp
+    if type(event_ts) is not int or not 0 <= event_ts < 2 ** 63:
+        raise ValueError("Invalid event_ts.")
+    if event == 'endpoint.url_validation' and not isinstance(payload.get('plainToken'), str):
+        raise ValueError("Invalid plainToken.")
+    if event in HANDLERS:
+        meeting = payload.get('object')
+        if not isinstance(meeting, dict) or type(meeting.get('id')) not in (int, str):
+            raise ValueError("Invalid object id.")
+    return event, event_ts, payload
+
+
+def zoom_times(start_time, duration):
+    start_time = parse_datetime(start_time)
+    return start_time, start_time + timedelta(minutes=int(duration))
+
+
+def reschedule(meeting, start_time, end_time):
+    """
+    Moves `meeting` and its bookings to new times. Bookings that would now
+    overlap another booking of their attendee are cancelled, with their
+    cancellation emails queued in one batch.
+    """
+    if (meeting.start_time, meeting.end_time) == (start_time, end_time):
+        return
+    # The host's calendar is kept free of overlaps, on Postgres by an exclusion constraint
+    hosted = ZoomMeeting.objects.filter(user_id=meeting.user_id).exclude(pk=meeting.pk)
+    clash = find_overlap(hosted, start_time, end_time)
+    if clash is not None:
+        raise WebhookConflict(f"Moving meeting {meeting.pk} would overlap meeting {clash.pk} of the same host.")
+    meeting.start_time, meeting.end_time = start_time, end_time
+    meeting.save(update_fields=['start_time', 'end_time', 'updated_at'])
+    bookings = Booking.objects.filter(zoom_meeting=meeting)
+    conflicts = Booking.objects.filter(
+        user__in=bookings.values('user_id'), start_time__lt=end_time, end_time__gt=start_time,
+    ).exclude(zoom_meeting=meeting).values('user_id')
+    cancelled = list(bookings.filter(user__in=conflicts).select_related('user', 'zoom_meeting'))
+    if cancelled:
+        send_bulk_booking_cancellations(cancelled)
+        Booking.objects.filter(pk__in=[booking.pk for booking in cancelled]).delete()
+    # The attendees' calendars are searched by the bookings' own copy of the times
+    bookings.update(start_time=start_time, end_time=end_time, updated_at=timezone.now())
+    publish_slot_changes('meeting.updated', [meeting.pk])
+
+
+def meeting_updated(meeting):
+    """
+    Applies a topic or time change. `meeting` is the event's object: the
+    meeting's id and its changed fields, or the changed occurrences.
+    Changes to the recurrence of a series are not mirrored.
+    """
+    meeting_id = str(meeting['id'])
+    meetings = ZoomMeeting.objects.filter(meeting_id=meeting_id)
+    if meeting.get('topic'):
+        MeetingSeries.objects.filter(meeting_id=meeting_id).update(topic=meeting['topic'])
+        for instance in meetings.exclude(topic=meeting['topic']):
+            instance.topic = meeting['topic']
+            instance.save(update_fields=['topic', 'updated_at'])
+    if meeting.get('occurrences'):
+        occurrences = {occurrence['occurrence_id']: occurrence for occurrence in meeting['occurrences']}
+        for instance in meetings.filter(occurrence_id__in=occurrences):
+            occurrence = occurrences[instance.occurrence_id]
+            if 'start_time' in occurrence:
+                duration = occurrence.get('duration', (instance.end_time - instance.start_time).total_seconds() // 60)
+                reschedule(instance, *zoom_times(occurrence['start_time'], duration))
+    elif 'start_time' in meeting or 'duration' in meeting:
+        for instance in meetings.filter(occurrence_id=''):
+            start_time = meeting.get('start_time') or instance.start_time.isoformat()
+            duration = meeting.get('duration', (instance.end_time - instance.start_time).total_seconds() // 60)
+            reschedule(instance, *zoom_times(start_time, duration))
+
+
+def meeting_deleted(meeting):
+    """
+    Deletes the meeting, or the occurrences listed in the event, and queues
+    the cancellation emails of their bookings in one batch. Meetings that
+    already started are kept as history.
+    """
+    meeting_id = str(meeting['id'])
+    now = timezone.now()
+    meetings = ZoomMeeting.objects.filter(meeting_id=meeting_id, start_time__gt=now)
+    occurrence_ids = [occurrence['occurrence_id'] for occurrence in meeting.get('occurrences') or []]
+    if occurrence_ids:
+        meetings = meetings.filter(occurrence_id__in=occurrence_ids)
+    send_bulk_booking_cancellations(Booking.objects.filter(zoom_meeting__in=meetings).select_related('user', 'zoom_meeting'))
+    with grouped_booking_deletes():
+        meetings.delete()
+        if not occurrence_ids:
+            # Deleting a whole recurring meeting ends its series
+            ZoomMeeting.objects.filter(meeting_id=meeting_id, series__isnull=False).update(series=None, updated_at=now)
+            MeetingSeries.objects.filter(meeting_id=meeting_id).delete()
+
+
+HANDLERS = {
+    'meeting.updated': meeting_updated,
+    'meeting.deleted': meeting_deleted,
+}
+
+
+def claim_webhook_batch(batch_size):
+    """
+    Returns up to `batch_size` pending events, oldest first, locked for the
+    current transaction. Events locked by another worker are skipped, and so
+    are the later events of their meeting: a meeting's event is only claimed
+    with, or after, all its earlier ones. A dead event holds back its meeting
+    until it is retried.
+    """
+    claimed = list(
+        ZoomWebhookEvent.objects.select_for_update(skip_locked=True)
+        .filter(status=ZoomWebhookEvent.STATUS_PENDING).order_by('event_ts', 'id')[:batch_size]
+    )
+    if not claimed:
+        return claimed
+    # The earliest unapplied event of each meeting left out of this batch
+    held_back = {}
+    unclaimed = ZoomWebhookEvent.objects.filter(
+        meeting_id__in={event.meeting_id for event in claimed},
+        status__in=[ZoomWebhookEvent.STATUS_PENDING, ZoomWebhookEvent.STATUS_DEAD],
+        event_ts__lte=claimed[-1].event_ts,
+    ).exclude(pk__in=[event.pk for event in claimed])
+    for meeting_id, event_ts, pk in unclaimed.order_by('event_ts', 'id').values_list('meeting_id', 'event_ts', 'pk'):
+        held_back.setdefault(meeting_id, (event_ts, pk))
+    return [
+        event for event in claimed
+        if event.meeting_id not in held_back or (event.event_ts, event.pk) < held_back[event.meeting_id]
+    ]
+
+
+def mark_event_failed(event, error):
+    """
+    Records a failed event, leaving it pending for the next batch until the
+    attempt limit is reached.
+    """
+    event.attempts += 1
+    event.last_error = str(error)
+    if event.attempts >= settings.ZOOM_WEBHOOK_MAX_ATTEMPTS:
+        event.status = ZoomWebhookEvent.STATUS_DEAD
+    event.save(update_fields=['attempts', 'last_error', 'status'])
+
+
+def mark_event_conflict(event, error):
+    """
+    Records an event that cannot be applied as skipped, with the conflict as
+    its error, so it does not hold back its meeting.
+    """
+    event.attempts += 1
+    event.last_error = str(error)
+    event.status = ZoomWebhookEvent.STATUS_SKIPPED
+    event.processed_at = timezone.now()
+    event.save(update_fields=['attempts', 'last_error', 'status', 'processed_at'])
+
+
+def process_webhook_batch(batch_size=None):
+    """
+    Applies one batch of queued events, each in its own savepoint.
+    A meeting's later events in the batch wait while an earlier one fails, so
+    each meeting's events always apply in order. Events older than the last
+    one applied to their meeting, such as late retries, are skipped, and so
+    are events that conflict with the local data.
+    Returns a tuple of (processed, failed) counts, skipped events included in
+    the processed ones.
+    """
+    batch_size = batch_size or settings.ZOOM_WEBHOOK_BATCH_SIZE
+    processed_ids, skipped_ids, failed = [], [], 0
+    blocked = set()
+    with transaction.atomic():
+        events = claim_webhook_batch(batch_size)
+        applied = dict(
+            ZoomWebhookEvent.objects.filter(
+                meeting_id__in={event.meeting_id for event in events}, status=ZoomWebhookEvent.STATUS_PROCESSED,
+            ).values('meeting_id').annotate(last_ts=Max('event_ts')).values_list('meeting_id', 'last_ts')
+        )
+        for event in events:
+            if event.meeting_id in blocked:
+                continue
+            if event.event_ts < applied.get(event.meeting_id, event.event_ts):
+                skipped_ids.append(event.pk)
+                continue
+            try:
+                with transaction.atomic():
+                    HANDLERS[event.event](event.payload['object'])
+            except (WebhookConflict, IntegrityError) as exc:
+                # The same data would fail the same way on every retry
+                failed += 1
+                mark_event_conflict(event, exc)
+            except Exception as exc:
+                failed += 1
+                blocked.add(event.meeting_id)
+                mark_event_failed(event, exc)
+            else:
+                processed_ids.append(event.pk)
+                applied[event.meeting_id] = event.event_ts
+        for status, ids in [
+            (ZoomWebhookEvent.STATUS_PROCESSED, processed_ids),
+            (ZoomWebhookEvent.STATUS_SKIPPED, skipped_ids),
+        ]:
+            ZoomWebhookEvent.objects.filter(pk__in=ids).update(
+                status=status,
+                attempts=F('attempts') + 1,
+                processed_at=timezone.now(),
+            )
+    return len(processed_ids) + len(skipped_ids), failed
+
+
+def retry_dead_events():
+    """
+    Puts dead events back in the queue with a fresh attempt count, releasing
+    the meetings they held back. Returns the number of events requeued.
+    """
+    return ZoomWebhookEvent.objects.filter(status=ZoomWebhookEvent.STATUS_DEAD).update(
+        status=ZoomWebhookEvent.STATUS_PENDING, attempts=0,
+    )
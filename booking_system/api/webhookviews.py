@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from .metrics import zoom_webhook_deliveries
+from .models import ZoomWebhookEvent
+from .webhooks import HANDLERS, read_delivery, sign, verify_signature
+
+
+@csrf_exempt
+@require_http_methods(['POST'])
+def zoom_webhook(request):
+    """
+    Receives Zoom's webhook deliveries. Signed meeting events are queued with
+    a single insert and acknowledged at once; process_zoom_webhooks applies
+    them. Zoom retries deliveries that are not acknowledged within 3 seconds.
+    """
+    secret = settings.ZOOM_WEBHOOK_SECRET_TOKEN
+    if not secret or not verify_signature(
+        secret, request.headers.get('x-zm-request-timestamp'), request.body, request.headers.get('x-zm-signature'),
+    ):
+        zoom_webhook_deliveries.inc(event='', outcome='rejected')
+        return JsonResponse({'detail': 'Invalid signature.'}, status=401)
+    try:
+        event, event_ts, payload = read_delivery(request.body)
+    except ValueError:
+        zoom_webhook_deliveries.inc(event='', outcome='invalid')
+        return JsonResponse({'detail': 'Invalid payload.'}, status=400)
+
+    if event == 'endpoint.url_validation':
+        # Zoom checks that the endpoint knows the secret token before enabling it
+        plain_token = payload['plainToken']
+        zoom_webhook_deliveries.inc(event=event, outcome='validated')
+        return JsonResponse({'plainToken': plain_token, 'encryptedToken': sign(secret, plain_token.encode())})
+    if event not in HANDLERS:
+        zoom_webhook_deliveries.inc(event=event, outcome='ignored')
+        return HttpResponse(status=204)
+    ZoomWebhookEvent.objects.create(
+        event=event, meeting_id=str(payload['object']['id']), event_ts=event_ts, payload=payload,
+    )
+    zoom_webhook_deliveries.inc(event=event, outcome='queued')
+    return HttpResponse(status=204)
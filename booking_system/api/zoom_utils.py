@@ -1,23 +1,460 @@
-from zoomus import ZoomClient
+import asyncio
+import random
+import threading
+import time
+import uuid
+import weakref
+from datetime import timezone as dt_timezone
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from requests.adapters import HTTPAdapter
 from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from .metrics import timed
 
-client = ZoomClient(settings.ZOOM_API_KEY, settings.ZOOM_API_SECRET, settings.ZOOM_API_ACCOUNT_ID)
 
-def create_zoom_meeting(topic, start_time, duration):
-    response = client.meeting.create(
-        user_id='me',
-        topic=topic,
-        type=2,  # Scheduled meeting
-        start_time=start_time,
-        duration=duration,
-        timezone='UTC'
-    )
-    return response
+class ZoomAPIError(Exception):
+    """
+    Raised when Zoom rejects a request or cannot be reached.
+    """
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
 
-def delete_zoom_meeting(meeting_id):
-    response = client.meeting.delete(id=meeting_id)
-    return response
+
+class ZoomUnavailableError(ZoomAPIError):
+    """
+    Raised without calling Zoom while the circuit breaker is open.
+    """
+
+
+ZOOM_TOKEN_CACHE_KEY = 'zoom:access-token'
+ZOOM_TOKEN_LOCK_KEY = 'zoom:access-token:lock'
+# Tokens are treated as expired this many seconds early
+ZOOM_TOKEN_EXPIRY_MARGIN = 60
+
+
+class TokenMetrics:
+    """
+    In-process counters for Zoom access token usage.
+    `fetches` is the number of OAuth calls this process made; `cache_hits` and
+    `waits` count token lookups served by the shared cache or by waiting on
+    another worker's refresh.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {'fetches': 0, 'fetch_failures': 0, 'cache_hits': 0, 'waits': 0}
+
+    def incr(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counters)
+
+
+token_metrics = TokenMetrics()
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls until
+    `reset_timeout` seconds have passed, then lets a single trial call through.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class ZoomGateway:
+    """
+    Thin client for the Zoom REST API using server-to-server OAuth.
+    Connections are kept alive in a pooled session, every call has explicit
+    connect/read timeouts, transient failures are retried with jittered backoff,
+    and a circuit breaker fails fast while Zoom is unhealthy.
+    The `a`-prefixed methods do the same over a non-blocking httpx client for
+    async views, sharing the token and the circuit breaker with the sync methods.
+    """
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(self, client_id, client_secret, account_id, base_url, oauth_url,
+                 connect_timeout, read_timeout, max_retries, retry_backoff, pool_size, breaker):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.account_id = account_id
+        self.base_url = base_url.rstrip('/')
+        self.oauth_url = oauth_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker
+        self.pool_size = pool_size
+        # One httpx client per event loop, with the async generator that closes it
+        self._async_clients = weakref.WeakKeyDictionary()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.token_lock_timeout = settings.ZOOM_TOKEN_LOCK_TIMEOUT
+        self._token = None
+        self._token_expires_at = 0
+        self._token_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            client_id=settings.ZOOM_API_KEY,
+            client_secret=settings.ZOOM_API_SECRET,
+            account_id=settings.ZOOM_API_ACCOUNT_ID,
+            base_url=settings.ZOOM_API_BASE_URL,
+            oauth_url=settings.ZOOM_OAUTH_URL,
+            connect_timeout=settings.ZOOM_CONNECT_TIMEOUT,
+            read_timeout=settings.ZOOM_READ_TIMEOUT,
+            max_retries=settings.ZOOM_MAX_RETRIES,
+            retry_backoff=settings.ZOOM_RETRY_BACKOFF,
+            pool_size=settings.ZOOM_POOL_SIZE,
+            breaker=CircuitBreaker(settings.ZOOM_CIRCUIT_FAILURE_THRESHOLD, settings.ZOOM_CIRCUIT_RESET_TIMEOUT),
+        )
+
+    def fetch_access_token(self):
+        """
+        Requests a new server-to-server OAuth token, returning `(token, expires_in)`.
+        """
+        with timed('zoom'):
+            response = self.session.post(
+                self.oauth_url,
+                params={'grant_type': 'account_credentials', 'account_id': self.account_id},
+                auth=(self.client_id or '', self.client_secret or ''),
+                timeout=self.timeout,
+            )
+        if response.status_code != 200:
+            raise ZoomAPIError('Failed to obtain a Zoom access token', response.status_code)
+        data = response.json()
+        return data['access_token'], int(data.get('expires_in', 3600))
+
+    def get_access_token(self, rejected_token=None):
+        """
+        Returns a valid access token, shared by every worker through the cache
+        when the cache is shared (Redis).
+        Pass the token Zoom just rejected as `rejected_token` to force a refresh;
+        if another worker already replaced it, the newer token is reused instead.
+        """
+        with self._token_lock:
+            if self._token and self._token != rejected_token and time.time() < self._token_expires_at:
+                return self._token
+            token, expires_at = self._get_shared_token(rejected_token)
+            self._token, self._token_expires_at = token, expires_at
+            return token
+
+    def _read_cached_token(self, rejected_token):
+        cached = cache.get(ZOOM_TOKEN_CACHE_KEY)
+        if cached and cached['token'] != rejected_token and time.time() < cached['expires_at']:
+            return cached['token'], cached['expires_at']
+        return None
+
+    def _get_shared_token(self, rejected_token):
+        cached = self._read_cached_token(rejected_token)
+        if cached:
+            token_metrics.incr('cache_hits')
+            return cached
+        # Single-flight refresh: only the worker holding the lock calls Zoom
+        owner = uuid.uuid4().hex
+        if cache.add(ZOOM_TOKEN_LOCK_KEY, owner, self.token_lock_timeout):
+            try:
+                cached = self._read_cached_token(rejected_token)
+                if cached:
+                    token_metrics.incr('cache_hits')
+                    return cached
+                return self._refresh_shared_token()
+            finally:
+                if cache.get(ZOOM_TOKEN_LOCK_KEY) == owner:
+                    cache.delete(ZOOM_TOKEN_LOCK_KEY)
+        token_metrics.incr('waits')
+        deadline = time.monotonic() + self.token_lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            cached = self._read_cached_token(rejected_token)
+            if cached:
+                return cached
+        # The refreshing worker died or is stuck, fetch a token ourselves
+        return self._refresh_shared_token()
+
+    def _refresh_shared_token(self):
+        try:
+            token, expires_in = self.fetch_access_token()
+        except Exception:
+            token_metrics.incr('fetch_failures')
+            raise
+        token_metrics.incr('fetches')
+        lifetime = max(expires_in - ZOOM_TOKEN_EXPIRY_MARGIN, 1)
+        expires_at = time.time() + lifetime
+        cache.set(ZOOM_TOKEN_CACHE_KEY, {'token': token, 'expires_at': expires_at}, lifetime)
+        return token, expires_at
+
+    async def aget_access_token(self, rejected_token=None):
+        if self._token and self._token != rejected_token and time.time() < self._token_expires_at:
+            return self._token
+        # Refreshing is rare and goes through the shared single-flight path in a worker thread
+        return await sync_to_async(self.get_access_token, thread_sensitive=False)(rejected_token)
+
+    def get_retry_delay(self, attempt):
+        # Exponential backoff with full jitter
+        return random.uniform(0, self.retry_backoff * (2 ** attempt))
+
+    def request(self, method, path, idempotent=True, **kwargs):
+        """
+        Sends a request to Zoom and returns the response.
+        Non-idempotent calls are only retried when the request never reached Zoom.
+        """
+        if not self.breaker.allow_request():
+            raise ZoomUnavailableError('Zoom is temporarily unavailable')
+        try:
+            rejected_token = None
+            attempt = 0
+            while True:
+                try:
+                    token = self.get_access_token(rejected_token)
+                    headers = {'Authorization': f'Bearer {token}'}
+                    with timed('zoom'):
+                        response = self.session.request(
+                            method, f'{self.base_url}{path}', headers=headers, timeout=self.timeout, **kwargs
+                        )
+                except (requests.ConnectionError, requests.Timeout) as exc:
+                    retryable = idempotent or isinstance(exc, requests.ConnectTimeout)
+                    error = ZoomAPIError(f'Zoom request failed: {exc}')
+                except ZoomAPIError as exc:
+                    retryable, error = True, exc
+                else:
+                    if response.status_code == 401 and rejected_token is None:
+                        # The token was revoked or expired early, get a new one and try again
+                        rejected_token = token
+                        continue
+                    if response.status_code not in self.RETRY_STATUS_CODES:
+                        self.breaker.record_success()
+                        return response
+                    retryable, error = self._status_error(response.status_code, idempotent)
+                if not retryable or attempt >= self.max_retries:
+                    raise error
+                time.sleep(self.get_retry_delay(attempt))
+                attempt += 1
+        except BaseException:
+            # Unexpected errors and cancellations count too, or a half-open trial would never end
+            self.breaker.record_failure()
+            raise
+
+    async def arequest(self, method, path, idempotent=True, **kwargs):
+        """
+        Async version of `request`, sent through a pooled httpx client.
+        """
+        if not self.breaker.allow_request():
+            raise ZoomUnavailableError('Zoom is temporarily unavailable')
+        try:
+            client = await self._get_async_client()
+            rejected_token = None
+            attempt = 0
+            while True:
+                try:
+                    token = await self.aget_access_token(rejected_token)
+                    headers = {'Authorization': f'Bearer {token}'}
+                    with timed('zoom'):
+                        response = await client.request(method, f'{self.base_url}{path}', headers=headers, **kwargs)
+                except httpx.TransportError as exc:
+                    retryable = idempotent or isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout))
+                    error = ZoomAPIError(f'Zoom request failed: {exc!r}')
+                except ZoomAPIError as exc:
+                    retryable, error = True, exc
+                else:
+                    if response.status_code == 401 and rejected_token is None:
+                        rejected_token = token
+                        continue
+                    if response.status_code not in self.RETRY_STATUS_CODES:
+                        self.breaker.record_success()
+                        return response
+                    retryable, error = self._status_error(response.status_code, idempotent)
+                if not retryable or attempt >= self.max_retries:
+                    raise error
+                await asyncio.sleep(self.get_retry_delay(attempt))
+                attempt += 1
+        except BaseException:
+            # Unexpected errors and cancellations count too, or a half-open trial would never end
+            self.breaker.record_failure()
+            raise
+
+    def _status_error(self, status_code, idempotent):
+        """
+        Returns `(retryable, error)` for a retryable status code.
+        """
+        return idempotent or status_code == 429, ZoomAPIError(f'Zoom returned {status_code}', status_code)
+
+    async def _get_async_client(self):
+        # httpx clients are bound to the event loop they were first used on
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_clients:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+            holder = self._hold_async_client(loop, client)
+            self._async_clients[loop] = (client, holder)
+            # Starting the generator registers it with the loop's async generator hooks
+            await anext(holder)
+        return self._async_clients[loop][0]
+
+    async def _hold_async_client(self, loop, client):
+        """
+        Keeps `client` open while `loop` runs. asyncio.run(), which runs the loops
+        of asgiref's async_to_sync and of uvicorn, closes a loop's suspended async
+        generators before closing the loop, and so closes the client and its
+        sockets along with short-lived loops.
+        """
+        try:
+            yield
+        finally:
+            self._async_clients.pop(loop, None)
+            await client.aclose()
+
+    def create_meeting(self, topic, start_time, duration, recurrence=None):
+        response = self.request(
+            'POST', '/users/me/meetings', idempotent=False, json=meeting_payload(topic, start_time, duration, recurrence)
+        )
+        return parse_created_meeting(response)
+
+    def delete_meeting(self, meeting_id, occurrence_id=None):
+        response = self.request('DELETE', f'/meetings/{meeting_id}', params=occurrence_params(occurrence_id))
+        return {'status': response.status_code}
+
+    def get_meeting(self, meeting_id):
+        response = self.request('GET', f'/meetings/{meeting_id}')
+        return parse_meeting(response)
+
+    async def acreate_meeting(self, topic, start_time, duration, recurrence=None):
+        response = await self.arequest(
+            'POST', '/users/me/meetings', idempotent=False, json=meeting_payload(topic, start_time, duration, recurrence)
+        )
+        return parse_created_meeting(response)
+
+    async def adelete_meeting(self, meeting_id, occurrence_id=None):
+        response = await self.arequest('DELETE', f'/meetings/{meeting_id}', params=occurrence_params(occurrence_id))
+        return {'status': response.status_code}
+
+    async def aget_meeting(self, meeting_id):
+        response = await self.arequest('GET', f'/meetings/{meeting_id}')
+        return parse_meeting(response)
+
+
+def meeting_payload(topic, start_time, duration, recurrence=None):
+    payload = {
+        'topic': topic,
+        'type': 2,  # Scheduled meeting
+        'start_time': format_zoom_time(start_time),
+        'duration': duration,
+        'timezone': 'UTC',
+    }
+    if recurrence is not None:
+        payload['type'] = 8  # Recurring meeting with fixed times
+        payload['recurrence'] = recurrence
+    return payload
+
+
+def occurrence_params(occurrence_id):
+    # Deleting with an occurrence id only cancels that occurrence of a recurring meeting
+    return {'occurrence_id': occurrence_id} if occurrence_id else None
+
+
+def parse_created_meeting(response):
+    if response.status_code != 201:
+        raise ZoomAPIError('Failed to create Zoom meeting', response.status_code)
+    return response.json()
+
+
+def parse_meeting(response):
+    if response.status_code != 200:
+        raise ZoomAPIError('Failed to fetch Zoom meeting', response.status_code)
+    return response.json()
+
+
+def format_zoom_time(value):
+    if hasattr(value, 'astimezone'):
+        return value.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    return value
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """
+    Returns the process-wide Zoom gateway, creating it on first use.
+    """
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = ZoomGateway.from_settings()
+    return _gateway
+
+
+@receiver(setting_changed)
+def reset_gateway(setting=None, **kwargs):
+    global _gateway
+    if setting is None or setting.startswith('ZOOM_'):
+        _gateway = None
+        # A token issued for other credentials or another OAuth server is useless now
+        cache.delete(ZOOM_TOKEN_CACHE_KEY)
+
+
+def create_zoom_meeting(topic, start_time, duration, recurrence=None):
+    return get_gateway().create_meeting(topic, start_time, duration, recurrence)
+
+def delete_zoom_meeting(meeting_id, occurrence_id=None):
+    return get_gateway().delete_meeting(meeting_id, occurrence_id)
 
 def get_zoom_meeting(meeting_id):
-    response = client.meeting.get(id=meeting_id)
-    return response
\ No newline at end of file
+    return get_gateway().get_meeting(meeting_id)
+
+async def acreate_zoom_meeting(topic, start_time, duration, recurrence=None):
+    return await get_gateway().acreate_meeting(topic, start_time, duration, recurrence)
+
+async def adelete_zoom_meeting(meeting_id, occurrence_id=None):
+    return await get_gateway().adelete_meeting(meeting_id, occurrence_id)
+
+async def aget_zoom_meeting(meeting_id):
+    return await get_gateway().aget_meeting(meeting_id)
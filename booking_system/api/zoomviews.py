@@ -1,28 +1,53 @@
-from rest_framework import generics, permissions
-from api.zoom_utils import create_zoom_meeting, delete_zoom_meeting
-from .models import ZoomMeeting
-from .serializers import ZoomMeetingSerializer
+from datetime import timedelta
+from rest_framework import generics, permissions, serializers
+from rest_framework.exceptions import APIException
+from api.zoom_utils import create_zoom_meeting, delete_zoom_meeting, ZoomAPIError, ZoomUnavailableError
+from .models import Booking, MeetingSeries, ZoomMeeting, ZoomMeetingHistory
+from .mixins import HistoryMixin, RowListMixin, history_parameter
+from .recurrence import RecurrenceRule, expand_series
+from .routers import PRIMARY
+from .signals import grouped_booking_deletes
+from .serializers import MeetingSeriesSerializer, ZoomMeetingSerializer, zoom_meeting_rows
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters as drf_filters
-from .utils import send_zoom_meeting_creation, send_zoom_meeting_deletion, send_booking_cancellation
-from api import serializers
+from .search import IndexedSearchFilter, RankOrderingFilter
+from .utils import (
+    send_zoom_meeting_creation, send_zoom_meeting_deletion, send_booking_cancellations, send_bulk_booking_cancellations
+)
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
+from django.db import transaction
 
 
-class ZoomMeetingListCreateView(generics.ListCreateAPIView):
+class ZoomServiceUnavailable(APIException):
+    status_code = 503
+    default_detail = 'Zoom is temporarily unavailable, please try again later.'
+    default_code = 'zoom_unavailable'
+
+
+class ZoomMeetingListCreateView(HistoryMixin, RowListMixin, generics.ListCreateAPIView):
     """
     Lists and creates Zoom meetings for authenticated users.
+    Archived meetings are only listed with `?history=true`.
     """
     serializer_class = ZoomMeetingSerializer
+    row_serializer = zoom_meeting_rows
+    live_model = ZoomMeeting
+    history_model = ZoomMeetingHistory
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, drf_filters.SearchFilter, drf_filters.OrderingFilter]
+    throttle_scope = 'zoom'
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, RankOrderingFilter]
     filterset_fields = ['start_time', 'end_time']
-    search_fields = ['topic']
+    search_fields = ['@topic']
     ordering_fields = ['start_time', 'end_time', 'created_at']
+    ordering = ['start_time']
 
     @swagger_auto_schema(
         operation_description="Retrieves the list of Zoom meetings for the authenticated user.",
+        manual_parameters=[history_parameter],
         responses={200: ZoomMeetingSerializer(many=True)},
         security=[{'Bearer': []}]
     )
@@ -43,7 +68,7 @@ class ZoomMeetingListCreateView(generics.ListCreateAPIView):
         Retrieves the Zoom meetings for the authenticated user.
         """
         if self.request.user.is_authenticated:
-            return ZoomMeeting.objects.filter(user=self.request.user)
+            return ZoomMeetingSerializer.setup_eager_loading(self.get_model().objects.filter(user=self.request.user))
         else:
             return ZoomMeeting.objects.none()
 
@@ -51,21 +76,29 @@ class ZoomMeetingListCreateView(generics.ListCreateAPIView):
         """
         Creates a Zoom meeting and sends a notification email to the user.
         """
+        start_time = serializer.validated_data['start_time']
+        end_time = serializer.validated_data['end_time']
         # Create the Zoom meeting
-        zoom_response = create_zoom_meeting(
-            topic=serializer.validated_data['topic'],
-            start_time=serializer.validated_data['start_time'],
-            end_time=serializer.validated_data['end_time']
-        )
+        try:
+            zoom_response = create_zoom_meeting(
+                topic=serializer.validated_data['topic'],
+                start_time=start_time,
+                duration=int((end_time - start_time).total_seconds() // 60)
+            )
+        except ZoomUnavailableError:
+            raise ZoomServiceUnavailable()
+        except ZoomAPIError:
+            zoom_response = {}
         # Check if the Zoom meeting was created successfully
         if zoom_response.get('id'):
-            # Save the Zoom meeting to the database
-            meeting = serializer.save(
-                user=self.request.user,
-                meeting_id=zoom_response['id']
-            )
-            # Send a notification email to the user
-            send_zoom_meeting_creation(self.request.user.email, meeting)
+            with transaction.atomic():
+                # Save the Zoom meeting to the database
+                meeting = serializer.save(
+                    user=self.request.user,
+                    meeting_id=zoom_response['id']
+                )
+                # Queue a notification email to the user
+                send_zoom_meeting_creation(self.request.user.email, meeting)
         else:
             # Raise an error if the Zoom meeting creation failed
             raise serializers.ValidationError("Failed to create Zoom meeting")
@@ -76,6 +109,7 @@ class ZoomMeetingRetrieveDestroyView(generics.RetrieveDestroyAPIView):
     """
     serializer_class = ZoomMeetingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'zoom'
 
     @swagger_auto_schema(
         operation_description="Retrieves a specific Zoom meeting for the authenticated user.",
@@ -107,17 +141,184 @@ class ZoomMeetingRetrieveDestroyView(generics.RetrieveDestroyAPIView):
         Deletes the Zoom meeting and sends a notification email to the user.
         and sends cancellation emails to the booked users
         """
-        zoom_response = delete_zoom_meeting(instance.meeting_id)
-        if zoom_response.get('status') == 204:
-            # Send a notification email to the user
-            send_zoom_meeting_deletion(self.request.user.email, instance)
-            # Send cancellation emails to the booked users
-            booked_users = instance.bookings.all().select_related('user')
-            for booking in booked_users:
-                send_booking_cancellation(booking.user.email, instance)
-                
-            # Delete the Zoom meeting from the database
-            instance.delete()
+        try:
+            zoom_response = delete_zoom_meeting(instance.meeting_id, instance.occurrence_id)
+        except ZoomUnavailableError:
+            raise ZoomServiceUnavailable()
+        except ZoomAPIError:
+            zoom_response = {}
+        # A meeting that no longer exists on Zoom can still be removed locally
+        if zoom_response.get('status') in (204, 404):
+            with transaction.atomic(), grouped_booking_deletes():
+                # Queue a notification email to the user
+                send_zoom_meeting_deletion(self.request.user.email, instance)
+                # Queue cancellation emails to the booked users in one batch
+                send_booking_cancellations(instance, instance.bookings.all())
+
+                # Delete the Zoom meeting from the database
+                instance.delete()
         else:
             # Raise an error if the Zoom meeting deletion failed
-            raise serializers.ValidationError("Failed to delete Zoom meeting")
\ No newline at end of file
+            raise serializers.ValidationError("Failed to delete Zoom meeting")
+
+class MeetingSeriesListCreateView(generics.ListCreateAPIView):
+    """
+    Lists and creates the authenticated user's meeting series.
+    A series is created on Zoom as one recurring meeting, whatever its number
+    of occurrences, and the occurrences of the next `SERIES_EXPANSION_DAYS`
+    are inserted at once.
+    """
+    serializer_class = MeetingSeriesSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'zoom'
+    filter_backends = []
+    ordering = ['start_time']
+
+    @swagger_auto_schema(
+        operation_description="Retrieves the list of meeting series of the authenticated user.",
+        responses={200: MeetingSeriesSerializer(many=True)},
+        security=[{'Bearer': []}]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_description="Creates a meeting repeating by an RRULE, such as `FREQ=WEEKLY;BYDAY=MO,WE;COUNT=12`.",
+        request_body=MeetingSeriesSerializer,
+        responses={201: MeetingSeriesSerializer()},
+        security=[{'Bearer': []}]
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+    def get_queryset(self):
+        if self.request.user.is_authenticated:
+            return MeetingSeries.objects.filter(user=self.request.user)
+        else:
+            return MeetingSeries.objects.none()
+
+    def perform_create(self, serializer):
+        """
+        Creates the recurring Zoom meeting, the series and its first occurrences.
+        """
+        start_time = serializer.validated_data['start_time']
+        end_time = serializer.validated_data['end_time']
+        try:
+            zoom_response = create_zoom_meeting(
+                topic=serializer.validated_data['topic'],
+                start_time=start_time,
+                duration=int((end_time - start_time).total_seconds() // 60),
+                recurrence=RecurrenceRule.parse(serializer.validated_data['rrule']).zoom_recurrence(start_time)
+            )
+        except ZoomUnavailableError:
+            raise ZoomServiceUnavailable()
+        except ZoomAPIError:
+            zoom_response = {}
+        if not zoom_response.get('id'):
+            raise serializers.ValidationError("Failed to create Zoom meeting")
+        with transaction.atomic():
+            series = serializer.save(user=self.request.user, meeting_id=zoom_response['id'], expanded_until=start_time)
+            expand_series(series, timezone.now() + timedelta(days=settings.SERIES_EXPANSION_DAYS))
+            send_zoom_meeting_creation(self.request.user.email, series)
+
+class MeetingSeriesRetrieveDestroyView(generics.RetrieveDestroyAPIView):
+    """
+    Retrieves and destroys the authenticated user's meeting series.
+    """
+    serializer_class = MeetingSeriesSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'zoom'
+
+    @swagger_auto_schema(
+        operation_description="Retrieves a meeting series of the authenticated user.",
+        responses={200: MeetingSeriesSerializer()},
+        security=[{'Bearer': []}]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_description="Deletes a meeting series with all its occurrences.",
+        responses={204: "No Content"},
+        security=[{'Bearer': []}]
+    )
+    def delete(self, request, *args, **kwargs):
+        return super().delete(request, *args, **kwargs)
+
+    def get_queryset(self):
+        if self.request.user.is_authenticated:
+            return MeetingSeries.objects.filter(user=self.request.user)
+        else:
+            return MeetingSeries.objects.none()
+
+    def perform_destroy(self, instance):
+        """
+        Deletes the recurring Zoom meeting and the series with its upcoming
+        occurrences, and queues the cancellation emails of their bookings in
+        one batch. Occurrences that already started are kept, detached from
+        the series, with their bookings.
+        """
+        try:
+            zoom_response = delete_zoom_meeting(instance.meeting_id)
+        except ZoomUnavailableError:
+            raise ZoomServiceUnavailable()
+        except ZoomAPIError:
+            zoom_response = {}
+        if zoom_response.get('status') not in (204, 404):
+            raise serializers.ValidationError("Failed to delete Zoom meeting")
+        now = timezone.now()
+        with transaction.atomic(), grouped_booking_deletes():
+            instance.occurrences.filter(start_time__lte=now).update(series=None, updated_at=now)
+            send_zoom_meeting_deletion(self.request.user.email, instance)
+            send_bulk_booking_cancellations(
+                Booking.objects.filter(zoom_meeting__series=instance).select_related('user', 'zoom_meeting')
+            )
+            instance.delete()
+
+class MeetingSeriesOccurrencesView(generics.ListAPIView):
+    """
+    Lists the occurrences of a meeting series starting between `start` (default
+    now) and `end` (default `SERIES_EXPANSION_DAYS` later). The series' owner
+    also creates those not created yet; other users only see the occurrences
+    expanded so far. Occurrences are booked like any other meeting.
+    """
+    serializer_class = ZoomMeetingSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = []
+    ordering = ['start_time']
+
+    @swagger_auto_schema(
+        operation_description="Lists the occurrences of a meeting series within a time window.",
+        manual_parameters=[
+            openapi.Parameter('start', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+            openapi.Parameter('end', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+        ],
+        responses={200: ZoomMeetingSerializer(many=True)},
+        security=[{'Bearer': []}]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_window(self):
+        field = serializers.DateTimeField()
+        window = {}
+        for name in ('start', 'end'):
+            if name in self.request.query_params:
+                try:
+                    window[name] = field.to_internal_value(self.request.query_params[name])
+                except serializers.ValidationError as exc:
+                    raise serializers.ValidationError({name: exc.detail})
+        start = window.get('start', timezone.now())
+        return start, window.get('end', start + timedelta(days=settings.SERIES_EXPANSION_DAYS))
+
+    def get_queryset(self):
+        series = get_object_or_404(MeetingSeries, pk=self.kwargs['pk'])
+        start, end = self.get_window()
+        occurrences = series.occurrences.all()
+        if series.user_id == self.request.user.pk:
+            expand_series(series, end)
+            # The new occurrences may not have reached the replicas yet
+            occurrences = occurrences.using(PRIMARY)
+        return ZoomMeetingSerializer.setup_eager_loading(
+            occurrences.filter(start_time__gte=start, start_time__lt=end)
+        )
@@ -0,0 +1,8 @@
+"""
+Load and latency benchmarks for the booking API.
+
+Run from the project directory with `python -m benchmarks`; see
+`python -m benchmarks --help` for the options. The benchmarks run against a
+throwaway test database seeded by `benchmarks.fixtures`, with Zoom replaced by
+a local fake server and email by Django's locmem backend.
+"""
@@ -0,0 +1,91 @@
+import argparse
+import os
+import sys
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Benchmarks the booking API endpoints.")
+    parser.add_argument('--scenarios', nargs='+', help="Scenarios to run (default: all).")
+    parser.add_argument('--requests', type=int, default=500, help="Measured requests per scenario.")
+    parser.add_argument('--warmup', type=int, default=20, help="Unmeasured requests per scenario.")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients.")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--meetings', type=int, default=500)
+    parser.add_argument('--bookings-per-user', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the fixture generator.")
+    parser.add_argument(
+        '--conn-max-age', type=int, help="Override CONN_MAX_AGE, e.g. 0 to open a connection per request."
+    )
+    parser.add_argument('--zoom-latency', type=float, default=0.05, help="Seconds the fake Zoom server takes per call.")
+    parser.add_argument('--output', default='benchmark-report.json', help="Where to write the JSON report.")
+    parser.add_argument('--compare', metavar='BASELINE', help="Report of an earlier run to compare against.")
+    parser.add_argument('--threshold', type=float, default=10.0, help="Percent change counted as a regression.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'booking_system.settings')
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.test.utils import override_settings
+    from api.tests.fake_zoom import FakeZoomServer
+    from . import fixtures, runner
+    from .scenarios import SCENARIOS
+
+    names = options.scenarios or list(SCENARIOS)
+    unknown = set(names) - SCENARIOS.keys()
+    if unknown:
+        sys.exit(f"Unknown scenario(s): {', '.join(sorted(unknown))}. Choose from {', '.join(SCENARIOS)}.")
+
+    with runner.benchmark_database():
+        if options.conn_max_age is not None:
+            settings.DATABASES['default']['CONN_MAX_AGE'] = options.conn_max_age
+        zoom = FakeZoomServer(delay=options.zoom_latency).start()
+        # Rates no scenario reaches: the throttles' cost is measured, never a 429
+        rates = {scope: '1000000/s' for scope in settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']}
+        settings_override = override_settings(
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}, **zoom.settings
+        )
+        settings_override.enable()
+        try:
+            cache.clear()
+            dataset = fixtures.seed(options.users, options.meetings, options.bookings_per_user, options.seed)
+            results = {}
+            for name in names:
+                results[name] = runner.run_scenario(
+                    SCENARIOS[name], dataset, options.requests, options.concurrency, options.warmup
+                )
+                latency = results[name]['latency_ms']
+                print(
+                    f"{name:<22} {results[name]['requests_per_second']:8.1f} req/s  "
+                    f"p50 {latency['p50']:8.2f} ms  p95 {latency['p95']:8.2f} ms  p99 {latency['p99']:8.2f} ms  "
+                    f"{results[name]['queries_per_request']['mean']:5.1f} queries/req  "
+                    f"{results[name]['connections_opened']} connections  {results[name]['errors']} errors"
+                )
+            report = runner.build_report(results, vars(options))
+            report['dataset'] = {
+                'users': len(dataset.users), 'meetings': len(dataset.meetings), 'bookings': dataset.bookings,
+            }
+        finally:
+            settings_override.disable()
+            zoom.stop()
+
+    runner.write_report(report, options.output)
+    print(f"Report written to {options.output}")
+
+    if options.compare:
+        rows, regressions = runner.compare_reports(runner.load_report(options.compare), report, options.threshold)
+        for name, metric, old, new, change in rows:
+            marker = '  <-- regression' if (name, metric, old, new, change) in regressions else ''
+            print(f"{name:<22} {metric:<8} {old:10.2f} -> {new:10.2f} ({change:+6.1f}%){marker}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import random
+from collections import namedtuple
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+from api.models import Booking, ZoomMeeting
+from api.search import index_meetings
+
+PASSWORD = 'benchmark-password'
+
+Dataset = namedtuple('Dataset', ['users', 'hosts', 'meetings', 'open_meetings', 'bookings'])
+
+
+def seed(users=200, meetings=500, bookings_per_user=5, seed=0):
+    """
+    Inserts a reproducible data set with bulk inserts and returns a `Dataset`.
+
+    One in ten users hosts meetings, meetings follow each other without
+    overlapping from tomorrow on and every user books `bookings_per_user` meetings from the first half of
+    them. The second half (`open_meetings`) is left unbooked, so write
+    benchmarks can book it without colliding with the seeded bookings.
+    """
+    rng = random.Random(seed)
+    # Hashing is deliberately slow, so every user shares one hash
+    password = make_password(PASSWORD)
+    User.objects.bulk_create([
+        User(username=f'bench-user-{i}', email=f'bench-user-{i}@example.com', password=password)
+        for i in range(users)
+    ])
+    all_users = list(User.objects.filter(username__startswith='bench-user-').order_by('id'))
+    hosts = all_users[:max(1, users // 10)]
+
+    now = timezone.now()
+    ZoomMeeting.objects.bulk_create([
+        ZoomMeeting(
+            user=rng.choice(hosts),
+            meeting_id=f'bench-{i}',
+            topic=f'Benchmark meeting {i}',
+            start_time=start,
+            end_time=start + timedelta(minutes=rng.choice((30, 45, 60))),
+            capacity=users,
+        )
+        # Slots are longer than any meeting, so no calendar gets overlapping entries
+        for i, start in enumerate(now + timedelta(days=1, minutes=70 * i) for i in range(meetings))
+    ])
+    all_meetings = list(ZoomMeeting.objects.filter(meeting_id__startswith='bench-').order_by('id'))
+    # bulk_create skips the signal that indexes topics for search
+    index_meetings(all_meetings)
+    booked_meetings = all_meetings[:len(all_meetings) // 2]
+
+    bookings = []
+    booked_count = {}
+    for user in all_users:
+        for meeting in rng.sample(booked_meetings, min(bookings_per_user, len(booked_meetings))):
+            bookings.append(Booking(
+                user=user, zoom_meeting=meeting, start_time=meeting.start_time, end_time=meeting.end_time
+            ))
+            booked_count[meeting.pk] = booked_count.get(meeting.pk, 0) + 1
+    Booking.objects.bulk_create(bookings, batch_size=1000)
+    ZoomMeeting.reserve_seats(booked_count)
+
+    return Dataset(
+        users=all_users,
+        hosts=hosts,
+        meetings=all_meetings,
+        open_meetings=all_meetings[len(all_meetings) // 2:],
+        bookings=len(bookings),
+    )
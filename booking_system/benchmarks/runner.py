@@ -0,0 +1,207 @@
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from statistics import mean
+from time import perf_counter
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Runs the block against a throwaway test database, with the locmem email
+    backend, and never against the real ones.
+    """
+    setup_test_environment()
+    tmpdir = None
+    if connection.vendor == 'sqlite':
+        # Concurrent clients need a file; an in-memory database is per connection
+        tmpdir = tempfile.TemporaryDirectory()
+        settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = os.path.join(tmpdir.name, 'benchmark.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    for alias in settings.REPLICA_DATABASES:
+        connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+
+class QueryCounter:
+    """
+    `execute_wrapper` hook counting the queries run on the current thread's connections.
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def run_scenario(scenario, dataset, requests, concurrency, warmup=0):
+    """
+    Drives `scenario` with `concurrency` threads, each with its own client and
+    database connection, until `requests` requests have been issued.
+    Returns the scenario's summary for the report.
+    """
+    lock = threading.Lock()
+    next_index = iter(range(warmup + requests))
+    samples = []
+    errors = []
+    opened = []
+
+    def count_connection(sender, connection, **kwargs):
+        with lock:
+            opened.append(connection.alias)
+
+    def worker():
+        client = Client()
+        counter = QueryCounter()
+        try:
+            with ExitStack() as stack:
+                # Reads may be routed to a replica, so count on every alias
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(counter))
+                while True:
+                    with lock:
+                        i = next(next_index, None)
+                    if i is None:
+                        break
+                    counter.count = 0
+                    started = perf_counter()
+                    try:
+                        status = scenario.request(client, dataset, i).status_code
+                    except Exception as exc:
+                        status = repr(exc)
+                    elapsed = perf_counter() - started
+                    # The test client skips the request_finished cleanup a real server
+                    # runs, which closes connections older than CONN_MAX_AGE
+                    close_old_connections()
+                    if i < warmup:
+                        continue
+                    with lock:
+                        samples.append((elapsed, counter.count))
+                        if status not in scenario.expected:
+                            errors.append(status)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    connection_created.connect(count_connection, weak=False)
+    started = perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        wall = perf_counter() - started
+        connection_created.disconnect(count_connection)
+
+    latencies = sorted(elapsed * 1000 for elapsed, _ in samples)
+    queries = [count for _, count in samples]
+    return {
+        'requests': len(samples),
+        'concurrency': concurrency,
+        'errors': len(errors),
+        'error_statuses': sorted({str(status) for status in errors}),
+        'requests_per_second': len(samples) / wall if wall else None,
+        'latency_ms': {
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'mean': mean(latencies) if latencies else None,
+            'max': latencies[-1] if latencies else None,
+        },
+        'queries_per_request': {
+            'mean': mean(queries) if queries else None,
+            'max': max(queries) if queries else None,
+        },
+        # Includes the warmup requests; with persistent connections this stays
+        # near one per client, without them it is one per request
+        'connections_opened': len(opened),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results, options):
+    return {
+        'commit': git_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'options': options,
+        'scenarios': results,
+    }
+
+
+def compare_reports(baseline, current, threshold=10.0):
+    """
+    Compares the scenarios two reports have in common.
+    Returns `(rows, regressions)`: one row per scenario and metric with the
+    baseline value, the current value and the change in percent, and the rows
+    that got worse by more than `threshold` percent.
+    """
+    metrics = (
+        ('p50_ms', lambda s: s['latency_ms']['p50'], False),
+        ('p95_ms', lambda s: s['latency_ms']['p95'], False),
+        ('p99_ms', lambda s: s['latency_ms']['p99'], False),
+        ('rps', lambda s: s['requests_per_second'], True),
+        ('queries', lambda s: s['queries_per_request']['mean'], False),
+        ('connections', lambda s: s.get('connections_opened'), False),
+    )
+    rows = []
+    regressions = []
+    for name in sorted(baseline['scenarios'].keys() & current['scenarios'].keys()):
+        for metric, value, higher_is_better in metrics:
+            old = value(baseline['scenarios'][name])
+            new = value(current['scenarios'][name])
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            row = (name, metric, old, new, change)
+            rows.append(row)
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(row)
+    return rows, regressions
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
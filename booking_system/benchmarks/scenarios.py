@@ -0,0 +1,69 @@
+from collections import namedtuple
+from datetime import timedelta
+from functools import lru_cache
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from .fixtures import PASSWORD
+
+# `request(client, dataset, i)` issues the i-th request of the scenario and
+# returns the response; any status outside `expected` counts as an error.
+Scenario = namedtuple('Scenario', ['name', 'request', 'expected'])
+
+
+def auth_headers(user):
+    # Clients reuse their access token across requests rather than minting one per call
+    return {'Authorization': f'Bearer {_access_token(user)}'}
+
+
+@lru_cache(maxsize=None)
+def _access_token(user):
+    return str(AccessToken.for_user(user))
+
+
+def list_slots(client, dataset, i):
+    user = dataset.users[i % len(dataset.users)]
+    return client.get('/api/slots/', headers=auth_headers(user))
+
+
+def list_bookings(client, dataset, i):
+    user = dataset.users[i % len(dataset.users)]
+    return client.get('/api/bookings/', headers=auth_headers(user))
+
+
+def create_booking(client, dataset, i):
+    # Walks the (user, open meeting) pairs so no two requests book the same seat
+    users = dataset.users
+    user = users[i % len(users)]
+    meeting = dataset.open_meetings[(i // len(users)) % len(dataset.open_meetings)]
+    return client.post(
+        '/api/bookings/', {'zoom_meeting_id': meeting.pk}, content_type='application/json', headers=auth_headers(user)
+    )
+
+
+def create_zoom_meeting(client, dataset, i):
+    host = dataset.hosts[i % len(dataset.hosts)]
+    start = timezone.now() + timedelta(days=60, hours=i)
+    data = {
+        'topic': f'Benchmark created meeting {i}',
+        'start_time': start.isoformat(),
+        'end_time': (start + timedelta(minutes=30)).isoformat(),
+    }
+    return client.post('/api/zoom/meetings/', data, content_type='application/json', headers=auth_headers(host))
+
+
+def login(client, dataset, i):
+    user = dataset.users[i % len(dataset.users)]
+    return client.post(
+        '/api/login/', {'username': user.username, 'password': PASSWORD}, content_type='application/json'
+    )
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in (
+        Scenario('slots', list_slots, {200}),
+        Scenario('bookings_list', list_bookings, {200}),
+        Scenario('bookings_create', create_booking, {201}),
+        Scenario('zoom_meetings_create', create_zoom_meeting, {201}),
+        Scenario('login', login, {200}),
+    )
+}
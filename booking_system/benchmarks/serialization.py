@@ -0,0 +1,106 @@
+import argparse
+import os
+import sys
+from time import perf_counter
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.serialization',
+        description="Compares serialization throughput of the list responses before and after the fast path."
+    )
+    parser.add_argument('--meetings', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--bookings-per-user', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per variant; the fastest one is reported.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the fixture generator.")
+    parser.add_argument('--output', default='serialization-report.json', help="Where to write the JSON report.")
+    return parser.parse_args(argv)
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        func()
+        timings.append(perf_counter() - started)
+    return min(timings)
+
+
+def compare_variants(variants, rows, repeat):
+    """
+    Times each `(name, func)` variant, which must all return the same bytes.
+    The first variant is the baseline the others' speedups are relative to.
+    Raises AssertionError when an output differs from the baseline's.
+    """
+    expected = variants[0][1]()
+    results = {}
+    for name, func in variants:
+        if func() != expected:
+            raise AssertionError(f"{name} does not render the same bytes as {variants[0][0]}")
+        seconds = best_time(func, repeat)
+        results[name] = {'seconds': seconds, 'rows_per_second': rows / seconds if seconds else None}
+    baseline = results[variants[0][0]]['seconds']
+    for result in results.values():
+        result['speedup'] = baseline / result['seconds'] if result['seconds'] else None
+    return {'rows': rows, 'bytes': len(expected), 'variants': results}
+
+
+def run(repeat=5):
+    """
+    Renders every meeting, and every booking with its nested meeting, as the
+    list endpoints do: the stock ModelSerializer and JSONRenderer, the row
+    serializer with the stock renderer, and the row serializer with orjson.
+    """
+    from rest_framework.renderers import JSONRenderer
+    from api.models import Booking, ZoomMeeting
+    from api.renderers import ORJSONRenderer
+    from api.serializers import BookingSerializer, ZoomMeetingSerializer, booking_rows, zoom_meeting_rows
+
+    json_renderer = JSONRenderer()
+    orjson_renderer = ORJSONRenderer()
+    report = {}
+    for name, queryset, serializer_class, rows in (
+        ('meetings', ZoomMeeting.objects.order_by('start_time', 'id'), ZoomMeetingSerializer, zoom_meeting_rows),
+        ('bookings', Booking.objects.order_by('id'), BookingSerializer, booking_rows),
+    ):
+        variants = [
+            ('model_serializer+json', lambda: json_renderer.render(
+                serializer_class(serializer_class.setup_eager_loading(queryset), many=True).data
+            )),
+            ('row_serializer+json', lambda: json_renderer.render(rows.serialize(queryset))),
+            ('row_serializer+orjson', lambda: orjson_renderer.render(rows.serialize(queryset))),
+        ]
+        report[name] = compare_variants(variants, queryset.count(), repeat)
+    return report
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'booking_system.settings')
+
+    import django
+    django.setup()
+
+    from . import fixtures, runner
+
+    with runner.benchmark_database():
+        fixtures.seed(options.users, options.meetings, options.bookings_per_user, options.seed)
+        try:
+            results = run(options.repeat)
+        except AssertionError as exc:
+            sys.exit(str(exc))
+    for name, result in results.items():
+        print(f"{name}: {result['rows']} rows, {result['bytes']} bytes, identical output")
+        for variant, timing in result['variants'].items():
+            print(
+                f"  {variant:<24} {timing['seconds'] * 1000:9.1f} ms  "
+                f"{timing['rows_per_second']:10.0f} rows/s  x{timing['speedup']:.2f}"
+            )
+    report = runner.build_report(results, vars(options))
+    runner.write_report(report, options.output)
+    print(f"Report written to {options.output}")
+
+
+if __name__ == '__main__':
+    main()
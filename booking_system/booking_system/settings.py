@@ -56,6 +56,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.metrics.PerformanceMiddleware",
+    "api.routers.ReplicaPinningMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -94,9 +96,16 @@ if DEBUG:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
-        }
+        },
+        # A second connection to the same file stands in for a replica locally
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            "TEST": {"MIRROR": "default"},
+        },
     }
-else:    DATABASES = {
+else:
+    DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.postgresql',
             'NAME': os.getenv('POSTGRES_DB'),
@@ -104,8 +113,33 @@ else:    DATABASES = {
             'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
             'HOST': os.getenv('POSTGRES_HOST'),
             'PORT': os.getenv('POSTGRES_PORT'),
+            # Keep connections open between requests instead of paying a new
+            # TCP+auth handshake each time, and check them before reuse
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True').lower() == 'true',
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+                'keepalives': 1,
+                'keepalives_idle': int(os.getenv('DB_KEEPALIVES_IDLE', 30)),
+                'application_name': os.getenv('DB_APPLICATION_NAME', 'booking_system'),
+            },
         }
     }
+    # Read replicas share the primary's credentials; list their hosts in DB_REPLICA_HOSTS
+    for i, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+        DATABASES[f'replica{i}'] = dict(DATABASES['default'], HOST=host.strip(), TEST={'MIRROR': 'default'})
+
+# Safe reads go to the replicas; a user's reads stay on the primary for
+# REPLICA_STICKY_SECONDS after their own write
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+
+# Behind a transaction-mode pooler such as PgBouncer (the `pgbouncer` service in
+# docker-compose.yml), connections are shared between clients per transaction,
+# which rules out server-side cursors
+if not DEBUG and os.getenv('DB_POOLER') == 'pgbouncer':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
 
 
 # Password validation
@@ -157,24 +191,148 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        
+        'api.authentication.CachedJWTAuthentication',
     ),
+    # orjson renders the same bytes as DRF's JSONRenderer, several times faster
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
-    
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+    # Token buckets, see api.throttling. Views with a `throttle_scope` also have
+    # their writes limited at that scope's rate, and at '<scope>_global' across
+    # all clients; a rate of "N/period" allows bursts of N requests.
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.IPThrottle',
+        'api.throttling.UserThrottle',
+        'api.throttling.ScopedThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'ip': os.getenv('THROTTLE_RATE_IP', '300/min'),
+        'user': os.getenv('THROTTLE_RATE_USER', '600/min'),
+        'auth': os.getenv('THROTTLE_RATE_AUTH', '20/min'),
+        'bookings': os.getenv('THROTTLE_RATE_BOOKINGS', '60/min'),
+        'zoom': os.getenv('THROTTLE_RATE_ZOOM', '20/min'),
+        'zoom_global': os.getenv('THROTTLE_RATE_ZOOM_GLOBAL', '10/s'),
+    },
+    # Reverse proxies in front of the app whose X-Forwarded-For entries are
+    # trusted for the client address; with 0 the header is ignored, since
+    # clients could otherwise rotate it to get fresh per-address buckets
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
 }
 
+# Shared cache. Without a Redis URL it falls back to a per-process memory cache:
+# fine for a single process, but then JWT user invalidation, read-replica
+# pinning, the Zoom token refresh lock and the slots cache versions stop at the
+# process boundary (`check --deploy` warns, see api.checks)
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Cached slots feed, invalidated by signals on ZoomMeeting/Booking changes. It is
+# cached SLOTS_CACHE_WINDOW rows per entry, and one worker recomputes a missing
+# entry while the others wait up to SLOTS_CACHE_LOCK_TIMEOUT seconds for it
+SLOTS_CACHE_TIMEOUT = int(os.getenv('SLOTS_CACHE_TIMEOUT', 300))
+SLOTS_CACHE_WINDOW = int(os.getenv('SLOTS_CACHE_WINDOW', 200))
+SLOTS_CACHE_LOCK_TIMEOUT = float(os.getenv('SLOTS_CACHE_LOCK_TIMEOUT', 2))
+# Fraction of requests timed per component (database, SMTP, Zoom) and given a
+# Server-Timing header; every request is still counted on /metrics
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 0.1))
+# Bearer token required to scrape /metrics, if set
+METRICS_AUTH_TOKEN = os.getenv('METRICS_AUTH_TOKEN')
+# Upper bound on the number of items in one bulk booking or cancellation request
+BOOKING_BULK_MAX_ITEMS = int(os.getenv('BOOKING_BULK_MAX_ITEMS', 500))
+# Occurrences of meeting series are created this many days ahead (see the
+# expand_series command), and a series can have at most SERIES_MAX_OCCURRENCES,
+# the most Zoom allows for a recurring meeting
+SERIES_EXPANSION_DAYS = int(os.getenv('SERIES_EXPANSION_DAYS', 28))
+SERIES_MAX_OCCURRENCES = int(os.getenv('SERIES_MAX_OCCURRENCES', 60))
+# The archive_meetings command moves meetings that ended more than
+# ARCHIVE_AFTER_DAYS ago, and their bookings, to the archive tables,
+# ARCHIVE_BATCH_SIZE meetings per transaction
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 90))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 500))
+# The sync feed sends the changes of the last SYNC_OVERLAP_SECONDS before each
+# response again on the next poll, so rows committed late by a slow transaction
+# are not skipped. Deletions are remembered for SYNC_TOMBSTONE_DAYS; older
+# sync tokens get a 410 and clients start over with a full snapshot.
+SYNC_OVERLAP_SECONDS = float(os.getenv('SYNC_OVERLAP_SECONDS', 5))
+SYNC_TOMBSTONE_DAYS = int(os.getenv('SYNC_TOMBSTONE_DAYS', 30))
+# Slot change events streamed at /api/async/slots/events/. With Redis, events
+# reach the subscribers of every process; otherwise only those of the process
+# handling the write.
+EVENTS_BROKER = os.getenv(
+    'EVENTS_BROKER', 'api.events.RedisBroker' if os.getenv('REDIS_URL') else 'api.events.InProcessBroker'
+)
+EVENTS_REDIS_URL = os.getenv('EVENTS_REDIS_URL', os.getenv('REDIS_URL'))
+# Events buffered per subscriber before it is told to resync, and seconds
+# between keepalive comments on idle streams
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', 100))
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv('EVENTS_KEEPALIVE_SECONDS', 15))
+# Rows read from the database, and written to the response, per chunk of a
+# streamed .ics/.csv export
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+# Search backend for meeting topics (see api.search); by default the one for
+# the database's vendor: tsvector and trigram indexes on Postgres, FTS5 on SQLite
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND')
+# Where rate limit buckets live. With Redis the limits hold across processes;
+# if Redis cannot be reached within THROTTLE_REDIS_TIMEOUT seconds, each
+# process falls back to its own buckets.
+THROTTLE_STORE = os.getenv(
+    'THROTTLE_STORE', 'api.throttling.RedisBucketStore' if os.getenv('REDIS_URL') else 'api.throttling.LocalBucketStore'
+)
+THROTTLE_REDIS_URL = os.getenv('THROTTLE_REDIS_URL', os.getenv('REDIS_URL'))
+THROTTLE_REDIS_TIMEOUT = float(os.getenv('THROTTLE_REDIS_TIMEOUT', 0.05))
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
+# Seconds a validated access token's user is remembered in-process, skipping the
+# user query on repeat requests; 0 disables the cache. Each hit checks the default
+# cache, so with Redis user changes and blacklisted tokens reach every worker at once
+JWT_USER_CACHE_TIMEOUT = float(os.getenv('JWT_USER_CACHE_TIMEOUT', 30))
+JWT_USER_CACHE_MAX_ENTRIES = int(os.getenv('JWT_USER_CACHE_MAX_ENTRIES', 10000))
 
 #encrypt passw
 
-PASSWORD_HASHERS = [
-    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+# PASSWORD_HASHER (bcrypt_sha256, argon2 or scrypt) hashes new passwords; the
+# others stay listed so older hashes still verify and are upgraded on login.
+# Lowering a cost makes login cheaper at the price of weaker hashes.
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'bcrypt_sha256')
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv('PASSWORD_BCRYPT_ROUNDS', 12))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv('PASSWORD_ARGON2_MEMORY_COST', 102400))
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv('PASSWORD_ARGON2_PARALLELISM', 8))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv('PASSWORD_SCRYPT_WORK_FACTOR', 2**14))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.getenv('PASSWORD_SCRYPT_BLOCK_SIZE', 8))
+PASSWORD_SCRYPT_PARALLELISM = int(os.getenv('PASSWORD_SCRYPT_PARALLELISM', 1))
+_PASSWORD_HASHERS = {
+    'bcrypt_sha256': 'api.hashers.TunableBCryptSHA256PasswordHasher',
+    'argon2': 'api.hashers.TunableArgon2PasswordHasher',
+    'scrypt': 'api.hashers.TunableScryptPasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
 ]
 
 # Email settings
@@ -187,10 +345,41 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_FROM = os.getenv("EMAIL_FROM")
 
+# Outgoing emails are queued in the outbox table and delivered by
+# `python manage.py process_email_outbox`
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 100))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_RETRY_BASE_SECONDS', 30))
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = int(os.getenv('EMAIL_OUTBOX_RETRY_MAX_SECONDS', 3600))
+EMAIL_OUTBOX_POLL_INTERVAL = float(os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', 5))
+# Bulk sends reuse one SMTP connection per chunk, with chunks spread over a small pool
+EMAIL_BULK_CHUNK_SIZE = int(os.getenv('EMAIL_BULK_CHUNK_SIZE', 50))
+EMAIL_BULK_MAX_WORKERS = int(os.getenv('EMAIL_BULK_MAX_WORKERS', 4))
+
 #Zoom sdk 
 ZOOM_API_KEY = os.getenv('ZOOM_API_KEY')
 ZOOM_API_SECRET = os.getenv('ZOOM_API_SECRET')
 ZOOM_API_ACCOUNT_ID = os.getenv('ZOOM_API_ACCOUNT_ID')
+ZOOM_API_BASE_URL = os.getenv('ZOOM_API_BASE_URL', 'https://api.zoom.us/v2')
+ZOOM_OAUTH_URL = os.getenv('ZOOM_OAUTH_URL', 'https://zoom.us/oauth/token')
+# Keep Zoom slowness from tying up request workers
+ZOOM_CONNECT_TIMEOUT = float(os.getenv('ZOOM_CONNECT_TIMEOUT', 3.05))
+ZOOM_READ_TIMEOUT = float(os.getenv('ZOOM_READ_TIMEOUT', 10))
+ZOOM_MAX_RETRIES = int(os.getenv('ZOOM_MAX_RETRIES', 2))
+ZOOM_RETRY_BACKOFF = float(os.getenv('ZOOM_RETRY_BACKOFF', 0.5))
+ZOOM_POOL_SIZE = int(os.getenv('ZOOM_POOL_SIZE', 10))
+ZOOM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('ZOOM_CIRCUIT_FAILURE_THRESHOLD', 5))
+ZOOM_CIRCUIT_RESET_TIMEOUT = float(os.getenv('ZOOM_CIRCUIT_RESET_TIMEOUT', 30))
+# Access tokens are shared between workers through the cache; one worker refreshes at a time
+ZOOM_TOKEN_LOCK_TIMEOUT = float(os.getenv('ZOOM_TOKEN_LOCK_TIMEOUT', 10))
+# Secret token of the Zoom webhook app, which signs every delivery; deliveries
+# older than ZOOM_WEBHOOK_TOLERANCE_SECONDS are rejected as replays. Queued
+# events are applied ZOOM_WEBHOOK_BATCH_SIZE at a time by process_zoom_webhooks
+ZOOM_WEBHOOK_SECRET_TOKEN = os.getenv('ZOOM_WEBHOOK_SECRET_TOKEN')
+ZOOM_WEBHOOK_TOLERANCE_SECONDS = int(os.getenv('ZOOM_WEBHOOK_TOLERANCE_SECONDS', 300))
+ZOOM_WEBHOOK_BATCH_SIZE = int(os.getenv('ZOOM_WEBHOOK_BATCH_SIZE', 100))
+ZOOM_WEBHOOK_MAX_ATTEMPTS = int(os.getenv('ZOOM_WEBHOOK_MAX_ATTEMPTS', 5))
+ZOOM_WEBHOOK_POLL_INTERVAL = float(os.getenv('ZOOM_WEBHOOK_POLL_INTERVAL', 2))
 
 
 SWAGGER_SETTINGS = {